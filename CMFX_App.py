@@ -208,6 +208,9 @@ class CMFX_App(TestingApp):
             indicator.pack(side='top', anchor='w', pady=(0, labelPadding))
             self.booleanIndicators[indicator_label] = indicator
 
+        # Power supply indicators work off reverse boolean logic, so their lines are inverted
+        self.statusModel = StatusModel(self.di_Pins, invertedLines=powerSupplyIndicatorLabels[POWER_SUPPLY])
+
         # Plot of charge
         self.chargePlot = CanvasPlot(self.chargingStatusFrame, figsize=(10, 4))
 
@@ -232,8 +235,8 @@ class CMFX_App(TestingApp):
 
         # Add actors to blit manager
         # Blit manager speeds up plotting by redrawing only necessary items
-        self.bm = BlitManager(self.chargePlot.canvas, [self.chargeVoltageLine, self.chargeCurrentLine, self.capacitorVoltageLine,
-                                                    self.chargePlot.ax.xaxis, self.chargePlot.ax.yaxis, self.chargeCurrentAxis.yaxis])
+        # The axes are left in the background and redrawn with the whole canvas when the limits change
+        self.bm = BlitManager(self.chargePlot.canvas, [self.chargeVoltageLine, self.chargeCurrentLine, self.capacitorVoltageLine])
 
         # Create the legends before any plot is made
         self.chargePlot.ax.legend(handles=chargeHandles, loc='upper right')
@@ -275,7 +278,7 @@ class CMFX_App(TestingApp):
                                 'Accelerometer': {'twinx': False, 'ylabel': 'Accelerometer (V)', 'lines': ACCLines},
                                 'Diode': {'twinx': False, 'ylabel': 'Diode (V)', 'lines': DIODELines}}
         
-        self.resultsPlotViewer = PlotViewer(self.notebookFrames['Results'], self.resultsPlotData)
+        self.resultsPlotViewer = PlotViewer(self.notebookFrames['Results'], self.resultsPlotData, loadData=self.loadLines)
 
         # Row for diagnostics on the bottom
         misc_diagnostics = ttk.LabelFrame(self.notebookFrames['Results'], text='Misc. Diagnostics', bootstyle='primary')
@@ -347,12 +350,19 @@ class CMFX_App(TestingApp):
         self.menubar = ttk.Menu(self)
         self.filemenu = ttk.Menu(self.menubar, tearoff=0)
         self.filemenu.add_command(label='Open', command=self.readResults)
+        self.filemenu.add_command(label='Find Shots', command=self.openArchive)
         self.filemenu.add_command(label='Save Folder', command=self.setSaveLocation)
         self.filemenu.add_command(label='Set Pins', command=self.pinSelector)
+        self.filemenu.add_command(label='Export Results Master', command=self.exportResultsMaster)
         self.filemenu.add_separator()
         self.filemenu.add_command(label='Quit', command=self.on_closing)
         self.menubar.add_cascade(label='File', menu=self.filemenu)
 
+        self.viewmenu = ttk.Menu(self.menubar, tearoff=0)
+        self.viewmenu.add_command(label='Latency Panel', command=self.openLatencyPanel)
+        self.viewmenu.add_checkbutton(label='Record Trace', command=self.toggleTrace)
+        self.menubar.add_cascade(label='View', menu=self.viewmenu)
+
         self.helpmenu = ttk.Menu(self.menubar, tearoff=0)
         self.helpmenu.add_command(label='Help', command=self.help)
         self.helpmenu.add_command(label='About...', command=self.openSite)
@@ -387,22 +397,25 @@ class CMFX_App(TestingApp):
         # If the user closes out of the application during a wait_window, no extra windows pop up
         self.update()
         
-        self.updateSystemStatus()
+        self.refreshScheduler.start(self.updateSystemStatus, active=self.refreshActive)
+
+        if SHOW_LATENCY_PANEL:
+            self.openLatencyPanel()
         
         self.safetyLights()
 
     def editNotes(self, notes, type):
         # Change individual results file
-        results_df = pd.read_csv(f'{self.saveFolder}/{self.runDate}/{self.filename}', low_memory=False)
         columnName = single_columns[type]['name']
-        results_df.at[0, columnName] = notes
-        results_df.to_csv(f'{self.saveFolder}/{self.runDate}/{self.filename}', index=False)
+        if self.filename.endswith(shotFileExtension):
+            updateShot(f'{self.saveFolder}/{self.runDate}/{self.filename}', **{type: notes})
+        else:
+            results_df = pd.read_csv(f'{self.saveFolder}/{self.runDate}/{self.filename}', low_memory=False)
+            results_df.at[0, columnName] = notes
+            results_df.to_csv(f'{self.saveFolder}/{self.runDate}/{self.filename}', index=False)
 
         # Change master file
-        resultsMaster_df = pd.read_csv(f'{self.saveFolder}/{resultsMasterName}')
-        row = resultsMaster_df.index[resultsMaster_df['Run Number'] == int(self.runNumber)].tolist()[0]
-        resultsMaster_df.at[row, columnName] = notes
-        resultsMaster_df.to_csv(f'{self.saveFolder}/{resultsMasterName}', index=False)
+        self.openResultsMaster().update(self.runNumber, type, notes)
 
 
     def recordPreShotNotes(self):
@@ -511,51 +524,61 @@ class CMFX_App(TestingApp):
 
                 # Update charging values in object while not discharged
                 if self.charging:
-                    self.chargeVoltagePS = (voltages['Power Supply Voltage']) * maxVoltagePowerSupply[POWER_SUPPLY] / maxAnalogInput	
-                    self.chargeCurrentPS = (voltages['Power Supply Current'] + 10) * maxCurrentPowerSupply[POWER_SUPPLY] / maxAnalogInput # +10 because theres an offset for whatever reason	
+                    # Only the samples read since the last refresh are scaled, the rest of the charge already is
+                    self.chargeHistory.update(voltages, getattr(voltages, 'count', None))
+                    self.chargeVoltagePS = self.chargeHistory['chargeVoltagePS']
+                    self.chargeCurrentPS = self.chargeHistory['chargeCurrentPS']
                     
                     voltagePSPoint = self.chargeVoltagePS[-1]
                     currentPSPoint = self.chargeCurrentPS[-1]
                     
                     if POWER_SUPPLY != 'EB-100':
-                        self.capacitorVoltage = voltages['Capacitor Voltage'] * voltageDivider
+                        self.capacitorVoltage = self.chargeHistory['capacitorVoltage']
                         capacitorVoltagePoint = self.capacitorVoltage[-1]
                 
                 else:
-                    chargeVoltagePS = (voltages['Power Supply Voltage']) * maxVoltagePowerSupply[POWER_SUPPLY] / maxAnalogInput	
-                    chargeCurrentPS = (voltages['Power Supply Current'] + 10) * maxCurrentPowerSupply[POWER_SUPPLY] / maxAnalogInput # +10 because theres an offset for whatever reason	
+                    # Only the latest sample is displayed, so don't scale the whole history
+                    chargeVoltagePS = (voltages['Power Supply Voltage'][-1:]) * maxVoltagePowerSupply[POWER_SUPPLY] / maxAnalogInput	
+                    chargeCurrentPS = (voltages['Power Supply Current'][-1:] + 10) * maxCurrentPowerSupply[POWER_SUPPLY] / maxAnalogInput # +10 because theres an offset for whatever reason	
                     	
                     voltagePSPoint = chargeVoltagePS[-1]
                     currentPSPoint = chargeCurrentPS[-1]
 
                     if POWER_SUPPLY != 'EB-100':
-                        capacitorVoltage = voltages['Capacitor Voltage'] * voltageDivider
+                        capacitorVoltage = voltages['Capacitor Voltage'][-1:] * voltageDivider
                         capacitorVoltagePoint = capacitorVoltage[-1]
 
-            self.voltagePSText.set(f'Power Supply V: {voltagePSPoint / 1000:.2f} kV')	
-            self.currentPSText.set(f'Power Supply I: {currentPSPoint * 1000:.2f} mA')
+            # Widgets are only touched when what they show has changed
+            self.statusModel.setText(self.voltagePSText, f'Power Supply V: {voltagePSPoint / 1000:.2f} kV')
+            self.statusModel.setText(self.currentPSText, f'Power Supply I: {currentPSPoint * 1000:.2f} mA')
             
             if POWER_SUPPLY == 'EB-100':
                 if not self.idleMode and not self.discharged:
                     countdownNow = time.time() - self.countdownStart
                     # If the countdown is finished, "discharge" the power supply, i.e. enable high voltage
                     if countdownNow >= countdownTime:
-                        self.progressBar.configure(amountused = 0)
+                        if self.statusModel.changed('progressBar', 0):
+                            self.progressBar.configure(amountused = 0)
                         thread = Thread(target=self.dischargeDirectDrive)
                         thread.start()
                         self.discharged = True
-                    else:
+                    elif self.statusModel.changed('progressBar', int(countdownTime - countdownNow)):
                         self.progressBar.configure(amountused = int(countdownTime - countdownNow))
             else:
-                self.capacitorVoltageText.set(f'Capacitor V: {capacitorVoltagePoint / 1000:.2f} kV')
+                self.statusModel.setText(self.capacitorVoltageText, f'Capacitor V: {capacitorVoltagePoint / 1000:.2f} kV')
                 if not self.idleMode:
-                    self.progressBar.configure(amountused = np.abs(int(100 * capacitorVoltagePoint / 1000 / self.chargeVoltage)))
+                    amountused = np.abs(int(100 * capacitorVoltagePoint / 1000 / self.chargeVoltage))
+                    if self.statusModel.changed('progressBar', amountused):
+                        self.progressBar.configure(amountused = amountused)
 
             # Logic heirarchy for charge state and countdown text
             if self.discharged:
-                self.chargeStateText.set('Discharged!')
+                # Show the progress of the discharge acquisition while it is being streamed in
+                if STREAM_DISCHARGE and hasattr(self, 'NI_DAQ') and self.NI_DAQ.dischargeTriggered and not self.NI_DAQ.discharge_complete.is_set():
+                    self.statusModel.setText(self.chargeStateText, f'Acquiring: {100 * self.NI_DAQ.discharge_progress:.0f}%')
+                else:
+                    self.statusModel.setText(self.chargeStateText, 'Discharged!')
 
-                self.dischargeTime = self.NI_DAQ.dischargeTime
                 self.dischargeTimeUnit = self.NI_DAQ.tUnit
 
                 # Once the save thread has finished, then we can replot the discharge results
@@ -573,44 +596,44 @@ class CMFX_App(TestingApp):
                     # Start saving on separate threads
                     Thread(target=self.saveResults).start()
                     
-                    # Analyze results and plot those as well
+                    # Analyze results on the analysis thread, checkAnalysis plots them once they're ready
                     self.performAnalysis()
 
                     # Can't replot results on a separate thread from the main because it throws run time error
-                    self.resultsPlotViewer.replot()
-                    self.analysisPlotViewer.replot()
+                    with profiler.span('resultsReplot'):
+                        self.resultsPlotViewer.replot()
 
                 # If using scope add new file for the scope data
-                if USING_SCOPE and hasattr(self, 'saveScope_thread') and not self.saveScope_thread.is_alive() and not self.scopeDataSaved:
-                    # Start saving on separate threads
+                if USING_SCOPE and hasattr(self, 'readout') and self.readout.done('scope') and not self.scopeDataSaved:
                     self.scopeDataSaved = True
-                    Thread(target=self.saveScopeResults).start()
+                    print(self.readout.report())
+                    # Only save traces that were read from this shot within the deadline
+                    if self.readout.status('scope') == 'done' and self.scope.readSuccess:
+                        # Start saving on separate threads
+                        Thread(target=self.saveScopeResults).start()
+                    else:
+                        print('Scope data not saved')
 
             elif self.charged:
-                self.chargeStateText.set('Charged')
+                self.statusModel.setText(self.chargeStateText, 'Charged')
             else:
-                self.chargeStateText.set('Not Charged')
+                self.statusModel.setText(self.chargeStateText, 'Not Charged')
 
             
             # This is only executed for capacitor discharges
             if self.charging and not self.discharged and POWER_SUPPLY != 'EB-100':
-                N = len(self.chargeVoltagePS)	
-                self.chargeTime = np.linspace(0, (N - 1) / systemStatus_sample_rate, N)	
-                self.timePoint = (N - 1) / systemStatus_sample_rate
-
-                # Sometimes there's a mismatch in length of voltages read from daq
-                if len(self.chargeVoltagePS) != len(self.chargeCurrentPS):
-                    print('Length mismatch in NI DAQ read')
-                    self.chargeCurrentPS = self.chargeCurrentPS[:len(self.chargeVoltagePS)]
-                if len(self.chargeVoltagePS) != len(self.capacitorVoltage):
-                    print('Length mismatch in NI DAQ read')
-                    self.capacitorVoltage = self.capacitorVoltage[:len(self.chargeVoltagePS)]
+                # The charge channels are all scaled from the same reads, so they always have the same length
+                self.chargeTime = self.chargeHistory['chargeTime']
+                self.timePoint = (len(self.chargeTime) - 1) / systemStatus_sample_rate
 
                 # Plot the new data
                 self.replotCharge()
 
                 # Voltage reaches a certain value of chargeVoltage to discharge
                 if np.abs(capacitorVoltagePoint) >= chargeVoltageLimit * self.chargeVoltage * 1000 and not self.charged:
+                    # HV is turned off for the shot, which isn't a fault
+                    self.armWatchdog(False)
+
                     # Reset the trigger just before discharging
                     self.NI_DAQ.reset_discharge_trigger()
 
@@ -631,46 +654,37 @@ class CMFX_App(TestingApp):
         def updatePressureStatus():
             chamberPressure = 8e-4
             pumpPressure = 2e-4
-            self.chamberPressureText.set(f'Chamber Press.: {chamberPressure:.1e} Torr')
-            self.pumpPressureText.set(f'Pump Press.: {pumpPressure:.1e} Torr')
+            self.statusModel.setText(self.chamberPressureText, f'Chamber Press.: {chamberPressure:.1e} Torr')
+            self.statusModel.setText(self.pumpPressureText, f'Pump Press.: {pumpPressure:.1e} Torr')
 
         def updatePowerSupplyStatus():
             # Not applicable on startup
             if hasattr(self, 'NI_DAQ'):
-                # Set the states for all boolean indicators
-                for (name, state) in zip(self.NI_DAQ.task_di.di_channels.channel_names, self.NI_DAQ.task_di.read()):
-                    # Power supply indicators work off reverse boolean logic, hence the "not"
-                    if name in powerSupplyIndicatorLabels[POWER_SUPPLY]:
-                        self.booleanIndicators[name].set(not state)
-                    else:
+                # All lines are read at once and only the indicators of those that changed are set
+                # The watchdog reads the lines much more often, so its latest read is used
+                states = self.watchdog.states if self.watchdog is not None else self.NI_DAQ.task_di.read()
+                if states is None:
+                    # The watchdog can't read the lines, so their state is unknown rather than that of the last read
+                    unknown = self.statusModel.invalidate()
+                    if unknown:
+                        print('Interlock status unknown, the digital inputs could not be read')
+                    for name in unknown:
+                        self.booleanIndicators[name].set(None)
+                else:
+                    for name, state in self.statusModel.update(states):
                         self.booleanIndicators[name].set(state)
 
-                # Stop charging and generate fault message if there has been a change in state
-                # if self.charging and any([not self.booleanIndicators['HV On'].state,
-                #         self.booleanIndicators['Interlock Closed'].state,
-                #         self.booleanIndicators['Spark'].state,
-                #         self.booleanIndicators['Over Temp Fault'].state,
-                #         self.booleanIndicators['AC Fault'].state,
-                #         not self.booleanIndicators['Door Closed 1'].state,
-                #         not self.booleanIndicators['Door Closed 2'].state]):
-                    
-                    # if not any([self.booleanIndicators['Door Closed 1'].state,
-                    #         self.booleanIndicators['Door Closed 2'].state]):
-                    #     name = 'Door Open Fault'
-                    #     text = 'The door to the lab has been left open. Discharging now.'
-                    # else:
-                    #     name = 'Power Supply Fault'
-                    #     text = 'There has been a fault in the power supply. Discharging now.'
-
-                    # faultWindow = MessageWindow(self, name, text)
-                    # faultWindow.wait_window()
-                    # self.discharge()
+                # The watchdog stops the charge on a fault, so the operator only needs to be told
+                self.showFault()
         
-        updateHVStatus()
-        updatePressureStatus()
-        updatePowerSupplyStatus()
-
-        self.after(int(1000 / refreshRate), self.updateSystemStatus)
+        # Each part of the tick is timed so an overrun of the refresh period can be traced to its cause
+        with profiler.span('updateSystemStatus'):
+            with profiler.span('updateHVStatus'):
+                updateHVStatus()
+            updatePressureStatus()
+            with profiler.span('updatePowerSupplyStatus'):
+                updatePowerSupplyStatus()
+            self.checkAnalysis()
 
     def recordPressure(self):
         self.chamberBasePressure = 8e-7
@@ -682,27 +696,53 @@ class CMFX_App(TestingApp):
                 if hasattr(self, variable):
                     data_dict[plotOption]['lines'][variable].data = getattr(self, variable)
 
-    def performAnalysis(self):
+    def performAnalysis(self, record=True):
+        # The analysis runs on the analysis thread so the status indicators keep updating
+        # Everything it needs is gathered here, on the Tk thread, and the results are applied by checkAnalysis
+        # New shots have their analysis recorded in the results master so that the shot archive can search it
         print('Performing analysis...')
-        analysis = Analysis(self.dischargeTime, self.dischargeTimeUnit, self.dischargeVoltage, self.dischargeCurrent,
-                            self.dumpDelay, self.ignitronDelay, self.primaryGasStart, self.hvStart, self.polarity)
-        self.dischargeVoltageFiltered = analysis.voltage_filtered / 1000
-        self.dischargeCurrentFiltered = analysis.current_filtered
-        self.dumpCurrentFiltered = analysis.lowPassFilter(self.dumpCurrent) / 100
-        self.chamberProtectionCurrentFiltered = analysis.lowPassFilter(self.chamberProtectionCurrent) / 100
-        self.feedthroughVoltageFiltered = analysis.lowPassFilter(self.feedthroughVoltage) / 10
-        self.feedthroughCurrentFiltered = analysis.lowPassFilter(self.feedthroughCurrent) / 100
+        variables = ['dischargeTime', 'dischargeTimeUnit', 'dischargeVoltage', 'dischargeCurrent', 'dumpDelay', 'ignitronDelay',
+                     'primaryGasStart', 'hvStart', 'polarity']
+
+        # The rest of the diagnostics are filtered together, each with the divisor used to plot it
+        divisors = {'dumpCurrent': 100, 'chamberProtectionCurrent': 100, 'feedthroughVoltage': 10, 'feedthroughCurrent': 100}
         if POWER_SUPPLY == 'EB-100':
-            self.PSVoltageFiltered = analysis.lowPassFilter(self.PSVoltage) / 1000
-            self.PSCurrentFiltered = analysis.lowPassFilter(self.PSCurrent)
-            self.depositedEnergy = analysis.get_deposited_enegry(self.PSCurrentFiltered)
-        else:
-            self.depositedEnergy = analysis.get_deposited_enegry(self.dischargeCurrentFiltered)
+            divisors.update({'PSVoltage': 1000, 'PSCurrent': 1})
+
+        # Accelerometer and diode data
+        for plotOption in ['Accelerometer', 'Diode']:
+            for variable in self.resultsPlotData[plotOption]['lines']:
+                if self.shotHas(variable):
+                    divisors[variable] = 1
+
+        # Channels of an opened shot that haven't been plotted yet are read on the analysis thread
+        variables = variables + list(divisors)
+        inputs = {variable: getattr(self, variable) for variable in variables if hasattr(self, variable)}
+        unread = [variable for variable in variables if variable not in inputs]
+        resultsMaster = self.openResultsMaster() if record else None
+        self.analysisFuture = self.analysisExecutor.submit(self.computeAnalysis, inputs, divisors, resultsMaster, self.runNumber,
+                                                           self.lazyShot, unread)
+
+        return self.analysisFuture
+
+    @profiler.timed('analysis')
+    def computeAnalysis(self, inputs, divisors, resultsMaster=None, runNumber=None, shot=None, unread=()):
+        # Runs on the analysis thread, so this must not touch any widgets
+        if shot is not None and unread:
+            inputs.update(shot.load(unread))
+        analysis = Analysis(inputs['dischargeTime'], inputs['dischargeTimeUnit'], inputs['dischargeVoltage'], inputs['dischargeCurrent'],
+                            inputs['dumpDelay'], inputs['ignitronDelay'], inputs['primaryGasStart'], inputs['hvStart'], inputs['polarity'])
+        results = {'dischargeVoltageFiltered': analysis.voltage_filtered / 1000,
+                   'dischargeCurrentFiltered': analysis.current_filtered}
+
+        filtered = analysis.filterBank.filterMany({variable: inputs[variable] for variable in divisors})
+        for variable, divisor in divisors.items():
+            results[f'{variable}Filtered'] = filtered[variable] / divisor
 
-        # Update the misc analysis text variables
-        for variable, textVariable in self.analysisText_dict.items():
-            if hasattr(analysis, variable):
-                textVariable.set(f'{analysisVariables[variable]["label"]}: {getattr(analysis, variable) * analysisVariables[variable]["factor"]:.1f}')
+        if POWER_SUPPLY == 'EB-100':
+            results['depositedEnergy'] = analysis.get_deposited_enegry(results['PSCurrentFiltered'])
+        else:
+            results['depositedEnergy'] = analysis.get_deposited_enegry(results['dischargeCurrentFiltered'])
 
         # Diamagnetic loops
         # for variable, line in self.resultsPlotData['Diamagnetic']['lines'].items():
@@ -712,43 +752,66 @@ class CMFX_App(TestingApp):
         #         density = analysis.get_diamagneticDensity(signal)
         #         setattr(self, densityVariable, density)
 
-        # Accelerometer Data
-        for variable, line in self.resultsPlotData['Accelerometer']['lines'].items():
-            if hasattr(self, variable):
-                filteredVariable = f'{variable}Filtered'
-                signal = line.data
-                filteredSignal = analysis.lowPassFilter(signal)
-                setattr(self, filteredVariable, filteredSignal)
-
-        # Diode Data
-        for variable, line in self.resultsPlotData['Diode']['lines'].items():
-            if hasattr(self, variable): 
-                filteredVariable = f'{variable}Filtered'
-                signal = line.data
-                filteredSignal = analysis.lowPassFilter(signal)
-                setattr(self, filteredVariable, filteredSignal)
+        if resultsMaster is not None:
+            # get_deposited_enegry stores the deposited energy on the analysis rather than returning it
+            analysisResults = {variable: getattr(analysis, variable) for variable in analysisVariables if hasattr(analysis, variable)}
+            try:
+                resultsMaster.writeAnalysis(runNumber, analysisResults)
+            except Exception as e:
+                print(f'Could not record the analysis of run {runNumber}: {e}')
+
+        return analysis, results
+
+    @profiler.timed()
+    def applyAnalysis(self, analysis, results):
+        for variable, value in results.items():
+            setattr(self, variable, value)
+
+        # Update the misc analysis text variables
+        for variable, textVariable in self.analysisText_dict.items():
+            if hasattr(analysis, variable):
+                textVariable.set(f'{analysisVariables[variable]["label"]}: {getattr(analysis, variable) * analysisVariables[variable]["factor"]:.1f}')
 
         self.setData(self.analysisPlotData)
+        self.analysisPlotViewer.replot()
         print('Analysis complete!')
 
+    def checkAnalysis(self):
+        # Apply the analysis once the analysis thread has finished it
+        if self.analysisFuture is None or not self.analysisFuture.done():
+            return
+
+        future = self.analysisFuture
+        self.analysisFuture = None
+        try:
+            self.applyAnalysis(*future.result())
+        except Exception as e:
+            print(f'Analysis failed: {e}')
+
+    @profiler.timed()
     def saveDischarge(self):
             print('Saving discharge...')
-            # Read from the scope
+            # The data of this shot replaces that of any shot that was opened
+            self.lazyShot = None
+            # Read out the DAQ, counters and scope at the same time, each with its own deadline
+            # The scope polls for the end of its acquisition and carries on after the discharge is saved
+            self.readout = Readout('Post-shot readout')
+            self.readout.add('DAQ', self.NI_DAQ.get_discharge, readoutDeadlines['DAQ'])
+            self.readout.add('counters', self.readCounters, readoutDeadlines['counters'])
             if USING_SCOPE:
-                print('Sleeping for 5 seconds to give scope its "me time"')	
-                time.sleep(5)
-                self.saveScope_thread = Thread(target=self.scope.read_scope)
-                self.saveScope_thread.start()
+                self.readout.add('scope', self.scope.read_scope, readoutDeadlines['scope'])
+            self.readout.start()
+            results = self.readout.wait(['DAQ', 'counters'])
 
+            # The time axis comes with the data since decimation changes its length
+            # Fall back on the full record if it couldn't be decimated in time
+            dischargeData, self.dischargeTime = results.get('DAQ', (self.NI_DAQ.dischargeData, self.NI_DAQ.dischargeTime))
             for i, variable in enumerate(self.diagnostics_Pins):
-                setattr(self, variable, self.NI_DAQ.dischargeData[i,:])
-
-            for i, variable in enumerate(self.counters_Pins):
-                setattr(self, variable, 0)
-                try:
-                    setattr(self, variable, self.NI_DAQ.ci_tasks[variable].channels.ci_count)
-                except:
-                    setattr(self, variable, 0)
+                setattr(self, variable, dischargeData[i,:])
+
+            counts = results.get('counters', {})
+            for variable in self.counters_Pins:
+                setattr(self, variable, counts.get(variable, 0))
             
             self.dischargeCurrent /= pearsonCoilDischarge
             # self.dumpCurrent /= dumpResistance
@@ -760,11 +823,25 @@ class CMFX_App(TestingApp):
 
             self.setData(self.resultsPlotData)
 
+            # Changes of the power supply and interlock status since the last reset
+            self.statusTransitions = self.statusModel.transitionLog()
+
             self.preShotNotes = self.preShotNotesEntry.text.get('1.0', 'end')
             self.postShotNotes = self.postShotNotesEntry.text.get('1.0', 'end')    
 
+            print(self.readout.report())
             print('Discharge Saved!')      
 
+    def readCounters(self):
+        counts = {}
+        for variable in self.counters_Pins:
+            try:
+                counts[variable] = self.NI_DAQ.ci_tasks[variable].channels.ci_count
+            except:
+                counts[variable] = 0
+
+        return counts
+
     def reset(self):
         print('Reset')
 
@@ -775,8 +852,10 @@ class CMFX_App(TestingApp):
         self.secondaryGasComboBox.current(gasOptions.index(self.secondaryGasDefault))
 
         # Close the switch tasks so we can close the switches with hardware instead of software
+        # Go back to only keeping the recent system status history
         if hasattr(self, 'NI_DAQ'):
             self.NI_DAQ.remove_tasks(self.NI_DAQ.dump_task_names + self.NI_DAQ.switch_task_names)
+            self.NI_DAQ.reset_systemStatus()
 
         # Open power supply and load and close dump
         self.operateSwitch('Enable HV', False)
@@ -805,6 +884,10 @@ class CMFX_App(TestingApp):
         # Reset the charging time point
         self.timePoint = 0.0
 
+        # Drop the results of an analysis that is still running for the previous shot
+        self.analysisFuture = None
+        self.lazyShot = None
+
         # Reset the discharge plot time axis
         self.dischargeTime = []
         self.dischargeTimeUnit = 's'
@@ -814,6 +897,15 @@ class CMFX_App(TestingApp):
         self.chargeCurrentPS = []
         self.capacitorVoltage = []
         self.chargeTime = []
+        chargeChannels = {'chargeTime': (None, 1 / systemStatus_sample_rate, 0),
+                          'chargeVoltagePS': ('Power Supply Voltage', maxVoltagePowerSupply[POWER_SUPPLY] / maxAnalogInput, 0),
+                          'chargeCurrentPS': ('Power Supply Current', maxCurrentPowerSupply[POWER_SUPPLY] / maxAnalogInput, 10)} # +10 because theres an offset for whatever reason
+        if POWER_SUPPLY != 'EB-100':
+            chargeChannels['capacitorVoltage'] = ('Capacitor Voltage', voltageDivider, 0)
+        self.chargeHistory = ScaledHistory(chargeChannels)
+        self.chargePlotIndex = 0 # number of samples already included in the running maxima
+        self.capacitorVoltageMax = 0.0
+        self.chargeCurrentMax = 0.0
 
         # This condition executes every time except for the initialization
         if self.loggedIn:
@@ -848,6 +940,10 @@ class CMFX_App(TestingApp):
         # Disable all buttons if logged in
         self.disableButtons()
 
+        # The status log starts over and every status widget is set again on the next refresh
+        self.statusModel.reset()
+        self.armWatchdog(False)
+
         # Reset progress bar
         if POWER_SUPPLY == 'EB-100':
             self.progressBar.configure(amountused=countdownTime)
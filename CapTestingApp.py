@@ -105,6 +105,7 @@ class CapTestingApp(TestingApp):
         self.filemenu.add_command(label='Open', command=self.readResults)
         self.filemenu.add_command(label='Save Folder', command=self.setSaveLocation)
         self.filemenu.add_command(label='Set Pins', command=self.pinSelector)
+        self.filemenu.add_command(label='Export Results Master', command=self.exportResultsMaster)
         self.filemenu.add_separator()
         self.filemenu.add_command(label='Quit', command=self.on_closing)
         self.menubar.add_cascade(label='File', menu=self.filemenu)
@@ -163,7 +164,7 @@ class CapTestingApp(TestingApp):
         self.chargeCurrentAxis.set_ylim(0, currentYLim)
 
         # Add actors to blitmanager for charging plot
-        self.bm = BlitManager(self.chargePlot.canvas, [self.chargeVoltageLine, self.chargeCurrentLine, self.capacitorVoltageLine, self.chargePlot.ax.xaxis, self.chargePlot.ax.yaxis])
+        self.bm = BlitManager(self.chargePlot.canvas, [self.chargeVoltageLine, self.chargeCurrentLine, self.capacitorVoltageLine])
 
         # Create the legends before any plot is made
         self.chargePlot.ax.legend(handles=chargeHandles, loc='upper right')
@@ -208,7 +209,7 @@ class CapTestingApp(TestingApp):
         # If the user closes out of the application during a wait_window, no extra windows pop up
         self.update()
 
-        self.updateChargeValues()
+        self.refreshScheduler.start(self.updateChargeValues, active=self.refreshActive)
 
         self.safetyLights()
 
@@ -302,8 +303,8 @@ class CapTestingApp(TestingApp):
 
             # Read from the load
             if not DEBUG_MODE:
-                print('Sleeping for 5 seconds to give scope its "me time"')	
-                time.sleep(5)
+                # Wait for the scope to finish its acquisition instead of a fixed time
+                self.scope.wait_acquisition()
                 self.dischargeVoltageLoad = self.scope.get_data(self.scopePins['Load Voltage']) * voltageDivider
                 self.dischargeCurrentLoad = self.scope.get_data(self.scopePins['Load Current']) / pearsonCoil
                 self.interferometer = self.scope.get_data(self.scopePins['Interferometer'])
@@ -316,14 +317,17 @@ class CapTestingApp(TestingApp):
             if len(self.dischargeTime) != 0:
                 # get resistance of water resistor
                 try:
-                    self.internalResistance, chargeFitTime, chargeFitVoltage = self.getResistance(self.chargeTime, self.capacitorVoltage)
-                    self.waterResistance, self.dischargeFitTime, self.dischargeFitVoltage = self.getResistance(self.dischargeTime, self.dischargeVoltageLoad)
+                    (self.internalResistance, chargeFitTime, chargeFitVoltage), (self.waterResistance, self.dischargeFitTime, self.dischargeFitVoltage) = \
+                        self.getResistance((self.chargeTime, self.capacitorVoltage), (self.dischargeTime, self.dischargeVoltageLoad))
                 except:
                     self.internalResistance, chargeFitTime, chargeFitVoltage = (0, 0, 0)
                     self.waterResistance, self.dischargeFitTime, self.dischargeFitVoltage = (0, 0, 0)
                 # self.fitVoltageLine.set_data(chargeFitTime, chargeFitVoltage / 1000)
                 self.waterResistance /= 1000
 
+                # The filtered capacitor voltage is only built once it's saved
+                self.capacitorVoltageFiltered = self.capacitorVoltageAverage.filtered * voltageDivider * attenuator
+
                 # Plot results on the discharge graph and save them
                 # The only time results are saved is when there is a discharge that is preceded by charge
                 self.replotCharge()
@@ -336,11 +340,22 @@ class CapTestingApp(TestingApp):
             else:
                 print('Oscilloscope was not triggered successfully')
 
-    def getResistance(self, time, voltage):
-        # Exponential decay function that decays to 0
-        def expDecay(time, m, tau, b):
-            return m * np.exp(-time / tau) + b
+    def getResistance(self, *traces):
+        # Fit the exponential decay of each (time, voltage) trace in a single batch
+        # Returns (resistance, fit time, fit voltage) for each trace, with a resistance of zero if the fit failed
+        windows = [self.getDecayWindow(np.asarray(time, dtype=float), np.asarray(voltage, dtype=float)) for time, voltage in traces]
+        params, success = fitDecays(windows, maxPoints=fitMaxPoints)
+
+        results = []
+        for (expTime, _), (m, tau, b), fitted in zip(windows, params, success):
+            if fitted:
+                results.append((tau / self.capacitance, expTime, expDecay(expTime - expTime[0], m, tau, b)))
+            else:
+                results.append((0, expTime, np.zeros(len(expTime))))
+
+        return results
 
+    def getDecayWindow(self, time, voltage):
         # Find the point at which the capacitor is isolated
         try:
             peaks, _ = scipy.signal.find_peaks(voltage, width=10)
@@ -360,19 +375,7 @@ class CapTestingApp(TestingApp):
         expVoltage = expVoltage[~np.logical_or(nanIndices, zeroIndices)]
         expTime = expTime[~np.logical_or(nanIndices, zeroIndices)]
 
-        # get estimate of tau
-        tauGuess = (expTime[-1] - expTime[0]) / np.log(expVoltage[0] / expVoltage[-1])
-
-        p0 = (max(voltage) * voltageDivider, tauGuess, expVoltage[-1]) # start with values near those we expect
-        try:
-            params, cv = scipy.optimize.curve_fit(expDecay, expTime, expVoltage, p0) # zero the time so that initial guess can be closer
-            m, tau, b = params
-            fitVoltage = expDecay(expTime, m, tau, b)
-        except:
-            tau = 0
-            fitVoltage = np.zeros(len(expTime))
-
-        return tau / self.capacitance, expTime, fitVoltage
+        return expTime, expVoltage
 
     def intermittentVoltageDivider(self):
         self.operateSwitch('Voltage Divider Switch', True)
@@ -396,14 +399,20 @@ class CapTestingApp(TestingApp):
 
             # Update charging values in object while not discharged
             if self.charging:
-                self.chargeVoltagePS = voltages['Power Supply Voltage'] * maxVoltagePowerSupply / maxVoltageInput	
-                self.chargeCurrentPS = (voltages['Power Supply Current'] + 10) * maxCurrentPowerSupply / maxVoltageInput # +10 because theres an offset for whatever reason	
-                self.capacitorVoltage = voltages['Capacitor Voltage'] * voltageDivider * attenuator	
+                # Only the samples read since the last refresh are scaled, the rest of the charge already is
+                if self.chargeHistory is None:
+                    self.chargeHistory = ScaledHistory({'chargeTime': (None, 1 / systemStatus_sample_rate, 0),
+                                                        'chargeVoltagePS': ('Power Supply Voltage', maxVoltagePowerSupply / maxVoltageInput, 0),
+                                                        'chargeCurrentPS': ('Power Supply Current', maxCurrentPowerSupply / maxVoltageInput, 10), # +10 because theres an offset for whatever reason
+                                                        'capacitorVoltage': ('Capacitor Voltage', voltageDivider * attenuator, 0)})
+                self.chargeHistory.update(voltages, getattr(voltages, 'count', None))
+                self.chargeVoltagePS = self.chargeHistory['chargeVoltagePS']
+                self.chargeCurrentPS = self.chargeHistory['chargeCurrentPS']
+                self.capacitorVoltage = self.chargeHistory['capacitorVoltage']
             	
-                # Capacitor signal is very noisy, so apply moving average filter over a period of 2 seconds	
-                # Also don't want to filter over nan's
-                nanIndices = np.isnan(self.capacitorVoltage)	
-                self.capacitorVoltageFiltered = uniform_filter1d(self.capacitorVoltage[~nanIndices], size=sample_rate * 2)	
+                # Capacitor signal is very noisy, so apply moving average filter over a period of 2 seconds
+                # Only the new samples are added to the average and nan's are skipped
+                capacitorVoltageAverage = self.capacitorVoltageAverage.update(voltages['Capacitor Voltage'], getattr(voltages, 'count', None)) * voltageDivider * attenuator
                 voltagePSPoint = self.chargeVoltagePS[-1]
                 currentPSPoint = self.chargeCurrentPS[-1]
                 # Only record the voltage when the switch is closed	
@@ -412,18 +421,16 @@ class CapTestingApp(TestingApp):
                 # if self.voltageDividerClosed:	
                 if True:	
                     # self.capacitorVoltagePoint = voltages[2] * voltageDivider * attenuator	
-                    self.capacitorVoltagePoint = self.capacitorVoltageFiltered[-1]	
+                    self.capacitorVoltagePoint = capacitorVoltageAverage
                     self.capacitorVoltageText.set(f'V{CapacitorSuperscript}: {self.capacitorVoltagePoint / 1000:.2f} kV')	
             
             else:
                 chargeVoltagePS = voltages['Power Supply Voltage'] * maxVoltagePowerSupply / maxVoltageInput	
                 chargeCurrentPS = (voltages['Power Supply Current'] + 10) * maxCurrentPowerSupply / maxVoltageInput # +10 because theres an offset for whatever reason	
-                capacitorVoltage = voltages['Capacitor Voltage'] * voltageDivider * attenuator	
             	
-                # Capacitor signal is very noisy, so apply moving average filter over a period of 2 seconds	
-                # Also don't want to filter over nan's
-                nanIndices = np.isnan(capacitorVoltage)	
-                capacitorVoltageFiltered = uniform_filter1d(capacitorVoltage[~nanIndices], size=sample_rate * 2)	
+                # Capacitor signal is very noisy, so apply moving average filter over a period of 2 seconds
+                # Only the new samples are added to the average and nan's are skipped
+                capacitorVoltageAverage = self.idleCapacitorVoltageAverage.update(voltages['Capacitor Voltage'], getattr(voltages, 'count', None)) * voltageDivider * attenuator
                 voltagePSPoint = chargeVoltagePS[-1]
                 currentPSPoint = chargeCurrentPS[-1]
                 # Only record the voltage when the switch is closed	
@@ -432,7 +439,7 @@ class CapTestingApp(TestingApp):
                 # if self.voltageDividerClosed:	
                 if True:	
                     # self.capacitorVoltagePoint = voltages[2] * voltageDivider * attenuator	
-                    self.capacitorVoltagePoint = capacitorVoltageFiltered[-1]	
+                    self.capacitorVoltagePoint = capacitorVoltageAverage
                     self.capacitorVoltageText.set(f'V{CapacitorSuperscript}: {self.capacitorVoltagePoint / 1000:.2f} kV')	
 
         self.voltagePSText.set(f'V{PSSuperscript}: {voltagePSPoint / 1000:.2f} kV')	
@@ -464,17 +471,9 @@ class CapTestingApp(TestingApp):
             # self.chargeVoltagePS = np.append(self.chargeVoltagePS, voltagePSPoint)	
             # self.chargeCurrentPS = np.append(self.chargeCurrentPS, currentPSPoint)	
             # self.capacitorVoltage = np.append(self.capacitorVoltage, self.capacitorVoltagePoint)	
-            N = len(self.chargeVoltagePS)	
-            self.chargeTime = np.linspace(0, N / sample_rate, N)	
-            self.timePoint = (N - 1) / sample_rate
-
-            # Sometimes there's a mismatch in length of voltages read from daq
-            if len(self.chargeVoltagePS) != len(self.chargeCurrentPS):
-                print('Length mismatch in NI DAQ read')
-                self.chargeCurrentPS = self.chargeCurrentPS[:len(self.chargeVoltagePS)]
-            if len(self.chargeVoltagePS) != len(self.capacitorVoltage):
-                print('Length mismatch in NI DAQ read')
-                self.capacitorVoltage = self.capacitorVoltage[:len(self.chargeVoltagePS)]
+            # The charge channels are all scaled from the same reads, so they always have the same length
+            self.chargeTime = self.chargeHistory['chargeTime']
+            self.timePoint = (len(self.chargeTime) - 1) / systemStatus_sample_rate
 
             # Plot the new data
             self.replotCharge()
@@ -487,6 +486,9 @@ class CapTestingApp(TestingApp):
                     self.charged = True
                     self.countdownStarted = True
 
+                    # The supply is turned off for the countdown, which isn't a fault
+                    self.armWatchdog(False)
+
                     # Actually begin discharging power supply before opening power supply switch so it doesnt overshoot
                     self.powerSupplyRamp(action='discharge')
 
@@ -532,8 +534,6 @@ class CapTestingApp(TestingApp):
             #     self.discharge()
             #     print('Steady state reached without charging to desired voltage')
 
-        self.after(int(1000 / refreshRate), self.updateChargeValues)
-
     def replotDischarge(self):
         # Remove lines every time the figure is plotted
         self.clearFigLines(self.dischargePlot.fig)
@@ -546,6 +546,18 @@ class CapTestingApp(TestingApp):
         self.dischargePlot.updatePlot()
 
     def reset(self):
+        # Start the running maxima of the charge plot over
+        self.chargePlotIndex = 0
+        self.capacitorVoltageMax = 0.0
+        self.chargeCurrentMax = 0.0
+
+        # Moving averages of the capacitor voltage over 2 seconds
+        # The whole charge is kept so that the filtered voltage can be saved, otherwise only the latest value is needed
+        self.capacitorVoltageAverage = MovingAverage(systemStatus_sample_rate * 2, record=True)
+        self.idleCapacitorVoltageAverage = MovingAverage(systemStatus_sample_rate * 2)
+        # The charge in physical units, made when the charge is first read
+        self.chargeHistory = None
+
         # Open power supply and voltage divider switch and close load switch	
         self.operateSwitch('Power Supply Switch', False)	
         time.sleep(switchWaitTime)	
@@ -557,6 +569,8 @@ class CapTestingApp(TestingApp):
         self.chargeVoltageEntry.delete(0, 'end')
         self.holdChargeTimeEntry.delete(0, 'end')
 
+        self.armWatchdog(False)
+
         # Reset all boolean variables, time, and checklist
         self.charged = False
         self.charging = False
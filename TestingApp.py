@@ -7,10 +7,10 @@ import pandas as pd
 import time
 import os
 import webbrowser
-import nidaqmx
 import scipy.optimize, scipy.signal
 import requests
 from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
 from constants import *
 from plots import *
 from messages import *
@@ -22,6 +22,14 @@ from visa_comms import *
 from console import *
 from analysis import *
 from indicator import *
+from shot_file import *
+from results_master import *
+from readout import *
+from archive import *
+from profiling import *
+from scheduler import *
+from status import *
+from watchdog import *
 
 # Change nidaqmx read/write to this format? https://github.com/AppliedAcousticsChalmers/nidaqmxAio
 
@@ -62,6 +70,20 @@ class TestingApp(ttk.Window):
         self.counters_Pins = counters_defaults
         self.enableHV_Pins = enableHV_defaults
 
+        # Shot analysis runs here so that it doesn't hold up the Tk thread
+        self.analysisExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analysis')
+        self.analysisFuture = None
+
+        # Shot opened with readResults, whose channels are read as they are needed
+        self.lazyShot = None
+
+        # Refreshes the status when the DAQ has new data, started by the app once its widgets exist
+        self.refreshScheduler = RefreshScheduler(self)
+
+        # Fault watchdog, which needs the DAQ, and the time of the last fault the operator was told about
+        self.watchdog = None
+        self.faultShown = None
+
     def center_app(self):
         self.update_idletasks()
         width = self.winfo_width()
@@ -83,6 +105,12 @@ class TestingApp(ttk.Window):
         self.NI_DAQ = NI_DAQ(systemStatus_sample_rate, systemStatus_channels=self.systemStatus_Pins,
                              charge_ao_channels=self.charge_ao_Pins, di_channels=self.di_Pins, diagnostics=self.diagnostics_Pins,
                              enableHV_channels=self.enableHV_Pins, counters=self.counters_Pins, n_pulses=n_pulses)
+        self.NI_DAQ.add_systemStatus_listener(self.refreshScheduler.dataArrived)
+
+        # The interlocks are watched in their own process, which the status panel also takes the line states from
+        self.watchdog = FaultWatchdog(self.di_Pins, powerSupplyIndicatorLabels[POWER_SUPPLY], faultConditions[POWER_SUPPLY],
+                                      {**self.do_Pins, **self.enableHV_Pins}['Enable HV'], self.faultOff)
+        self.watchdog.start()
 
         # Discharge the power supply on startup
         self.powerSupplyRamp(action='discharge')
@@ -115,36 +143,29 @@ class TestingApp(ttk.Window):
         # self.iotaOne = IotaOne()
         # self.iotaOne.setGasPuffTime(self.userInputs['primaryGasTime']['default'])
             
+    def openResultsMaster(self):
+        # Master file is created if it does not already exist, and reopened whenever the save folder changes
+        if not hasattr(self, 'resultsMaster') or self.resultsMaster.saveFolder != self.saveFolder:
+            self.resultsMaster = ResultsMaster(self.saveFolder)
+
+        return self.resultsMaster
+
     def setRunNumber(self):
-         # Create master file if it does not already exist
         self.runNumber = f'{0:05d}'
-        if resultsMasterName in os.listdir(self.saveFolder):
-            resultsMaster_df = pd.read_csv(f'{self.saveFolder}/{resultsMasterName}', low_memory=False)
-            runNumbers = resultsMaster_df[master_columns['runNumber']]
-            runNumber = int(max(runNumbers)) + 1
+        lastRunNumber = self.openResultsMaster().maxRunNumber()
+        if lastRunNumber is not None:
+            runNumber = int(lastRunNumber) + 1
             self.runNumber = f'{runNumber:05d}'
 
-    def saveResults(self):
-        '''MASTER FILE SAVE'''        
-        master_columnsNames = [master_columns[variable] for variable in master_columns if hasattr(self, variable)]
-
-        # Create master file if it does not already exist
-        if resultsMasterName not in os.listdir(self.saveFolder):
-            resultsMaster_df = pd.DataFrame(columns=master_columnsNames)
-            resultsMaster_df.to_csv(f'{self.saveFolder}/{resultsMasterName}', index=False)
-        else:
-            resultsMaster_df = pd.read_csv(f'{self.saveFolder}/{resultsMasterName}')
-
-        # Save master results
-        resultMaster = []
-        for variable in master_columns:
-            if hasattr(self, variable):
-                resultMaster.append(getattr(self, variable))
+    def exportResultsMaster(self):
+        self.openResultsMaster().exportCSV()
 
-        resultMaster_df = pd.DataFrame(columns=master_columnsNames)
-        resultMaster_df.loc[0] = resultMaster
-        resultsMaster_df = pd.concat([resultsMaster_df, resultMaster_df])
-        resultsMaster_df.to_csv(f'{self.saveFolder}/{resultsMasterName}', index=False)
+    @profiler.timed()
+    def saveResults(self):
+        '''MASTER FILE SAVE'''
+        # Only the new row is written, the rest of the master file is untouched
+        resultMaster = {variable: getattr(self, variable) for variable in master_columns if hasattr(self, variable)}
+        self.openResultsMaster().append(resultMaster)
 
         '''RUN FILE SAVE'''
         # Create a folder for today's date if it doesn't already exist
@@ -152,18 +173,23 @@ class TestingApp(ttk.Window):
             os.mkdir(f'{self.saveFolder}/{self.runDate}')
 
         if SHOT_MODE:
-            self.filename = f'CMFX_{self.runNumber}.csv'
+            self.filename = f'CMFX_{self.runNumber}.{resultsFileFormat}'
         else:
-            self.filename = f'CMFX_{self.serialNumber}.csv'
+            self.filename = f'CMFX_{self.serialNumber}.{resultsFileFormat}'
 
         # These results are listed in accordance with the 'columns' variable in constants.py
         # If the user would like to add or remove fields please make those changes in constant.py
-        results = [getattr(self, variable) for variable in single_columns if hasattr(self, variable)]
+        if resultsFileFormat == 'npz':
+            results = {variable: getattr(self, variable) for variable in single_columns if hasattr(self, variable)}
+            saveShot(f'{self.saveFolder}/{self.runDate}/{self.filename}', results)
 
-        # Creates a data frame which is easier to save to csv formats
-        results_df = pd.DataFrame([pd.Series(val, dtype='object') for val in results]).T
-        results_df.columns = [single_columns[variable]['name'] for variable in single_columns if hasattr(self, variable)]
-        results_df.to_csv(f'{self.saveFolder}/{self.runDate}/{self.filename}', index=False)
+        else:
+            results = [getattr(self, variable) for variable in single_columns if hasattr(self, variable)]
+
+            # Creates a data frame which is easier to save to csv formats
+            results_df = pd.DataFrame([pd.Series(val, dtype='object') for val in results]).T
+            results_df.columns = [single_columns[variable]['name'] for variable in single_columns if hasattr(self, variable)]
+            results_df.to_csv(f'{self.saveFolder}/{self.runDate}/{self.filename}', index=False)
     
     def saveScopeResults(self):
         '''OSCILLOSCOPE FILE SAVE'''
@@ -180,24 +206,24 @@ class TestingApp(ttk.Window):
         results_df.to_csv(f'{self.saveFolder}/{self.runDate}/{scope_filename}', index=False)
         print('Done saving scope!')
 
-    # Read in a csv file and plot those results
-    def readResults(self):
-        readFile = filedialog.askopenfilename(filetypes=[('Comma separated values', '.csv')])
+    # Read in a shot file and plot those results
+    def readResults(self, readFile=None):
+        if readFile is None:
+            readFile = filedialog.askopenfilename(filetypes=[('Shot files', f'{shotFileExtension} .csv'), ('Binary shot file', shotFileExtension), ('Comma separated values', '.csv')])
         if readFile != '':
-            results_df = pd.read_csv(readFile, low_memory=False)
+            # Only the scalars, charge history and discharge time axis are read now, the rest of the channels
+            # are read when they are plotted or analysed
+            self.lazyShot = LazyShot(readFile)
+            for variable in self.lazyShot.arrayVariables:
+                if hasattr(self, variable):
+                    delattr(self, variable)
 
             # Reset program and allow user to reset
             self.resetButton.configure(state='normal')
 
-            for variable, description in single_columns.items():
-                if description['type'] == 'scalar':
-                    if description['name'] in results_df:
-                        scalar_data = results_df[description['name']].values[0]
-                        setattr(self, variable, scalar_data)
-                else:
-                    if description['name'] in results_df:
-                        array_data = results_df[description['name']].dropna().values
-                        setattr(self, variable, array_data)
+            variables = list(self.lazyShot.scalars) + ['chargeTime', 'chargeVoltagePS', 'chargeCurrentPS', 'capacitorVoltage', 'dischargeTime']
+            for variable, value in self.lazyShot.load(variables).items():
+                setattr(self, variable, value)
 
             # Place values for all user inputs and plots
             if SHOT_MODE:
@@ -217,12 +243,124 @@ class TestingApp(ttk.Window):
             self.setData(self.resultsPlotData)
             self.resultsPlotViewer.replot()
 
-            # Load the analysis plots
-            self.performAnalysis()
-            self.analysisPlotViewer.replot()
+            # Load the analysis plots, they are replotted once the analysis finishes
+            self.performAnalysis(record=False)
 
             self.resultsSaved = True
-            self.filename = readFile.split('/')[-1]
+            # Notes are edited in the file that was read, which is the binary file of a converted CSV
+            self.filename = os.path.basename(self.lazyShot.filename)
+
+    def loadLines(self, lines):
+        # Read the channels of an opened shot the first time they are plotted, called by the PlotViewer
+        if self.lazyShot is None:
+            return
+
+        for variable, value in self.lazyShot.load(list(lines)).items():
+            setattr(self, variable, value)
+            lines[variable].data = value
+
+    def shotHas(self, variable):
+        return hasattr(self, variable) or (self.lazyShot is not None and variable in self.lazyShot)
+
+    def openArchive(self):
+        # Popup window to search every shot in the save folder and open one of them
+        if not getattr(self, 'saveFolderSet', False):
+            print('Set the save folder before searching for shots')
+            return
+
+        self.archive = ShotArchive(self.saveFolder)
+
+        self.archiveWindow = window.Toplevel(padx=framePadding, pady=framePadding)
+        self.archiveWindow.title('Find Shots')
+        self.eval(f'tk::PlaceWindow {str(self.archiveWindow)} center')
+
+        # Query in the pandas syntax, for example: primaryGas == "Deuterium" and chargeVoltage > 20 and decayTime > 0.03
+        queryFrame = ttk.Frame(self.archiveWindow)
+        queryFrame.pack(fill='x', pady=(0, framePadding))
+        queryLabel = ttk.Label(queryFrame, text='Query:', **text_opts)
+        queryLabel.pack(side='left')
+        queryEntry = ttk.Entry(queryFrame, width=80)
+        queryEntry.pack(side='left', fill='x', expand=True, padx=buttonPadding)
+
+        tree = ttk.Treeview(self.archiveWindow, columns=archivePickerColumns, show='headings', height=archivePickerRows)
+        for column in archivePickerColumns:
+            tree.heading(column, text=column)
+            tree.column(column, width=100, anchor='center')
+        tree.pack(fill='both', expand=True)
+
+        statusText = ttk.StringVar()
+        statusLabel = ttk.Label(self.archiveWindow, textvariable=statusText, **text_opts)
+        statusLabel.pack(fill='x', pady=(framePadding, 0))
+
+        # The file of each shot listed in the tree
+        files = {}
+        def search(event=None):
+            start = time.perf_counter()
+            try:
+                shots = self.archive.query(queryEntry.get().strip())
+            except Exception as e:
+                statusText.set(f'Invalid query: {e}')
+                return
+            queryTime = time.perf_counter() - start
+
+            tree.delete(*tree.get_children())
+            files.clear()
+            for _, shot in shots.iterrows():
+                values = ['' if column not in shot or pd.isna(shot[column]) else shot[column] for column in archivePickerColumns]
+                item = tree.insert('', 'end', values=values)
+                files[item] = shot['file']
+            statusText.set(f'{len(shots)} of {len(self.archive.shots)} shots, found in {queryTime * 1e3:.1f} ms')
+
+        def openShot(event=None):
+            selection = tree.selection()
+            if selection:
+                self.readResults(self.archive.path(files[selection[0]]))
+
+        queryEntry.bind('<Return>', search)
+        tree.bind('<Double-1>', openShot)
+
+        searchButton = ttk.Button(queryFrame, text='Search', command=search, bootstyle='primary')
+        searchButton.pack(side='left', padx=buttonPadding)
+        openButton = ttk.Button(queryFrame, text='Open', command=openShot, bootstyle='primary')
+        openButton.pack(side='left')
+
+        search()
+
+    def refreshActive(self):
+        # The status is refreshed at the full rate from the start of a charge until the app is reset, and while an analysis is running
+        return not self.idleMode or self.charging or getattr(self, 'analysisFuture', None) is not None
+
+    def openLatencyPanel(self):
+        # Popup window with the recent durations of the refresh loop, DAQ reads and shot stages
+        if hasattr(self, 'latencyWindow') and self.latencyWindow.winfo_exists():
+            self.latencyWindow.lift()
+            return
+
+        self.latencyWindow = window.Toplevel(padx=framePadding, pady=framePadding)
+        self.latencyWindow.title('Latency')
+
+        latencyText = ttk.StringVar()
+        latencyLabel = ttk.Label(self.latencyWindow, textvariable=latencyText, font=('Courier', 10), justify='left')
+        latencyLabel.pack(fill='both', expand=True)
+
+        clearButton = ttk.Button(self.latencyWindow, text='Clear', command=profiler.clear, bootstyle='primary')
+        clearButton.pack(side='right', pady=(framePadding, 0))
+
+        def update():
+            if not self.latencyWindow.winfo_exists():
+                return
+            latencyText.set(profiler.report(budget=1 / refreshRate))
+            self.latencyWindow.after(int(1000 / latencyPanelRate), update)
+
+        update()
+
+    def toggleTrace(self):
+        # Write every span to a trace file in the save folder, which opens in Perfetto or chrome://tracing
+        if profiler.tracing:
+            profiler.stopTrace()
+        else:
+            folder = self.saveFolder if getattr(self, 'saveFolderSet', False) else os.getcwd()
+            profiler.startTrace(f'{folder}/trace_{time.strftime("%Y%m%d_%H%M%S")}.json')
 
     def openSite(self):
         webbrowser.open(githubSite)
@@ -406,9 +544,10 @@ class TestingApp(ttk.Window):
 
         # If the user presses the Okay button, charging begins
         if chargeConfirmWindow.OKPress:
-            self.NI_DAQ.reset_systemStatus() # Only start gathering data when beginning to charge
+            self.NI_DAQ.reset_systemStatus(record=record_whole_charge) # Only start gathering data when beginning to charge
 
             self.idleMode = False
+            self.refreshScheduler.wake()
 
             # Arm lab computers over http
             self.arm_http()
@@ -428,6 +567,7 @@ class TestingApp(ttk.Window):
             # Enable HV only AFTER writing charge values
             self.operateSwitch('Enable HV', True)
             self.charging = True
+            self.armWatchdog(True)
 
             if SHOT_MODE:
                 # Record base pressures when charging begins
@@ -435,6 +575,9 @@ class TestingApp(ttk.Window):
 
     def discharge(self):
         def discharge_switch():
+            # HV is turned off for the shot, which isn't a fault
+            self.armWatchdog(False)
+
             if not IGNITRON_MODE:
                 self.operateSwitch('Load Switch', True)
                 time.sleep(gasPuffWaitTime)	# Hold central conductor at high voltage for a while to avoid bouncing switch until gas puff starts
@@ -479,6 +622,8 @@ class TestingApp(ttk.Window):
             dischargeConfirmWindow.wait_window()
 
             if dischargeConfirmWindow.OKPress:
+                self.armWatchdog(False)
+
                 # Reset the trigger just before discharging
                 self.NI_DAQ.reset_discharge_trigger()
 
@@ -539,6 +684,8 @@ class TestingApp(ttk.Window):
             self.NI_DAQ.reset_discharge_trigger()
 
             self.idleMode = False
+            self.refreshScheduler.wake()
+            self.armWatchdog(True)
 
             # Arming lab computers over http
             self.arm_http()
@@ -569,6 +716,7 @@ class TestingApp(ttk.Window):
 
             # Actually begin discharging power supply before opening load switch
             self.powerSupplyRamp(action='discharge')
+            self.armWatchdog(False)
 
             # Wait a while before closing the mechanical dump switch
             time.sleep(hardCloseWaitTime)
@@ -609,38 +757,76 @@ class TestingApp(ttk.Window):
 
     def arm_http(self):
         print('Arming lab computers over local network...')
-        # Send packet to local computer
-        Thread(target=requests.get, args=(f'http://169.254.146.111/arm_diagnostics?n={self.runNumber}&dsc=1',)).start()
-        Thread(target=requests.get, args=(f'http://169.254.146.131/arm_diagnostics?n={self.runNumber}&dsc=1',)).start()
-
+        # Send packet to each local computer at the same time and report how long they took to answer
+        armReadout = Readout('Arming diagnostics')
+        for address in diagnosticsComputers:
+            url = f'http://{address}/arm_diagnostics?n={self.runNumber}&dsc=1'
+            armReadout.add(f'HTTP {address}', lambda url=url: requests.get(url, timeout=readoutDeadlines['HTTP']), readoutDeadlines['HTTP'])
+        Thread(target=armReadout.run).start()
+
+    @profiler.timed()
     def replotCharge(self):
         # Don't execute if using direct drive power supply
         if POWER_SUPPLY == 'EB-100':
             return
-        self.chargeVoltageLine.set_data(self.chargeTime, np.abs(self.chargeVoltagePS) / 1000)
-        self.chargeCurrentLine.set_data(self.chargeTime, self.chargeCurrentPS * 1000)
+        chargeTime = np.asarray(self.chargeTime)
+        chargeVoltagePS = np.asarray(self.chargeVoltagePS)
+        chargeCurrentPS = np.asarray(self.chargeCurrentPS)
+        capacitorVoltage = np.asarray(self.capacitorVoltage)
+
+        # Keep a running maximum for the autoscale so only the new samples are checked each frame
+        # The history only gets shorter when it is reset or a shot is loaded, so start the maximum over
+        if len(chargeTime) < self.chargePlotIndex:
+            self.chargePlotIndex = 0
+            self.capacitorVoltageMax = 0.0
+            self.chargeCurrentMax = 0.0
+        if len(capacitorVoltage) > self.chargePlotIndex:
+            # fmax ignores the nan values of the capacitor voltage when it is only read every so often
+            self.capacitorVoltageMax = np.fmax.reduce(np.abs(capacitorVoltage[self.chargePlotIndex:]), initial=self.capacitorVoltageMax)
+            self.chargeCurrentMax = np.fmax.reduce(np.abs(chargeCurrentPS[self.chargePlotIndex:]), initial=self.chargeCurrentMax)
+        self.chargePlotIndex = len(chargeTime)
+
+        # Turn the time axis over in pages rather than sliding it every frame
+        # The current time stays between 30% and 80% of the plot once it's past the first page
+        pageStep = chargePlotPageFraction * plotTimeLimit
+        xmin = pageStep * np.ceil(max(self.timePoint - 0.8 * plotTimeLimit, 0) / pageStep)
+        xlim = (xmin, xmin + plotTimeLimit)
+
+        # Only raise the y limits once the data gets close to the top, so they change a few times per charge at most
+        voltageTop = max(self.chargeVoltageAxis.get_ylim()[1], voltageYLim)
+        if 1.1 * self.capacitorVoltageMax / 1000 > voltageTop or len(chargeTime) == 0:
+            voltageTop = max(1.2 * self.capacitorVoltageMax / 1000, voltageYLim)
+        currentTop = max(self.chargeCurrentAxis.get_ylim()[1], currentYLim)
+        if 1.1 * self.chargeCurrentMax * 1000 > currentTop or len(chargeTime) == 0:
+            currentTop = max(1.2 * self.chargeCurrentMax * 1000, currentYLim)
+
+        limitsChanged = self.chargePlot.ax.get_xlim() != xlim or self.chargeVoltageAxis.get_ylim()[1] != voltageTop or self.chargeCurrentAxis.get_ylim()[1] != currentTop
+        if limitsChanged:
+            self.chargePlot.ax.set_xlim(*xlim)
+            self.chargeVoltageAxis.set_ylim(0, voltageTop)
+            self.chargeCurrentAxis.set_ylim(0, currentTop)
+
+        # Only hand the samples on the current page to matplotlib
+        start = max(np.searchsorted(chargeTime, xlim[0]) - 1, 0)
+        stop = np.searchsorted(chargeTime, xlim[1], side='right') + 1
+        pageTime = chargeTime[start:stop]
+        self.chargeVoltageLine.set_data(pageTime, np.abs(chargeVoltagePS[start:stop]) / 1000)
+        self.chargeCurrentLine.set_data(pageTime, chargeCurrentPS[start:stop] * 1000)
 
         # If the capacitor is only being read every so often, only plot non nan values
         try:
-            nanIndices = np.isnan(self.capacitorVoltage)
-            self.capacitorVoltageLine.set_data(self.chargeTime[~nanIndices], self.capacitorVoltage[~nanIndices] / 1000)
+            pageCapacitorVoltage = capacitorVoltage[start:stop]
+            nanIndices = np.isnan(pageCapacitorVoltage)
+            self.capacitorVoltageLine.set_data(pageTime[~nanIndices], pageCapacitorVoltage[~nanIndices] / 1000)
         except IndexError:
             print('Mismatch in shape')
 
-        if self.timePoint + 0.2 * plotTimeLimit > plotTimeLimit:
-            self.chargePlot.ax.set_xlim(self.timePoint - 0.8 * plotTimeLimit, self.timePoint + 0.2 * plotTimeLimit)
-        else:
-            self.chargePlot.ax.set_xlim(0, plotTimeLimit)
-
-        if len(self.capacitorVoltage) != 0:
-            if 1.2 * max(np.abs(self.capacitorVoltage)) / 1000 > voltageYLim:
-                self.chargePlot.ax.set_ylim(0, 1.2 * max(np.abs(self.capacitorVoltage)) / 1000)
-            
-            if 1.2 * max(np.abs(self.chargeCurrentPS)) * 1000 > currentYLim:
-                self.chargeCurrentAxis.set_ylim(0, 1.2 * max(np.abs(self.chargeCurrentPS)) * 1000)
-
         try:
-            self.bm.update()
+            # The axes are part of the blit background, so they are only drawn again when the limits change
+            if limitsChanged:
+                self.chargePlot.canvas.draw()
+            else:
+                self.bm.update()
         except ValueError:
             print('Mismatch in shape')
 
@@ -648,8 +834,38 @@ class TestingApp(ttk.Window):
     def safetyLights(self):
         print('Turn on safety lights')
 
+    def armWatchdog(self, armed):
+        # Faults are acted on from the start of a charge until the supply is ramped down for the shot
+        if self.watchdog is not None:
+            if armed:
+                self.watchdog.arm()
+            else:
+                self.watchdog.disarm()
+
+    def faultOff(self, faults):
+        # Called from a thread of the watchdog once its process has switched Enable HV off, so only the hardware is operated here
+        # The supply is ramped down straight away and the rest of emergency_off carries on on its own thread
+        self.powerSupplyRamp(action='discharge')
+        self.operateSwitch('Enable HV', False)
+        Thread(target=self.emergency_off).start()
+
+    def showFault(self):
+        # Tell the operator about a fault the watchdog has acted on, called on the Tk thread
+        if self.watchdog is None or self.watchdog.faultTime == self.faultShown:
+            return
+
+        self.faultShown = self.watchdog.faultTime
+        if any(fault.startswith('Door Closed') for fault in self.watchdog.faults):
+            name = 'Door Open Fault'
+            text = 'The door to the lab has been left open.'
+        else:
+            name = 'Power Supply Fault'
+            text = f'There has been a fault in the power supply: {", ".join(self.watchdog.faults)}.'
+        MessageWindow(self, name, f'{text} The power supply was turned off {self.watchdog.reactionTime * 1e3:.0f} ms after the fault and is being discharged.')
+
     def emergency_off(self):
         print('Emergency Off')
+        self.armWatchdog(False)
         # Force power supply to discharge
         self.powerSupplyRamp(action='discharge')
 
@@ -736,6 +952,7 @@ class TestingApp(ttk.Window):
 
         if not DEBUG_MODE:
             # Stop NI communication
+            self.watchdog.stop()
             self.NI_DAQ.close()
 
             # Close visa communication with scope
@@ -745,10 +962,21 @@ class TestingApp(ttk.Window):
                 except visa.errors.VisaIOError:
                     pass
 
+        # Finish the trace file
+        profiler.stopTrace()
+
+        # Close the results master
+        if hasattr(self, 'resultsMaster'):
+            self.resultsMaster.close()
+
+        # Don't wait for an analysis that is still running
+        self.analysisExecutor.shutdown(wait=False, cancel_futures=True)
+
         # Close plots
         plt.close('all')
 
         # Cancel all scheduled callbacks
+        self.refreshScheduler.stop()
         for after_id in self.tk.eval('after info').split():
             self.after_cancel(after_id)
 
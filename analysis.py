@@ -1,7 +1,58 @@
 from constants import *
 from config import *
 import numpy as np
-from scipy import signal, integrate, optimize
+from functools import lru_cache
+from scipy import signal, integrate
+from fitting import *
+
+@lru_cache(maxsize=None)
+def butterSOS(order, cutoff_freq, fs):
+    # Designing the filter takes longer than applying it, so each design is only done once
+    return signal.butter(order, cutoff_freq, btype='lowpass', output='sos', fs=fs)
+
+class FilterBank():
+    '''
+    Low pass filters every diagnostic of a shot with the same Butterworth design.
+    Channels of the same length are stacked and filtered in a single call along axis 1. In zero phase
+    mode the filter is run forwards and backwards so the filtered signals aren't delayed with respect to
+    the raw ones, which matters for the timing of the dump.
+    '''
+    def __init__(self, fs, order=10, cutoff_freq=1000, zeroPhase=ZERO_PHASE_FILTER):
+        self.fs = fs
+        self.order = order # magnitude of dropoff in frequency response above cutoff
+        self.cutoff_freq = cutoff_freq
+        self.zeroPhase = zeroPhase
+
+    def filter(self, data, cutoff_freq=None):
+        '''
+        Filter a single channel, or a (channels, samples) array along axis 1.
+        '''
+        if cutoff_freq is None:
+            cutoff_freq = self.cutoff_freq
+        data = np.asarray(data, dtype=float)
+        if data.shape[-1] == 0:
+            return data.copy()
+
+        sos = butterSOS(self.order, cutoff_freq, self.fs)
+        if self.zeroPhase:
+            return signal.sosfiltfilt(sos, data, axis=-1)
+        return signal.sosfilt(sos, data, axis=-1)
+
+    def filterMany(self, channels, cutoff_freq=None):
+        '''
+        Filter a dictionary of {name: data} and return a dictionary of the filtered data.
+        '''
+        # Group the channels by length so each group is a single 2-D filter call
+        groups = {}
+        for name, data in channels.items():
+            groups.setdefault(len(data), []).append(name)
+
+        filtered = {}
+        for names in groups.values():
+            stacked = self.filter(np.vstack([channels[name] for name in names]), cutoff_freq)
+            filtered.update(zip(names, stacked))
+
+        return filtered
 
 class Analysis():
     def __init__(self, time, timeUnit, voltage, current, dumpDelay, ignitronDelay, gasStart, hvStart, polarity):
@@ -17,8 +68,8 @@ class Analysis():
         self.polarity = polarity
 
         # Send voltage and current through filter
-        self.voltage_filtered = self.lowPassFilter(voltage)
-        self.current_filtered = self.lowPassFilter(current)
+        self.filterBank = FilterBank(self.frequency)
+        self.voltage_filtered, self.current_filtered = self.filterBank.filter(np.vstack((voltage, current)))
 
         try:
             self.get_decayTime()
@@ -41,9 +92,8 @@ class Analysis():
         self.frequency = 1 / (self.time_sec[1] - self.time_sec[0]) # [Hz]
 
     def lowPassFilter(self, data, cutoff_freq=1000):
-        order = 10 # magnitude of dropoff in frequency response above cutoff
-        sos = signal.butter(order, cutoff_freq, btype='lowpass', output='sos', fs=samp_freq)
-        return signal.sosfilt(sos, data)
+        # The filter bank uses the sample rate of the time axis, which is lower than samp_freq if the data was decimated
+        return self.filterBank.filter(data, cutoff_freq)
     
     def get_decayTime(self):
         # Find the point just before the dump. Used to calculate resistance of the plasma at the moment of dump
@@ -61,10 +111,8 @@ class Analysis():
         # If the bias is positive, the dump current will be negative and we need to flip the sign to find the 'peak'
         if self.polarity == 'Positive':
             self.peaks, _ = signal.find_peaks(-self.dump_current, height=1, prominence=1)
-            m_guess_factor = -1
         elif self.polarity == 'Negative':
             self.peaks, _ = signal.find_peaks(self.dump_current, height=1, prominence=1)
-            m_guess_factor = 1
         else:
             print('Polarity is not correct')
 
@@ -78,13 +126,14 @@ class Analysis():
         self.current_at_dump = self.current_filtered[self.voltage_drop_index] # [A]
         self.resistance_at_dump = np.abs(self.voltage_at_dump / self.current_at_dump) # [Ohms]
         
-        # Initial guess is 1 A peak magnitude, 40 ms dump time, and decays to zero
-        p0 = (m_guess_factor * 1, 0.04, 0)
-        params, cv = optimize.curve_fit(self.exp_decay, self.exp_time, self.exp_current, p0)
+        # The fit finds its own starting point, so it doesn't depend on a guess of the peak current or decay time
+        params, success = fitDecay(self.exp_time, self.exp_current, maxPoints=fitMaxPoints)
+        if not success:
+            raise RuntimeError('Exponential fit of the dump current failed')
         self.m, self.decayTime, self.b = params
 
     def exp_decay(self, x, m, tau, b):
-        return m * np.exp(-x / tau) + b
+        return expDecay(x, m, tau, b)
     
     def get_storedEnergy(self):
         if not hasattr(self, 'tau'):
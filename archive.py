@@ -0,0 +1,187 @@
+'''
+Searchable index of every shot in a save folder.
+
+Each run file saveFolder/<runDate>/CMFX_XXXXX.npz (or .csv) adds one row of its scalar variables, which
+is joined with the results of its analysis from the results master and the name of its scope file, if
+there is one. The index is kept in saveFolder/shot_archive.pkl, and on each update only the files that
+are new or have changed size or modification time are read, and only their scalars:
+    archive = ShotArchive(saveFolder)
+    shots = archive.query('primaryGas == "Deuterium" and chargeVoltage > 20 and decayTime > 0.03')
+
+Analysis results that have the same name as a shot variable are prefixed with plasma, as in plasmaCapacitance.
+Update the index from the command line with: python archive.py <save folder>
+'''
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from config import *
+from shot_file import *
+from results_master import ResultsMaster
+
+# Columns that describe the file rather than the shot
+fileColumns = ['file', 'runDate', 'mtime', 'size']
+
+def isShotFile(name):
+    return (name.startswith('CMFX_') and name.endswith(shotFileExtension)) or isShotCSV(name)
+
+def isScopeFile(name):
+    return name.startswith('CMFX_') and name.endswith('_scope.csv')
+
+def readScalars(filename):
+    '''
+    Return the scalar variables of a shot file without reading any of its arrays.
+    '''
+    if filename.endswith(shotFileExtension):
+        # Only the header member of the archive is read
+        with np.load(filename, allow_pickle=False) as shot:
+            return json.loads(str(shot['__header__']))['scalars']
+
+    # In the CSV format the scalars are on the first row
+    names = {description['name']: variable for variable, description in single_columns.items() if description['type'] == 'scalar'}
+    results_df = pd.read_csv(filename, nrows=1, usecols=lambda name: name in names)
+    if len(results_df) == 0:
+        return {}
+    return {names[name]: value for name, value in results_df.iloc[0].items() if not pd.isna(value)}
+
+def analysisColumn(variable):
+    # Analysis results with the same name as a shot variable, such as capacitance, are prefixed with plasma
+    return f'plasma{variable[0].upper()}{variable[1:]}' if variable in single_columns else variable
+
+class ShotArchive():
+    def __init__(self, saveFolder, update=True):
+        self.saveFolder = saveFolder
+        self.filename = f'{saveFolder}/{shotArchiveIndexName}'
+
+        self.index = pd.DataFrame(columns=fileColumns)
+        if os.path.exists(self.filename):
+            try:
+                self.index = pd.read_pickle(self.filename)
+            except Exception as e:
+                # The index can always be rebuilt from the run files
+                print(f'Rebuilding the shot archive, could not read {self.filename}: {e}')
+        self.shots = self.index
+
+        if update:
+            self.update()
+
+    def scan(self):
+        '''
+        Return {file: (runDate, mtime, size)} for the run files and {file: scope file} for those that have one.
+        Files are relative to the save folder.
+        '''
+        files = {}
+        scopeFiles = {}
+        for folder in os.scandir(self.saveFolder):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if isScopeFile(entry.name):
+                    scopeFiles[f'{folder.name}/{entry.name[:-len("_scope.csv")]}'] = f'{folder.name}/{entry.name}'
+                elif isShotFile(entry.name):
+                    stat = entry.stat()
+                    files[f'{folder.name}/{entry.name}'] = (folder.name, stat.st_mtime, stat.st_size)
+
+        # A CSV that has been converted is indexed through its binary file
+        for file in list(files):
+            stem, extension = os.path.splitext(file)
+            if extension == '.csv' and f'{stem}{shotFileExtension}' in files:
+                del files[file]
+
+        return files, {file: scopeFiles.get(os.path.splitext(file)[0]) for file in files}
+
+    def update(self):
+        '''
+        Read the run files that are new or have changed since the last update and rejoin the analysis results.
+        '''
+        start = time.perf_counter()
+        files, scopeFiles = self.scan()
+
+        known = self.index.set_index('file', drop=False)
+        stamps = dict(zip(known['file'], zip(known['mtime'], known['size'])))
+        unchanged = [file for file, (_, mtime, size) in files.items() if stamps.get(file) == (mtime, size)]
+        changed = [file for file, (_, mtime, size) in files.items() if stamps.get(file) != (mtime, size)]
+
+        rows = []
+        for file in changed:
+            runDate, mtime, size = files[file]
+            try:
+                scalars = readScalars(os.path.join(self.saveFolder, file))
+            except Exception as e:
+                print(f'Could not index {file}: {e}')
+                continue
+            rows.append({**scalars, 'file': file, 'runDate': runDate, 'mtime': mtime, 'size': size})
+
+        removed = len(known) - len(unchanged)
+        if rows or removed:
+            self.index = pd.concat([known.loc[unchanged], pd.DataFrame(rows)], ignore_index=True)
+            self.index = self._numeric(self.index)
+            self.save()
+
+        self.shots = self._join(self.index, scopeFiles)
+        print(f'Shot archive: {len(self.shots)} shots, {len(rows)} read in {time.perf_counter() - start:.2f} s')
+
+        return self.shots
+
+    def _numeric(self, table):
+        # Columns that only hold numbers are stored as numbers so that they can be compared in queries
+        for column in table.columns:
+            if table[column].dtype == object:
+                values = pd.to_numeric(table[column], errors='coerce')
+                if values.notna().sum() == table[column].notna().sum():
+                    table[column] = values
+        return table
+
+    def _join(self, index, scopeFiles):
+        shots = index.copy()
+        shots['scopeFile'] = [scopeFiles.get(file) for file in shots['file']]
+        if 'runNumber' not in shots:
+            return shots
+
+        # Run numbers are saved as zero padded strings by the app and read back as integers from CSVs
+        shots['runNumber'] = pd.to_numeric(shots['runNumber'], errors='coerce')
+
+        # Don't create a results master just to look for analysis results
+        if not os.path.exists(f'{self.saveFolder}/{resultsMasterDatabaseName}'):
+            return shots
+        resultsMaster = ResultsMaster(self.saveFolder)
+        variables, rows = resultsMaster.readAnalysis()
+        resultsMaster.close()
+        if not rows:
+            return shots
+
+        analysis = pd.DataFrame(rows, columns=variables)
+        analysis.columns = ['runNumber'] + [analysisColumn(variable) for variable in variables[1:]]
+        analysis['runNumber'] = pd.to_numeric(analysis['runNumber'], errors='coerce')
+        # Any earlier analysis columns in the index are replaced by the latest results
+        shots = shots.drop(columns=[column for column in analysis.columns[1:] if column in shots])
+
+        return shots.merge(analysis, on='runNumber', how='left')
+
+    def save(self):
+        # Write to a temporary file first so that the index is never half written
+        tempFilename = f'{self.filename}.tmp'
+        self.index.to_pickle(tempFilename)
+        os.replace(tempFilename, self.filename)
+
+    def query(self, expression=None, columns=None):
+        '''
+        Return the shots that match a pandas query expression, such as 'chargeVoltage > 20 and primaryGas == "Deuterium"',
+        sorted by run number. Column names that aren't identifiers can be quoted with backticks.
+        '''
+        shots = self.shots if not expression else self.shots.query(expression)
+        if 'runNumber' in shots:
+            shots = shots.sort_values('runNumber')
+        if columns is not None:
+            shots = shots[[column for column in columns if column in shots]]
+        return shots
+
+    def path(self, file):
+        return os.path.join(self.saveFolder, file)
+
+if __name__ == '__main__':
+    archive = ShotArchive(sys.argv[1])
+    if len(sys.argv) > 2:
+        print(archive.query(' '.join(sys.argv[2:])).to_string())
@@ -0,0 +1,58 @@
+'''
+Time spent low pass filtering the diagnostics of one shot in CMFX_App.performAnalysis.
+
+The old analysis designed the Butterworth filter again for every channel and filtered the channels one
+at a time. The FilterBank in analysis.py designs each filter once and filters all channels of the
+same length in one call, either causally or with zero phase.
+
+Run with: python benchmarks/bench_analysis.py
+'''
+import os
+import sys
+import time
+import numpy as np
+from scipy import signal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis import FilterBank, butterSOS
+from config import samp_freq
+
+n_channels = 15 # filtered channels per shot
+shot_duration = 1.0 # s
+repeats = 10
+
+def old_filter(data, cutoff_freq=1000):
+    order = 10
+    sos = signal.butter(order, cutoff_freq, btype='lowpass', output='sos', fs=samp_freq)
+    return signal.sosfilt(sos, data)
+
+def run(analyze):
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        analyze()
+        durations.append(time.perf_counter() - start)
+    return np.median(durations)
+
+if __name__ == '__main__':
+    n_samples = int(shot_duration * samp_freq)
+    channels = {f'channel{i}': np.random.randn(n_samples) for i in range(n_channels)}
+    print(f'{n_channels} channels of {n_samples} samples at {samp_freq / 1000:.0f} kHz, median of {repeats} shots')
+
+    start = time.perf_counter()
+    for _ in range(n_channels):
+        signal.butter(10, 1000, btype='lowpass', output='sos', fs=samp_freq)
+    print(f'{"design only":>26}: {(time.perf_counter() - start) * 1e3:7.1f} ms for {n_channels} designs')
+
+    results = {
+        'old, one channel at a time': lambda: [old_filter(data) for data in channels.values()],
+        'FilterBank': lambda: FilterBank(samp_freq, zeroPhase=False).filterMany(channels),
+        'FilterBank, zero phase': lambda: FilterBank(samp_freq, zeroPhase=True).filterMany(channels),
+    }
+    for name, analyze in results.items():
+        print(f'{name:>26}: {run(analyze) * 1e3:7.1f} ms per shot')
+
+    # The causal filter bank must give the same result as the old filter
+    old = old_filter(channels['channel0'])
+    new = FilterBank(samp_freq, zeroPhase=False).filterMany(channels)['channel0']
+    print(f'max difference from old filter: {np.abs(old - new).max():.2e}, cached designs: {butterSOS.cache_info().currsize}')
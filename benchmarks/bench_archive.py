@@ -0,0 +1,73 @@
+'''
+Build, update and query times of the shot archive in archive.py over a folder of synthetic shots.
+
+Each shot is a binary shot file with the scalars of a real shot and a short discharge trace, spread
+over one run date folder per 100 shots, with its analysis results in the results master.
+
+Run with: python benchmarks/bench_archive.py [number of shots]
+'''
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import *
+from archive import ShotArchive
+from results_master import ResultsMaster
+from shot_file import saveShot
+
+queries = ['primaryGas == "Deuterium" and chargeVoltage > 20 and decayTime > 0.03',
+           'runNumber > 9000',
+           '`plasmaCapacitance` > 5e-6 and dumpDelay < 0.5']
+
+def makeShots(saveFolder, nShots, seed=0):
+    rng = np.random.default_rng(seed)
+    resultsMaster = ResultsMaster(saveFolder)
+    dischargeTime = np.arange(1000) * 1e-5
+    for runNumber in range(nShots):
+        runDate = f'2024_{runNumber // 100:04d}'
+        os.makedirs(f'{saveFolder}/{runDate}', exist_ok=True)
+        variables = {'runNumber': f'{runNumber:05d}', 'runDate': runDate, 'runTime': '12:00:00',
+                     'chargeVoltage': rng.uniform(5, 30), 'dumpDelay': rng.uniform(0.1, 1),
+                     'primaryGas': rng.choice(['Deuterium', 'Hydrogen', 'Helium']),
+                     'preShotNotes': '', 'postShotNotes': '',
+                     'dischargeTime': dischargeTime, 'dischargeVoltage': rng.normal(size=len(dischargeTime))}
+        saveShot(f'{saveFolder}/{runDate}/CMFX_{runNumber:05d}.npz', variables)
+        resultsMaster.writeAnalysis(runNumber, {'decayTime': rng.uniform(0.01, 0.05), 'storedEnergy': rng.uniform(0, 1000),
+                                                'capacitance': rng.uniform(1e-6, 1e-5)})
+    resultsMaster.close()
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+if __name__ == '__main__':
+    nShots = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    with tempfile.TemporaryDirectory() as saveFolder:
+        _, makeTime = timed(makeShots, saveFolder, nShots)
+        print(f'Wrote {nShots} shots in {makeTime:.1f} s')
+
+        archive, buildTime = timed(ShotArchive, saveFolder)
+        print(f'{"full build":>24}: {buildTime:.2f} s')
+
+        _, reopenTime = timed(ShotArchive, saveFolder)
+        print(f'{"reopen, nothing new":>24}: {reopenTime:.3f} s')
+
+        # A new shot in the last run date folder
+        runDate = sorted(entry.name for entry in os.scandir(saveFolder) if entry.is_dir())[-1]
+        saveShot(f'{saveFolder}/{runDate}/CMFX_{nShots:05d}.npz', {'runNumber': f'{nShots:05d}', 'runDate': runDate,
+                                                                   'chargeVoltage': 25.0, 'primaryGas': 'Deuterium'})
+        _, updateTime = timed(archive.update)
+        print(f'{"update, one new shot":>24}: {updateTime:.3f} s')
+
+        for query in queries:
+            repeats = 100
+            start = time.perf_counter()
+            for _ in range(repeats):
+                shots = archive.query(query)
+            queryTime = (time.perf_counter() - start) / repeats
+            print(f'{len(shots):>6} shots in {queryTime * 1e3:6.2f} ms: {query}')
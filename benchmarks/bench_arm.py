@@ -0,0 +1,45 @@
+'''
+Time to arm the discharge tasks before a shot, on the simulated DAQmx backend in sim_daqmx.py.
+
+By default reset_discharge_trigger closes every trigger, dump and counter task and builds them again.
+With PERSISTENT_DAQ_TASKS the tasks are committed once and only restarted, until set_timing changes the timing.
+On the real driver the rebuild also reserves and programs the hardware, so the difference there is larger.
+
+Run with: python benchmarks/bench_arm.py
+'''
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+config.SIMULATED_DAQ = True
+import ni_daq
+import sim_daqmx
+from config import *
+
+shots = 10
+
+def arm(persistent):
+    ni_daq.PERSISTENT_DAQ_TASKS = persistent
+    daq = ni_daq.NI_DAQ(systemStatus_sample_rate, systemStatus_defaults, charge_ao_defaults, di_defaults,
+                        diagnostics_defaults, counters_defaults)
+    latencies = []
+    for _ in range(shots):
+        sim_daqmx.trigger()
+        daq.read_discharge()
+        daq.reset_discharge_trigger()
+        latencies.append(daq.arm_latency)
+
+    # Changing the timing builds the tasks again
+    daq.set_timing(0.1, 0.025, 0.005)
+    daq.reset_discharge_trigger()
+    changed = daq.arm_latency
+    daq.close()
+
+    return np.median(latencies), changed
+
+if __name__ == '__main__':
+    results = {'rebuilt every shot': arm(False), 'persistent': arm(True)}
+    for name, (latency, changed) in results.items():
+        print(f'{name:>18}: median arm {latency * 1e3:.2f} ms over {shots} shots, {changed * 1e3:.2f} ms after a timing change')
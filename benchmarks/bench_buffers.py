@@ -0,0 +1,59 @@
+'''
+Per-callback cost of storing system status samples during a long hold charge.
+
+Compares the old np.append storage with the RingBuffer used by NI_DAQ.read. Each simulated callback
+appends _points_to_plot samples per channel, just like the DAQmx every-N-samples callback, and the
+status display then takes the latest value of every channel.
+
+Run with: python benchmarks/bench_buffers.py
+'''
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from buffers import RingBuffer
+
+sample_rate = 100 # Hz, systemStatus_sample_rate
+points_per_callback = 10 # _points_to_plot
+charge_duration = 30 * 60 # s
+channels = ['Power Supply Voltage', 'Power Supply Current', 'Capacitor Voltage']
+
+def append_storage():
+    data = {name: np.array([]) for name in channels}
+    def callback(points):
+        for i, name in enumerate(channels):
+            data[name] = np.append(data[name], points[i])
+        return [data[name][-1] for name in channels]
+    return callback
+
+def ring_storage():
+    data = RingBuffer(channels, 60 * sample_rate, growable=True)
+    def callback(points):
+        data.append(points)
+        return [data[name][-1] for name in channels]
+    return callback
+
+def run(callback):
+    n_callbacks = charge_duration * sample_rate // points_per_callback
+    points = np.random.rand(len(channels), points_per_callback)
+    durations = np.zeros(n_callbacks)
+    for i in range(n_callbacks):
+        start = time.perf_counter()
+        callback(points)
+        durations[i] = time.perf_counter() - start
+
+    return durations
+
+def report(name, durations):
+    # Mean callback cost over each minute of the charge
+    per_minute = durations.reshape(-1, 60 * sample_rate // points_per_callback).mean(axis=1) * 1e6
+    print(f'{name:>12}: minute 1 {per_minute[0]:8.1f} us, minute 15 {per_minute[14]:8.1f} us, '
+          f'minute 30 {per_minute[-1]:8.1f} us, total {durations.sum():6.2f} s')
+
+if __name__ == '__main__':
+    print(f'{charge_duration // 60} minute charge, {len(channels)} channels at {sample_rate} Hz, '
+          f'{points_per_callback} samples per callback')
+    report('np.append', run(append_storage()))
+    report('RingBuffer', run(ring_storage()))
@@ -0,0 +1,161 @@
+'''
+Frame time of the live charge plot over a 10 minute charge.
+
+The old version of TestingApp.replotCharge sets the whole charge history on the lines, scans the
+whole history for the y limits and slides the x limits every frame, so the axes are blitted as
+animated artists. The new version keeps running maxima, pages the time axis, only hands the current
+page to the lines and redraws the whole canvas only when the limits change.
+
+Both are run on the Agg backend with the same blitting as plots.BlitManager, which needs Tk to import.
+A frame is drawn for every half second of the charge.
+
+Run with: python benchmarks/bench_charge_plot.py
+'''
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+sample_rate = 100 # Hz, systemStatus_sample_rate
+charge_duration = 10 * 60 # s
+frame_interval = 0.5 # s of charge between measured frames
+plotTimeLimit = 20 # s
+chargePlotPageFraction = 0.5
+voltageYLim = 1.2 # kV
+currentYLim = 15 # mA
+
+class Blitter():
+    # Same steps as plots.BlitManager
+    def __init__(self, canvas, artists):
+        self.canvas = canvas
+        self.artists = artists
+        for artist in artists:
+            artist.set_animated(True)
+        self.bg = None
+        self.full_draws = 0
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        self.full_draws += 1
+        self.bg = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in self.artists:
+            self.canvas.figure.draw_artist(artist)
+
+    def update(self):
+        self.canvas.restore_region(self.bg)
+        self.draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+class ChargePlot():
+    def __init__(self, animate_axes):
+        self.fig, self.voltage_ax = plt.subplots(figsize=(10, 4), constrained_layout=True)
+        self.current_ax = self.voltage_ax.twinx()
+        self.voltage_line, = self.voltage_ax.plot([], [])
+        self.current_line, = self.current_ax.plot([], [])
+        self.capacitor_line, = self.voltage_ax.plot([], [], linestyle='--')
+        self.voltage_ax.set_xlim(0, plotTimeLimit)
+        self.voltage_ax.set_ylim(0, voltageYLim)
+        self.current_ax.set_ylim(0, currentYLim)
+
+        artists = [self.voltage_line, self.current_line, self.capacitor_line]
+        if animate_axes:
+            artists += [self.voltage_ax.xaxis, self.voltage_ax.yaxis, self.current_ax.yaxis]
+        self.bm = Blitter(self.fig.canvas, artists)
+        self.fig.canvas.draw()
+
+        self.index = 0
+        self.capacitor_max = 0.0
+        self.current_max = 0.0
+
+    def replot_old(self, t, voltage, current, capacitor, time_point):
+        self.voltage_line.set_data(t, np.abs(voltage) / 1000)
+        self.current_line.set_data(t, current * 1000)
+        nan_indices = np.isnan(capacitor)
+        self.capacitor_line.set_data(t[~nan_indices], capacitor[~nan_indices] / 1000)
+
+        if time_point + 0.2 * plotTimeLimit > plotTimeLimit:
+            self.voltage_ax.set_xlim(time_point - 0.8 * plotTimeLimit, time_point + 0.2 * plotTimeLimit)
+        else:
+            self.voltage_ax.set_xlim(0, plotTimeLimit)
+
+        if 1.2 * max(np.abs(capacitor)) / 1000 > voltageYLim:
+            self.voltage_ax.set_ylim(0, 1.2 * max(np.abs(capacitor)) / 1000)
+        if 1.2 * max(np.abs(current)) * 1000 > currentYLim:
+            self.current_ax.set_ylim(0, 1.2 * max(np.abs(current)) * 1000)
+
+        self.bm.update()
+
+    def replot_new(self, t, voltage, current, capacitor, time_point):
+        self.capacitor_max = np.fmax.reduce(np.abs(capacitor[self.index:]), initial=self.capacitor_max)
+        self.current_max = np.fmax.reduce(np.abs(current[self.index:]), initial=self.current_max)
+        self.index = len(t)
+
+        page_step = chargePlotPageFraction * plotTimeLimit
+        xmin = page_step * np.ceil(max(time_point - 0.8 * plotTimeLimit, 0) / page_step)
+        xlim = (xmin, xmin + plotTimeLimit)
+
+        voltage_top = max(self.voltage_ax.get_ylim()[1], voltageYLim)
+        if 1.1 * self.capacitor_max / 1000 > voltage_top:
+            voltage_top = max(1.2 * self.capacitor_max / 1000, voltageYLim)
+        current_top = max(self.current_ax.get_ylim()[1], currentYLim)
+        if 1.1 * self.current_max * 1000 > current_top:
+            current_top = max(1.2 * self.current_max * 1000, currentYLim)
+
+        limits_changed = self.voltage_ax.get_xlim() != xlim or self.voltage_ax.get_ylim()[1] != voltage_top or self.current_ax.get_ylim()[1] != current_top
+        if limits_changed:
+            self.voltage_ax.set_xlim(*xlim)
+            self.voltage_ax.set_ylim(0, voltage_top)
+            self.current_ax.set_ylim(0, current_top)
+
+        start = max(np.searchsorted(t, xlim[0]) - 1, 0)
+        stop = np.searchsorted(t, xlim[1], side='right') + 1
+        page_time = t[start:stop]
+        self.voltage_line.set_data(page_time, np.abs(voltage[start:stop]) / 1000)
+        self.current_line.set_data(page_time, current[start:stop] * 1000)
+        page_capacitor = capacitor[start:stop]
+        nan_indices = np.isnan(page_capacitor)
+        self.capacitor_line.set_data(page_time[~nan_indices], page_capacitor[~nan_indices] / 1000)
+
+        if limits_changed:
+            self.fig.canvas.draw()
+        else:
+            self.bm.update()
+
+def run(replot_name, animate_axes):
+    plot = ChargePlot(animate_axes)
+    replot = getattr(plot, replot_name)
+
+    # Ramp up to 10 kV over the first 5 minutes then hold, with the capacitor read every 10th sample
+    n_total = charge_duration * sample_rate
+    t_total = np.arange(n_total) / sample_rate
+    voltage = 10000 * np.minimum(t_total / 300, 1) + np.random.randn(n_total)
+    current = 0.01 * np.exp(-t_total / 300) + 1e-5 * np.random.randn(n_total)
+    capacitor = voltage.copy()
+    capacitor[np.arange(n_total) % 10 != 0] = np.nan
+
+    frame_samples = np.arange(int(frame_interval * sample_rate), n_total + 1, int(frame_interval * sample_rate))
+    durations = np.zeros(len(frame_samples))
+    for i, n in enumerate(frame_samples):
+        t = np.linspace(0, (n - 1) / sample_rate, n)
+        start = time.perf_counter()
+        replot(t, voltage[:n], current[:n], capacitor[:n], (n - 1) / sample_rate)
+        durations[i] = time.perf_counter() - start
+
+    plt.close(plot.fig)
+    return durations, plot.bm.full_draws - 1
+
+def report(name, result):
+    durations, full_draws = result
+    frames_per_minute = int(60 / frame_interval)
+    minutes = [1, 5, 10]
+    per_minute = ', '.join(f'minute {m} {np.median(durations[(m - 1) * frames_per_minute:m * frames_per_minute]) * 1e3:6.1f} ms' for m in minutes)
+    print(f'{name:>8}: {per_minute}, max {durations.max() * 1e3:6.1f} ms, {full_draws} full redraws')
+
+if __name__ == '__main__':
+    print(f'{charge_duration // 60} minute charge at {sample_rate} Hz, median frame time')
+    report('before', run('replot_old', True))
+    report('after', run('replot_new', False))
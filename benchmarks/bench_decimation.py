@@ -0,0 +1,42 @@
+'''
+Time to reduce a full 10M point scope record to the saved number of points.
+
+The record is kept as the raw bytes read from the scope, as Oscilloscope.get_data does, and the
+aliasing of each method is measured with a tone above the new Nyquist frequency. A constant record is
+also decimated, which every method must return unchanged up to the ends of the trace.
+
+Run with: python benchmarks/bench_decimation.py
+'''
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from decimation import decimate, decimationFactor, decimationMethods
+
+memory_depth = 10000000
+n_points = 100000
+sample_rate = 1e9 # Hz
+
+if __name__ == '__main__':
+    factor = decimationFactor(memory_depth, n_points)
+    print(f'{memory_depth} samples decimated by {factor} to {n_points} points')
+
+    # Noise plus a tone at 0.8 times the sample rate after decimation, which should be removed
+    t = np.arange(memory_depth) / sample_rate
+    tone = 0.8 * sample_rate / factor
+    raw = np.clip(128 + 20 * np.random.randn(memory_depth) + 60 * np.sin(2 * np.pi * tone * t), 0, 255).astype(np.uint8)
+
+    for method in decimationMethods:
+        start = time.perf_counter()
+        data = decimate(raw, factor, method)
+        duration = time.perf_counter() - start
+        print(f'{method:>8}: {duration * 1e3:8.1f} ms, {len(data)} points, amplitude left {np.std(data - 128) * np.sqrt(2):5.1f} (raw 60)')
+
+    # A flat trace offset from zero, as the raw bytes of a channel with no signal are
+    flat = np.full(memory_depth + factor // 2, 129, dtype=np.uint8)
+    for method in decimationMethods:
+        error = np.max(np.abs(decimate(flat, factor, method, chunkSize=n_points // 3) - 129))
+        assert error < 1e-9, f'{method} changes a constant trace by up to {error}'
+    print('constant traces are unchanged by every method')
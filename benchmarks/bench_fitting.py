@@ -0,0 +1,85 @@
+'''
+Speed and robustness of the exponential decay fits in fitting.py against scipy's curve_fit, as the
+analysis used it before, on synthetic decays with noise.
+
+The decays cover the range of dump currents and capacitor discharges: time constants from 2 to 200 ms,
+either sign, offsets and noise of up to 20% of the amplitude, and windows that start anywhere on the
+time axis. curve_fit starts from the old fixed guess of a 1 A peak and a 40 ms decay.
+
+Run with: python benchmarks/bench_fitting.py [number of decays]
+'''
+import os
+import sys
+import time
+import warnings
+import numpy as np
+from scipy import optimize
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fitting import *
+
+sampleRate = 100e3 # Hz
+window = 0.2 # s, dump window of the analysis
+tolerance = 0.05 # fraction of the true time constant within which a fit counts as correct
+
+def makeDecays(nDecays, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(0, window, 1 / sampleRate)
+    taus = np.exp(rng.uniform(np.log(2e-3), np.log(0.2), nDecays))
+    amplitudes = rng.choice([-1, 1], nDecays) * np.exp(rng.uniform(np.log(1), np.log(1e4), nDecays))
+    offsets = amplitudes * rng.uniform(-0.1, 0.1, nDecays)
+    noise = np.abs(amplitudes) * rng.uniform(0.001, 0.2, nDecays)
+    starts = rng.uniform(0, 10, nDecays)
+    decays = amplitudes[:, None] * np.exp(-t / taus[:, None]) + offsets[:, None] + noise[:, None] * rng.normal(size=(nDecays, len(t)))
+    return starts[:, None] + t, decays, taus
+
+def curveFit(t, y):
+    # As the analysis did, on the original time axis
+    try:
+        params, _ = optimize.curve_fit(expDecay, t, y, (np.sign(y[0]) * 1, 0.04, 0))
+        return params
+    except Exception:
+        return np.full(3, np.nan)
+
+def report(name, taus, fitTaus, duration):
+    correct = np.abs(fitTaus - taus) < tolerance * taus
+    print(f'{name:>32}: {duration * 1e3 / len(taus):7.2f} ms per decay, {np.mean(correct) * 100:5.1f}% within {tolerance * 100:.0f}% of tau')
+
+if __name__ == '__main__':
+    nDecays = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    times, decays, taus = makeDecays(nDecays)
+    print(f'{nDecays} decays of {decays.shape[1]} samples')
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        start = time.perf_counter()
+        params = np.array([curveFit(t, y) for t, y in zip(times, decays)])
+        report('curve_fit', taus, params[:, 1], time.perf_counter() - start)
+
+        start = time.perf_counter()
+        params = np.array([curveFit(t - t[0], y) for t, y in zip(times, decays)])
+        report('curve_fit, time from zero', taus, params[:, 1], time.perf_counter() - start)
+
+    start = time.perf_counter()
+    params = np.array([fitDecay(t, y)[0] for t, y in zip(times, decays)])
+    report('fitDecay, every sample', taus, params[:, 1], time.perf_counter() - start)
+
+    start = time.perf_counter()
+    params = np.array([fitDecay(t, y, maxPoints=5000)[0] for t, y in zip(times, decays)])
+    report('fitDecay, 5000 points', taus, params[:, 1], time.perf_counter() - start)
+
+    start = time.perf_counter()
+    params, success = fitDecay(times, decays, maxPoints=5000)
+    report('fitDecay, batch of 5000 points', taus, params[:, 1], time.perf_counter() - start)
+
+    # Traces of different lengths, as for the charge and discharge of the capacitor tests
+    lengths = np.random.default_rng(1).integers(1000, decays.shape[1], nDecays)
+    traces = [(t[:n], y[:n]) for t, y, n in zip(times, decays, lengths)]
+    start = time.perf_counter()
+    params, success = fitDecays(traces, maxPoints=5000)
+    duration = time.perf_counter() - start
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        reference = np.array([curveFit(t, y) for t, y in traces])
+    print(f'{"fitDecays, different lengths":>32}: {duration * 1e3 / nDecays:7.2f} ms per decay, '
+          f'{np.mean(success) * 100:.1f}% succeeded, curve_fit {np.mean(np.isfinite(reference[:, 1])) * 100:.1f}%')
@@ -0,0 +1,80 @@
+'''
+Per-tick cost of the 2 second moving average of the capacitor voltage, and of scaling the charge to
+physical units, during a long hold.
+
+The old CapTestingApp.updateChargeValues masked the nan's and ran uniform_filter1d over the whole
+capacitor voltage history on every refresh tick, only to display the last value. MovingAverage in
+buffers.py only adds the samples that arrived since the last tick. It also scaled the whole history of
+the three charge channels and made a new time axis every tick, where ScaledHistory only scales the
+new samples.
+
+Run with: python benchmarks/bench_moving_average.py
+'''
+import os
+import sys
+import time
+import numpy as np
+from scipy.ndimage import uniform_filter1d
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from buffers import MovingAverage, RingBuffer, ScaledHistory
+
+sample_rate = 100 # Hz, systemStatus_sample_rate
+samples_per_tick = 1 # refreshRate is the same as the sample rate
+hold_minutes = [1, 15, 30, 60]
+ticks = 200
+
+def old_tick(history, _):
+    nanIndices = np.isnan(history)
+    return uniform_filter1d(history[~nanIndices], size=sample_rate * 2)[-1]
+
+channels = ['Power Supply Voltage', 'Power Supply Current', 'Capacitor Voltage']
+
+def old_scale(voltages, _):
+    chargeVoltagePS = voltages['Power Supply Voltage'] * 10
+    chargeCurrentPS = (voltages['Power Supply Current'] + 10) * 0.01
+    capacitorVoltage = voltages['Capacitor Voltage'] * 1000
+    N = len(chargeVoltagePS)
+    chargeTime = np.linspace(0, N / sample_rate, N)
+
+def new_scale(voltages, history):
+    history.update(voltages, voltages.count)
+
+def run_scale(tick, n_samples):
+    voltages = RingBuffer(channels, 1024, growable=True)
+    voltages.append(np.random.randn(len(channels), n_samples))
+    history = ScaledHistory({'chargeTime': (None, 1 / sample_rate, 0),
+                             'chargeVoltagePS': ('Power Supply Voltage', 10, 0),
+                             'chargeCurrentPS': ('Power Supply Current', 0.01, 10),
+                             'capacitorVoltage': ('Capacitor Voltage', 1000, 0)})
+    history.update(voltages, voltages.count)
+
+    start = time.perf_counter()
+    for i in range(ticks):
+        voltages.append(np.random.randn(len(channels), samples_per_tick))
+        tick(voltages, history)
+    return (time.perf_counter() - start) / ticks
+
+def run(tick, n_samples):
+    history = np.random.randn(n_samples + ticks * samples_per_tick)
+    history[::10] = np.nan
+    average = MovingAverage(sample_rate * 2, record=True)
+    average.update(history[:n_samples])
+
+    start = time.perf_counter()
+    for i in range(ticks):
+        tick(history[:n_samples + (i + 1) * samples_per_tick], average)
+    return (time.perf_counter() - start) / ticks
+
+if __name__ == '__main__':
+    for minutes in hold_minutes:
+        n_samples = minutes * 60 * sample_rate
+        old = run(old_tick, n_samples)
+        new = run(lambda history, average: average.update(history), n_samples)
+        print(f'{minutes:3d} minute hold: uniform_filter1d {old * 1e6:8.1f} us per tick, MovingAverage {new * 1e6:6.1f} us per tick')
+
+    for minutes in hold_minutes:
+        n_samples = minutes * 60 * sample_rate
+        old = run_scale(old_scale, n_samples)
+        new = run_scale(new_scale, n_samples)
+        print(f'{minutes:3d} minute hold: scale the whole charge {old * 1e6:8.1f} us per tick, ScaledHistory {new * 1e6:6.1f} us per tick')
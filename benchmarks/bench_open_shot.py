@@ -0,0 +1,80 @@
+'''
+Time to open a saved shot and have the data for the first plot, reading everything with loadShot and
+readCSV against opening it with LazyShot and reading only the channels of the Voltage plot.
+
+The shot has every diagnostic channel of config.py, the charge history and an evenly sampled
+discharge time axis, saved both as a binary shot file and in the original CSV format.
+
+Run with: python benchmarks/bench_open_shot.py [discharge samples]
+'''
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import *
+from shot_file import *
+
+chargeVariables = ['chargeTime', 'chargeVoltagePS', 'chargeCurrentPS', 'capacitorVoltage']
+firstPlot = ['dischargeTime'] + list(voltageLines)
+
+def makeShot(nSamples, seed=0):
+    rng = np.random.default_rng(seed)
+    variables = {'runNumber': '00042', 'runDate': '20240101', 'polarity': POLARITY, 'primaryGas': 'Deuterium',
+                 'dischargeTime': np.arange(nSamples) / samp_freq * 1000, 'dischargeTimeUnit': 'ms'}
+    for variable in diagnostics_defaults:
+        variables[variable] = rng.normal(size=nSamples)
+    chargeTime = np.arange(0, 60, 1 / systemStatus_sample_rate)
+    for variable in chargeVariables:
+        variables[variable] = chargeTime if variable == 'chargeTime' else rng.normal(size=len(chargeTime))
+
+    return variables
+
+def saveCSV(filename, variables):
+    # Same layout as TestingApp.saveResults
+    saved = [variable for variable in single_columns if variable in variables]
+    results_df = pd.DataFrame([pd.Series(variables[variable], dtype='object') for variable in saved]).T
+    results_df.columns = [single_columns[variable]['name'] for variable in saved]
+    results_df.to_csv(filename, index=False)
+
+def timed(function, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def openLazy(filename):
+    shot = LazyShot(filename)
+    return shot.load(list(shot.scalars) + chargeVariables + firstPlot)
+
+if __name__ == '__main__':
+    nSamples = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+    variables = makeShot(nSamples)
+    with tempfile.TemporaryDirectory() as folder:
+        shotFilename = f'{folder}/CMFX_00042{shotFileExtension}'
+        csvFilename = f'{folder}/CMFX_00042.csv'
+        saveShot(shotFilename, variables)
+        saveCSV(csvFilename, variables)
+        print(f'{len(diagnostics_defaults)} channels x {nSamples} samples: '
+              f'{os.path.getsize(shotFilename) / 1e6:.0f} MB binary, {os.path.getsize(csvFilename) / 1e6:.0f} MB CSV')
+
+        # Both ways must give the same data
+        lazy = openLazy(shotFilename)
+        full = loadShot(shotFilename)
+        assert all(np.array_equal(lazy[variable], full[variable]) for variable in firstPlot + chargeVariables)
+
+        for name, filename, readAll in [('binary', shotFilename, loadShot), ('CSV', csvFilename, readCSV)]:
+            repeats = 3 if name == 'binary' else 1
+            allTime = timed(lambda: readAll(filename), repeats)
+            lazyTime = timed(lambda: openLazy(filename), repeats)
+            print(f'{name:>8}: read everything {allTime * 1e3:8.1f} ms, first plot with LazyShot {lazyTime * 1e3:8.1f} ms')
+
+        # Once converted, the CSV is opened through its binary file
+        convertCSV(csvFilename)
+        print(f'converted CSV: first plot with LazyShot {timed(lambda: openLazy(csvFilename)) * 1e3:.1f} ms')
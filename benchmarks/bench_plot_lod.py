@@ -0,0 +1,77 @@
+'''
+Redraw time of a shot with many long diagnostic traces, at full resolution and through the
+LevelOfDetail pyramids used by PlotViewer.
+
+The traces are split over a grid of subplots like the subplots view of the results tab. Each redraw
+replots every line, as switching the view does, and then zooms every axes into a 1% window, which
+re-queries the pyramids for the new x limits.
+
+Run with: python benchmarks/bench_plot_lod.py
+'''
+import os
+import sys
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from decimation import LevelOfDetail
+
+n_lines = 20
+n_samples = 1000000
+lines_per_axes = 2
+repeats = 3
+
+def redraw(fig, time_axis, traces, pyramids=None):
+    axes = fig.axes
+    for ax in axes:
+        for line in list(ax.lines):
+            line.remove()
+
+    start = time.perf_counter()
+    for i, trace in enumerate(traces):
+        ax = axes[i // lines_per_axes]
+        if pyramids is None:
+            ax.plot(time_axis, trace)
+        else:
+            ax.plot(*pyramids[i].query(time_axis[0], time_axis[-1], ax.bbox.width))
+    for ax in axes:
+        ax.relim()
+        ax.autoscale_view()
+    fig.canvas.draw()
+    replot = time.perf_counter() - start
+
+    start = time.perf_counter()
+    x0, x1 = 0.5, 0.51
+    for i, ax in enumerate(axes):
+        ax.set_xlim(x0, x1)
+        if pyramids is not None:
+            for line, pyramid in zip(ax.lines, pyramids[i * lines_per_axes:]):
+                line.set_data(*pyramid.query(x0, x1, ax.bbox.width))
+    fig.canvas.draw()
+    zoom = time.perf_counter() - start
+
+    for ax in axes:
+        ax.autoscale()
+    return replot, zoom
+
+if __name__ == '__main__':
+    time_axis = np.linspace(0, 1, n_samples)
+    traces = [np.cumsum(np.random.randn(n_samples)) for _ in range(n_lines)]
+    fig, _ = plt.subplots(nrows=n_lines // lines_per_axes // 2, ncols=2, figsize=(12, 6), constrained_layout=True)
+
+    start = time.perf_counter()
+    pyramids = [LevelOfDetail(time_axis, trace) for trace in traces]
+    print(f'{n_lines} lines of {n_samples} samples on {len(fig.axes)} axes, pyramids built in {time.perf_counter() - start:.2f} s')
+
+    # The figure itself (ticks, labels, layout) is drawn on every redraw whatever the lines are
+    fig.canvas.draw()
+    start = time.perf_counter()
+    fig.canvas.draw()
+    print(f'{"empty figure":>16}: draw   {(time.perf_counter() - start) * 1e3:7.1f} ms')
+
+    for name, lod in [('full resolution', None), ('level of detail', pyramids)]:
+        times = np.array([redraw(fig, time_axis, traces, lod) for _ in range(repeats)])
+        print(f'{name:>16}: replot {times[:, 0].mean() * 1e3:7.1f} ms, zoom {times[:, 1].mean() * 1e3:7.1f} ms')
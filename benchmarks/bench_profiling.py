@@ -0,0 +1,60 @@
+'''
+Cost of the span timers in profiling.py, and the spans of the system status reads of NI_DAQ while
+charging on the simulated DAQmx backend in sim_daqmx.py, written to a trace file and read back.
+
+Run with: python benchmarks/bench_profiling.py [trace file]
+'''
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+# Must be set before ni_daq is imported
+config.SIMULATED_DAQ = True
+import ni_daq
+from config import *
+from profiling import *
+
+charge_time = 2.0 # s
+nSpans = 100000
+
+def spanCost(profiler):
+    start = time.perf_counter()
+    for _ in range(nSpans):
+        with profiler.span('empty'):
+            pass
+    return (time.perf_counter() - start) / nSpans
+
+def readTrace(filename):
+    # The array is left open by the profiler, as the trace viewers allow
+    with open(filename) as file:
+        text = file.read().rstrip().rstrip(',')
+    return json.loads(text + ']')
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as folder:
+        filename = sys.argv[1] if len(sys.argv) > 1 else f'{folder}/trace.json'
+
+        print(f'span: {spanCost(Profiler()) * 1e6:.2f} us')
+        tracingProfiler = Profiler()
+        tracingProfiler.startTrace(f'{folder}/empty.json')
+        print(f'span while tracing: {spanCost(tracingProfiler) * 1e6:.2f} us')
+        tracingProfiler.stopTrace()
+
+        enableHV = enableHV_defaults if POWER_SUPPLY == 'EB-100' else {}
+        daq = ni_daq.NI_DAQ(systemStatus_sample_rate, systemStatus_defaults, charge_ao_defaults, di_defaults,
+                            diagnostics_defaults, counters_defaults, enableHV)
+        profiler.clear()
+        profiler.startTrace(filename)
+        daq.reset_systemStatus(record=True)
+        time.sleep(charge_time)
+        profiler.stopTrace()
+        daq.close()
+
+        print(profiler.report(budget=1 / refreshRate))
+        events = readTrace(filename)
+        reads = [event for event in events if event['name'] == 'NI_DAQ.read']
+        print(f'{len(events)} trace events, {len(reads)} NI_DAQ.read spans on threads {sorted({event["tid"] for event in reads})}')
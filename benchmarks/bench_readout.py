@@ -0,0 +1,71 @@
+'''
+Post-shot readout time of the DAQ, counters and scope, with the simulated DAQ (sim_daqmx.py) and scope (sim_scope.py).
+
+The old readout slept 5 s for the scope, then read the scope while the DAQ data and counters were read
+one after the other. The Readout in readout.py reads every source at the same time and only waits for
+the scope until :TRIG:STAT? says its acquisition is complete.
+
+Run with: python benchmarks/bench_readout.py
+'''
+import os
+import sys
+import time
+from threading import Thread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+config.SIMULATED_DAQ = True
+import ni_daq
+import sim_daqmx
+from config import *
+from readout import Readout
+from scope import Oscilloscope
+from sim_scope import SimulatedScope
+
+scopeProcessingTime = 0.5 # s the simulated scope takes to store its acquisition after the trigger
+
+def readCounters(daq):
+    return {name: task.channels.ci_count for name, task in daq.ci_tasks.items()}
+
+def oldReadout(daq, scope):
+    start = time.perf_counter()
+    time.sleep(5)
+    scopeThread = Thread(target=scope.read_scope)
+    scopeThread.start()
+    daq.get_discharge()
+    readCounters(daq)
+    discharge = time.perf_counter() - start
+    scopeThread.join()
+    return discharge, time.perf_counter() - start
+
+def newReadout(daq, scope):
+    readout = Readout('Post-shot readout')
+    readout.add('DAQ', daq.get_discharge, readoutDeadlines['DAQ'])
+    readout.add('counters', lambda: readCounters(daq), readoutDeadlines['counters'])
+    readout.add('scope', scope.read_scope, readoutDeadlines['scope'])
+    readout.start()
+    readout.wait(['DAQ', 'counters'])
+    discharge = time.perf_counter() - readout.startTime
+    readout.wait()
+    total = time.perf_counter() - readout.startTime
+    print(readout.report())
+    return discharge, total
+
+if __name__ == '__main__':
+    simulatedScope = SimulatedScope(port=0, memoryDepth='10M', latency=2e-3, bandwidth=50e6, triggerDelay=scopeProcessingTime).run()
+    scope = Oscilloscope({'CH1': 1}, resourceName=simulatedScope.resourceName)
+    daq = ni_daq.NI_DAQ(systemStatus_sample_rate, systemStatus_defaults, charge_ao_defaults, di_defaults,
+                        diagnostics_defaults, counters_defaults)
+
+    results = {}
+    for name, readout in {'old, sleep then read': oldReadout, 'Readout': newReadout}.items():
+        daq.reset_discharge_trigger()
+        scope.reset()
+        sim_daqmx.trigger()
+        daq.read_discharge()
+        results[name] = readout(daq, scope)
+
+    daq.close()
+    simulatedScope.close()
+    for name, (discharge, total) in results.items():
+        print(f'{name:>22}: discharge saved after {discharge:.2f} s, scope read after {total:.2f} s')
@@ -0,0 +1,53 @@
+'''
+Throughput of the batch re-analysis in reanalyze.py over a folder of simulated shots.
+
+The shots are made from the discharge waveforms of the simulated DAQ (sim_daqmx.py) at a range of
+charge voltages and dump delays. The folder is analysed once with one process and once with the full
+pool, then a third time to show that unchanged shots are skipped.
+
+Run with: python benchmarks/bench_reanalyze.py [number of shots]
+'''
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import *
+from reanalyze import reanalyze
+from results_master import ResultsMaster
+from shot_file import saveShot
+from sim_daqmx import SimulatedDevice
+
+sampleRate = 50e3 # Hz, discharge data after decimation
+
+def makeShots(saveFolder, nShots, seed=0):
+    rng = np.random.default_rng(seed)
+    device = SimulatedDevice()
+    for runNumber in range(nShots):
+        runDate = f'202401{runNumber // 50 + 1:02d}'
+        os.makedirs(f'{saveFolder}/{runDate}', exist_ok=True)
+        device.shotVoltage = rng.uniform(5e3, 20e3)
+        dumpDelay = rng.uniform(20, 80) # ms
+        time = np.arange(-0.01, dumpDelay / 1000 + 0.25, 1 / sampleRate)
+        dischargeVoltage, dischargeCurrent = device.discharge_samples(['dischargeVoltage', 'dischargeCurrent'], time, dumpDelay / 1000)
+        variables = {'runNumber': f'{runNumber:05d}', 'runDate': runDate, 'polarity': POLARITY, 'dumpDelay': dumpDelay,
+                     'primaryGasStart': 0, 'dischargeTime': time * 1000, 'dischargeTimeUnit': 'ms',
+                     'dischargeVoltage': dischargeVoltage * voltageDivider, 'dischargeCurrent': dischargeCurrent / pearsonCoilDischarge}
+        saveShot(f'{saveFolder}/{runDate}/CMFX_{runNumber:05d}.npz', variables)
+
+if __name__ == '__main__':
+    nShots = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with tempfile.TemporaryDirectory() as saveFolder:
+        makeShots(saveFolder, nShots)
+
+        for name, workers, force in [('1 process', 1, True), (f'{os.cpu_count()} processes', None, True), ('unchanged', None, False)]:
+            print(f'--- {name}')
+            reanalyze(saveFolder, workers=workers, force=force)
+
+        resultsMaster = ResultsMaster(saveFolder)
+        variables, rows = resultsMaster.readAnalysis()
+        resultsMaster.close()
+        decayTimes = np.array([row[variables.index('decayTime')] for row in rows], dtype=float)
+        print(f'{len(rows)} shots in the analysis table, decay time {np.nanmean(decayTimes) * 1e3:.1f} +/- {np.nanstd(decayTimes) * 1e3:.1f} ms')
@@ -0,0 +1,108 @@
+'''
+Refreshes per second, CPU time and latency from new status data to the refresh, for the old fixed
+refreshRate after() loop against the RefreshScheduler in scheduler.py, while idle and while charging.
+
+The status data comes from the system status task of NI_DAQ on the simulated DAQmx backend in
+sim_daqmx.py. The refresh scales the latest status values as updateHVStatus does and then spends
+refreshCost of CPU time, for the indicators and plot that it would draw. There is no display, so
+after() is run by a small event loop in place of Tk's.
+
+Run with: python benchmarks/bench_refresh.py [seconds per mode]
+'''
+import heapq
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+# Must be set before ni_daq is imported
+config.SIMULATED_DAQ = True
+import ni_daq
+from config import *
+from profiling import profiler
+from scheduler import RefreshScheduler
+
+refreshCost = 2e-3 # s of CPU time to draw the status
+
+class EventLoop():
+    # The after() calls of Tk, run on this thread until the end time
+    def __init__(self):
+        self.calls = []
+        self.ids = itertools.count()
+        self.cancelled = set()
+
+    def after(self, ms, function):
+        id = next(self.ids)
+        heapq.heappush(self.calls, (time.perf_counter() + ms / 1000, id, function))
+        return id
+
+    def after_idle(self, function):
+        return self.after(0, function)
+
+    def after_cancel(self, id):
+        self.cancelled.add(id)
+
+    def run(self, duration):
+        end = time.perf_counter() + duration
+        while self.calls and self.calls[0][0] < end:
+            due, id, function = heapq.heappop(self.calls)
+            time.sleep(max(due - time.perf_counter(), 0))
+            if id not in self.cancelled:
+                function()
+        self.calls = []
+
+class StatusDisplay():
+    def __init__(self, daq):
+        self.daq = daq
+        self.refreshes = 0
+        self.cpu = 0.0
+
+    def refresh(self):
+        start = time.process_time()
+        voltages = self.daq.systemStatusData
+        voltage = voltages['Power Supply Voltage'][-1:] * maxVoltagePowerSupply[POWER_SUPPLY] / maxAnalogInput
+        while time.process_time() - start < refreshCost:
+            pass
+        self.refreshes += 1
+        self.cpu += time.process_time() - start
+
+def fixedLoop(loop, display):
+    # The old loop, which refreshed and rescheduled itself every 1 / refreshRate
+    def update():
+        display.refresh()
+        loop.after(int(1000 / refreshRate), update)
+    update()
+
+def measure(name, daq, duration, useScheduler, active):
+    loop = EventLoop()
+    display = StatusDisplay(daq)
+    if useScheduler:
+        scheduler = RefreshScheduler(loop)
+        daq.systemStatus_listeners = [scheduler.dataArrived]
+        scheduler.start(display.refresh, active=lambda: active)
+    else:
+        daq.systemStatus_listeners = []
+        fixedLoop(loop, display)
+
+    profiler.clear()
+    start = time.perf_counter()
+    loop.run(duration)
+    elapsed = time.perf_counter() - start
+    latency = f', latency median {profiler.stats("refreshLatency")["median"] * 1e3:.1f} ms, max {profiler.stats("refreshLatency")["max"] * 1e3:.1f} ms' \
+              if 'refreshLatency' in profiler.rings else ''
+    print(f'{name:>24}: {display.refreshes / elapsed:6.1f} refreshes/s, {display.cpu / elapsed * 100:5.1f}% CPU{latency}')
+
+if __name__ == '__main__':
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    enableHV = enableHV_defaults if POWER_SUPPLY == 'EB-100' else {}
+    daq = ni_daq.NI_DAQ(systemStatus_sample_rate, systemStatus_defaults, charge_ao_defaults, di_defaults,
+                        diagnostics_defaults, counters_defaults, enableHV)
+    print(f'status data every {daq._points_to_plot / systemStatus_sample_rate * 1e3:.0f} ms, {refreshCost * 1e3:.0f} ms per refresh')
+
+    for active in [False, True]:
+        mode = 'charging' if active else 'idle'
+        measure(f'fixed {refreshRate:.0f} Hz, {mode}', daq, duration, False, active)
+        measure(f'scheduler, {mode}', daq, duration, True, active)
+    daq.close()
@@ -0,0 +1,39 @@
+'''
+Download speed of Oscilloscope.get_data from the simulated MSO5000 in sim_scope.py, for a range of
+packet lengths and memory depths.
+
+The link to the scope is mimicked with a fixed latency per response and a bandwidth limit, so the
+cost of the round trip for each packet shows up the same way it does over the lab network.
+
+Run with: python benchmarks/bench_scope.py [latency (ms)] [bandwidth (MB/s)]
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scope import Oscilloscope
+from sim_scope import SimulatedScope
+
+packetLengths = [100000, 250000, 1000000, 5000000]
+memoryDepths = ['1M', '10M', '25M']
+
+if __name__ == '__main__':
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 2e-3
+    bandwidth = float(sys.argv[2]) * 1e6 if len(sys.argv) > 2 else 50e6
+
+    simulatedScope = SimulatedScope(port=0, latency=latency, bandwidth=bandwidth).run()
+    print(f'{latency * 1e3:.1f} ms latency, {bandwidth / 1e6:.0f} MB/s link')
+    print(f'{"packet":>10}' + ''.join(f'{depth:>10}' for depth in memoryDepths) + '   (MB/s)')
+
+    for packetLength in packetLengths:
+        scope = Oscilloscope({'CH1': 1}, packetLength=packetLength, resourceName=simulatedScope.resourceName)
+        throughputs = []
+        for memoryDepth in memoryDepths:
+            scope.inst.write(f':ACQ:MDEP {memoryDepth}')
+            scope.get_data('CH1')
+            throughputs.append(scope.throughput['CH1'])
+        scope.inst.close()
+        print(f'{packetLength:>10}' + ''.join(f'{throughput:>10.1f}' for throughput in throughputs))
+
+    simulatedScope.close()
@@ -0,0 +1,325 @@
+'''
+Time of every stage of a shot of CMFX_App, run headlessly on the simulated DAQmx backend in sim_daqmx.py:
+    charge        one system status callback while charging
+    arm           reset_discharge_trigger, as NI_DAQ.arm_latency
+    saveDischarge reading out and decimating the discharge and setting the plot data
+    saveResults   appending to the results master and writing the shot file
+    analysis      performAnalysis, until its future has the results
+    replot        PlotViewer.replot of the results plots
+
+The app's own methods run on a stand-in for the app window, which holds the state they use, so there is no
+main window and no operator input. The replot needs a display and is skipped without one, and the stages
+after the arm are skipped if the app can't be imported. The shots have any number of diagnostic channels
+and any discharge duration; channels past those in config.py get made up names and are saved as well.
+
+Prints the median and slowest time of every stage and the peak memory of the process:
+    python benchmarks/bench_shot_cycle.py [--channels N] [--duration s] [--shots N] [--charge s]
+
+With pytest-benchmark, each stage is a benchmark that can be compared against a saved run:
+    python -m pytest benchmarks/bench_shot_cycle.py --benchmark-only --benchmark-autosave
+    python -m pytest benchmarks/bench_shot_cycle.py --benchmark-only --benchmark-compare
+
+Run with: python benchmarks/bench_shot_cycle.py
+'''
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+# Must be set before ni_daq or the app is imported
+config.SIMULATED_DAQ = True
+config.USING_SCOPE = False
+import ni_daq
+import sim_daqmx
+from config import *
+
+try:
+    from CMFX_App import CMFX_App
+    from TestingApp import TestingApp
+    appImportError = None
+except ImportError as e:
+    appImportError = e
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+stages = ['charge', 'arm', 'saveDischarge', 'saveResults', 'analysis', 'replot']
+chargeVoltage = 10e3 # V
+analysisChannels = ['dischargeVoltage', 'dischargeCurrent', 'dumpCurrent', 'chamberProtectionCurrent', 'feedthroughVoltage',
+                    'feedthroughCurrent'] + (['PSVoltage', 'PSCurrent'] if POWER_SUPPLY == 'EB-100' else [])
+
+def peakRSS():
+    # Peak resident memory of this process in bytes, or None where it can't be found
+    try:
+        import resource
+        # ru_maxrss is in kB on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return None
+
+def diagnosticChannels(nChannels=None):
+    '''
+    {variable: physical channel} of nChannels diagnostics, those the analysis needs first. Channels past those
+    in config.py are added to single_columns so that they are saved with the shot.
+    '''
+    if nChannels is None:
+        return dict(diagnostics_defaults)
+
+    channels = {variable: diagnostics_defaults[variable] for variable in analysisChannels}
+    for variable, channel in diagnostics_defaults.items():
+        if len(channels) < nChannels:
+            channels[variable] = channel
+    for i in range(nChannels - len(channels)):
+        variable = f'SYN{i:02d}'
+        channels[variable] = f'{diagnostics2_name}/ai{8 + i}'
+        single_columns[variable] = {'name': f'Synthetic {i} (V)', 'type': 'array'}
+
+    return channels
+
+class NotesEntry:
+    # The notes boxes of the app, which are empty for these shots
+    class text:
+        def get(start, end):
+            return ''
+
+if appImportError is None:
+    class HeadlessApp:
+        '''
+        Holds the state that the app's shot methods use, so they can run without the app window.
+        '''
+        saveDischarge = CMFX_App.saveDischarge
+        readCounters = CMFX_App.readCounters
+        setData = CMFX_App.setData
+        performAnalysis = CMFX_App.performAnalysis
+        computeAnalysis = CMFX_App.computeAnalysis
+        saveResults = TestingApp.saveResults
+        openResultsMaster = TestingApp.openResultsMaster
+        setRunNumber = TestingApp.setRunNumber
+        shotHas = TestingApp.shotHas
+
+        def __init__(self, daq, saveFolder, dumpDelay):
+            self.NI_DAQ = daq
+            self.diagnostics_Pins = daq.diagnostics
+            self.counters_Pins = counters_defaults
+            self.preShotNotesEntry = self.postShotNotesEntry = NotesEntry
+            self.resultsPlotData = {'Voltage': {'twinx': False, 'ylabel': 'Voltage (V)', 'lines': voltageLines},
+                                    'Current': {'twinx': False, 'ylabel': 'Current (A)', 'lines': currentLines},
+                                    'B-Radial': {'twinx': False, 'ylabel': 'B$_R$ (V)', 'lines': BRLines},
+                                    'Accelerometer': {'twinx': False, 'ylabel': 'Accelerometer (V)', 'lines': ACCLines},
+                                    'Diode': {'twinx': False, 'ylabel': 'Diode (V)', 'lines': DIODELines}}
+            self.analysisExecutor = ThreadPoolExecutor(max_workers=1)
+            self.lazyShot = None
+            self.saveFolder = saveFolder
+            self.runDate = time.strftime('%Y%m%d')
+            self.runTime = time.strftime('%H:%M:%S')
+            self.polarity = POLARITY
+            self.primaryGas = self.secondaryGas = gasOptions[0]
+            self.dumpDelay = dumpDelay
+            self.ignitronDelay = self.hvStart = 0
+            self.primaryGasStart = userInputs['primaryGasStart']['default']
+            self.dischargeTimeUnit = daq.tUnit
+            self.setRunNumber()
+
+class ShotCycle:
+    '''
+    Simulated DAQ and headless app that every stage of a shot can be run on, in the order of stages.
+    '''
+    def __init__(self, nChannels=None, duration=None, saveFolder=None):
+        enableHV = enableHV_defaults if POWER_SUPPLY == 'EB-100' else {}
+        self.daq = ni_daq.NI_DAQ(systemStatus_sample_rate, systemStatus_defaults, charge_ao_defaults, di_defaults,
+                                 diagnosticChannels(nChannels), counters_defaults, enableHV)
+        # The acquisition lasts duration (s), of which post_dump_duration is after the dump
+        dumpDelay = userInputs['dumpDelay']['default'] / 1000 if duration is None else max(duration - post_dump_duration, 0)
+        self.daq.set_timing(dumpDelay, userInputs['spectrometerDelay']['default'] / 1000, 0)
+
+        self.callbackDurations = []
+        read_callback = self.daq.read_callback
+        def timed_callback(*args):
+            start = time.perf_counter()
+            read_callback(*args)
+            self.callbackDurations.append(time.perf_counter() - start)
+            return 0
+        self.daq.task_systemStatus.register_every_n_samples_acquired_into_buffer_event(self.daq._points_to_plot, timed_callback)
+
+        self.tempFolder = None
+        if saveFolder is None:
+            self.tempFolder = tempfile.TemporaryDirectory()
+            saveFolder = self.tempFolder.name
+        self.app = HeadlessApp(self.daq, saveFolder, dumpDelay * 1000) if appImportError is None else None
+        self.plotViewer = self.makePlotViewer() if self.app is not None else None
+
+    def makePlotViewer(self):
+        # PlotViewer finds the shot on the grandparent of its frame, which here is a withdrawn window
+        try:
+            import ttkbootstrap as ttk
+            from plots import PlotViewer
+            self.window = ttk.Window(themename=themename)
+        except Exception as e:
+            print(f'Replot skipped: {e}')
+            return None
+
+        self.window.withdraw()
+        notebook = ttk.Notebook(self.window)
+        frame = ttk.Frame(notebook)
+        notebook.add(frame, text='Results')
+        return PlotViewer(frame, self.app.resultsPlotData)
+
+    def charge(self, seconds):
+        # System status callbacks while the power supply charges, returns their durations
+        self.callbackDurations.clear()
+        self.daq.reset_systemStatus(record=True)
+        self.daq.write_value(chargeVoltage / maxVoltagePowerSupply[POWER_SUPPLY] * maxAnalogInput, maxAnalogInput)
+        time.sleep(seconds)
+        self.daq.write_value(0, 0)
+        self.daq.reset_systemStatus()
+        return list(self.callbackDurations)
+
+    def arm(self):
+        self.daq.reset_discharge_trigger()
+        return self.daq.arm_latency
+
+    def fire(self):
+        # Trigger and wait for the end of the acquisition, which isn't timed since its length is set by the shot
+        sim_daqmx.trigger()
+        self.daq.read_discharge()
+
+    def saveDischarge(self):
+        self.app.saveDischarge()
+
+    def saveResults(self):
+        self.app.setRunNumber()
+        self.app.saveResults()
+
+    def analysis(self):
+        return self.app.performAnalysis().result()
+
+    def replot(self):
+        self.window.dischargeTime = self.app.dischargeTime
+        self.window.dischargeTimeUnit = self.app.dischargeTimeUnit
+        self.window.runNumber = self.app.runNumber
+        self.plotViewer.replot()
+        self.window.update_idletasks()
+
+    def shot(self):
+        '''
+        Arm, fire and save a shot, returning {stage: duration} of every stage after the arm that could be run.
+        '''
+        durations = {'arm': self.arm()}
+        self.fire()
+        if self.app is None:
+            self.daq.get_discharge()
+            return durations
+
+        for stage in ['saveDischarge', 'saveResults', 'analysis', 'replot']:
+            if stage == 'replot' and self.plotViewer is None:
+                continue
+            start = time.perf_counter()
+            getattr(self, stage)()
+            durations[stage] = time.perf_counter() - start
+
+        return durations
+
+    def close(self):
+        if self.app is not None:
+            self.app.analysisExecutor.shutdown()
+            if hasattr(self.app, 'resultsMaster'):
+                self.app.resultsMaster.close()
+        if self.plotViewer is not None:
+            self.window.destroy()
+        self.daq.close()
+        if self.tempFolder is not None:
+            self.tempFolder.cleanup()
+
+def report(durations, nChannels, nSamples):
+    print(f'{nChannels} channels x {nSamples} samples')
+    print(f'{"stage":>14} {"median (ms)":>12} {"max (ms)":>10} {"n":>5}')
+    for stage in stages:
+        if durations.get(stage):
+            values = np.array(durations[stage]) * 1e3
+            print(f'{stage:>14} {np.median(values):12.2f} {np.max(values):10.2f} {len(values):5d}')
+        else:
+            print(f'{stage:>14} {"skipped":>12}')
+
+    rss = peakRSS()
+    print(f'peak RSS: {rss / 1e6:.0f} MB' if rss is not None else 'peak RSS: unavailable')
+    if appImportError is not None:
+        print(f'The app could not be imported, so only the DAQ stages ran: {appImportError}')
+
+if pytest is not None:
+    @pytest.fixture(scope='module')
+    def cycle():
+        cycle = ShotCycle()
+        with contextlib.redirect_stdout(io.StringIO()):
+            cycle.shot()
+        yield cycle
+        cycle.close()
+
+    def requireApp():
+        if appImportError is not None:
+            pytest.skip(f'the app could not be imported: {appImportError}')
+
+    def quiet(function):
+        def run(*args):
+            with contextlib.redirect_stdout(io.StringIO()):
+                return function(*args)
+        return run
+
+    def test_charge(benchmark, cycle):
+        benchmark.pedantic(quiet(cycle.charge), args=(0.5,), rounds=3)
+
+    def test_arm(benchmark, cycle):
+        # Every round is fired so the next arm starts from a finished shot
+        benchmark.pedantic(quiet(cycle.arm), teardown=quiet(cycle.fire), rounds=5)
+
+    def test_saveDischarge(benchmark, cycle):
+        requireApp()
+        benchmark.pedantic(quiet(cycle.saveDischarge), setup=quiet(lambda: (cycle.arm(), cycle.fire())), rounds=5)
+
+    def test_saveResults(benchmark, cycle):
+        requireApp()
+        benchmark.pedantic(quiet(cycle.saveResults), rounds=5)
+
+    def test_analysis(benchmark, cycle):
+        requireApp()
+        benchmark.pedantic(quiet(cycle.analysis), rounds=5)
+
+    def test_replot(benchmark, cycle):
+        requireApp()
+        if cycle.plotViewer is None:
+            pytest.skip('no display for the plots')
+        benchmark.pedantic(quiet(cycle.replot), rounds=5)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time every stage of a simulated shot of the app.')
+    parser.add_argument('--channels', type=int, default=None, help='number of diagnostic channels, those of config.py by default')
+    parser.add_argument('--duration', type=float, default=None, help='length of the discharge acquisition (s)')
+    parser.add_argument('--shots', type=int, default=5, help='number of shots')
+    parser.add_argument('--charge', type=float, default=2, help='time spent charging before the shots (s)')
+    parser.add_argument('--verbose', action='store_true', help='show what the app prints')
+    args = parser.parse_args()
+
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        cycle = ShotCycle(args.channels, args.duration)
+        durations = {stage: [] for stage in stages}
+        durations['charge'] = cycle.charge(args.charge)
+        for _ in range(args.shots):
+            for stage, duration in cycle.shot().items():
+                durations[stage].append(duration)
+    report(durations, len(cycle.daq.diagnostics), cycle.daq.discharge_samples)
+    cycle.close()
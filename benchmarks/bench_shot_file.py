@@ -0,0 +1,77 @@
+'''
+Save and load time of one shot in the original CSV format and in the binary shot format.
+
+The shot has 12 diagnostic channels of a 0.2 s discharge at 100 kHz plus a 30 s charge history
+and the usual scalars, which is what TestingApp.saveResults writes after a shot.
+
+Run with: python benchmarks/bench_shot_file.py
+'''
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shot_file import *
+
+n_channels = 12
+discharge_duration = 0.2 # s
+charge_duration = 30 # s
+repeats = 5
+
+def make_shot():
+    n_discharge = int(samp_freq * (discharge_duration + pretrigger_duration)) + 1
+    n_charge = int(charge_duration * systemStatus_sample_rate)
+    variables = {'runNumber': '01234', 'runDate': '2024-01-01', 'runTime': '12:00:00', 'polarity': POLARITY,
+                 'primaryGas': 'Deuterium', 'secondaryGas': 'None', 'capacitance': capacitance,
+                 'ballastResistance': ballastResistance, 'dumpResistance': dumpResistance,
+                 'chamberProtectionResistance': chamberProtectionResistance,
+                 'pumpBasePressure': 2e-7, 'chamberBasePressure': 8e-7,
+                 'preShotNotes': 'Benchmark shot', 'postShotNotes': ''}
+    variables.update({variable: description['default'] for variable, description in userInputs.items()})
+    for variable in ['HE3DET01', 'HE3DET02', 'EXCDET01', 'EXCDET02', 'EXCDET03', 'EXCDET04']:
+        variables[variable] = 0
+
+    variables['chargeTime'] = np.linspace(0, (n_charge - 1) / systemStatus_sample_rate, n_charge)
+    variables['chargeVoltagePS'] = np.random.rand(n_charge)
+    variables['chargeCurrentPS'] = np.random.rand(n_charge)
+    variables['dischargeTime'] = np.linspace(-pretrigger_duration, discharge_duration, n_discharge) * 1e3
+    variables['dischargeTimeUnit'] = 'ms'
+    for variable in list(diagnostics_defaults)[:n_channels]:
+        variables[variable] = np.random.randn(n_discharge)
+
+    return variables
+
+def save_csv(filename, variables):
+    # Same code as the original TestingApp.saveResults
+    results = [value for variable, value in variables.items() if variable in single_columns]
+    results_df = pd.DataFrame([pd.Series(val, dtype='object') for val in results]).T
+    results_df.columns = [single_columns[variable]['name'] for variable in variables if variable in single_columns]
+    results_df.to_csv(filename, index=False)
+
+def timeit(function, *args):
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*args)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+if __name__ == '__main__':
+    variables = make_shot()
+    with tempfile.TemporaryDirectory() as folder:
+        csvFilename = os.path.join(folder, 'CMFX_01234.csv')
+        shotFilename = os.path.join(folder, f'CMFX_01234{shotFileExtension}')
+
+        csvSave = timeit(save_csv, csvFilename, variables)
+        csvLoad = timeit(readCSV, csvFilename)
+        shotSave = timeit(saveShot, shotFilename, variables)
+        shotLoad = timeit(loadShot, shotFilename)
+
+        print(f'{n_channels} channels, {len(variables["dischargeTime"])} samples per channel')
+        print(f'{"":>8} {"save (ms)":>10} {"load (ms)":>10} {"size (MB)":>10}')
+        print(f'{"csv":>8} {csvSave * 1e3:10.1f} {csvLoad * 1e3:10.1f} {os.path.getsize(csvFilename) / 1e6:10.2f}')
+        print(f'{"npz":>8} {shotSave * 1e3:10.1f} {shotLoad * 1e3:10.1f} {os.path.getsize(shotFilename) / 1e6:10.2f}')
+        print(f'speedup: save {csvSave / shotSave:.0f}x, load {csvLoad / shotLoad:.0f}x')
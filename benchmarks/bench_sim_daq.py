@@ -0,0 +1,86 @@
+'''
+Charge -> trigger -> save -> analyze cycle of NI_DAQ running on the simulated DAQmx backend in sim_daqmx.py.
+
+Runs the default channels of config.py at the real sample rates, so the time spent in the system status
+callbacks, the wait for the discharge after the acquisition ends, decimation, saving and the analysis
+can be profiled without the PXI chassis. Both ways of reading the discharge are timed.
+
+Run with: python benchmarks/bench_sim_daq.py
+'''
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+# Must be set before ni_daq is imported
+config.SIMULATED_DAQ = True
+import ni_daq
+import sim_daqmx
+from analysis import Analysis
+from config import *
+from shot_file import saveShot
+
+charge_time = 3.0 # s
+charge_voltage = 10e3 # V
+
+def shot(stream):
+    ni_daq.STREAM_DISCHARGE = stream
+    enableHV = enableHV_defaults if POWER_SUPPLY == 'EB-100' else {}
+    daq = ni_daq.NI_DAQ(systemStatus_sample_rate, systemStatus_defaults, charge_ao_defaults, di_defaults,
+                        diagnostics_defaults, counters_defaults, enableHV)
+
+    # Time every system status callback
+    callbackDurations = []
+    read_callback = daq.read_callback
+    def timed_callback(*args):
+        start = time.perf_counter()
+        read_callback(*args)
+        callbackDurations.append(time.perf_counter() - start)
+        return 0
+    daq.task_systemStatus.register_every_n_samples_acquired_into_buffer_event(daq._points_to_plot, timed_callback)
+
+    # Charge
+    daq.reset_systemStatus(record=True)
+    voltageSet = charge_voltage / maxVoltagePowerSupply[POWER_SUPPLY] * maxAnalogInput
+    daq.write_value(voltageSet, maxAnalogInput)
+    time.sleep(charge_time)
+    voltages = daq.systemStatusData['Power Supply Voltage']
+    print(f'charged to {voltages[-1] / maxAnalogInput * maxVoltagePowerSupply[POWER_SUPPLY] / 1000:.2f} kV, '
+          f'{len(voltages)} status samples')
+    daq.write_value(0, 0)
+
+    # Discharge
+    sim_daqmx.trigger()
+    triggerTime = time.perf_counter()
+    daq.read_discharge()
+    readTime = time.perf_counter()
+    wait = readTime - triggerTime - daq.duration
+
+    dischargeData, dischargeTime = daq.get_discharge()
+    decimateTime = time.perf_counter()
+
+    variables = {name: dischargeData[i] for i, name in enumerate(daq.diagnostics)}
+    variables['dischargeTime'] = dischargeTime
+    with tempfile.TemporaryDirectory() as folder:
+        saveShot(f'{folder}/shot.npz', variables)
+    saveTime = time.perf_counter()
+
+    analysis = Analysis(dischargeTime, daq.tUnit, variables['dischargeVoltage'] * voltageDivider, variables['dischargeCurrent'] / pearsonCoilDischarge,
+                        userInputs['dumpDelay']['default'], 0, userInputs['primaryGasStart']['default'], 0, POLARITY)
+    analysisTime = time.perf_counter()
+    daq.close()
+
+    print(f'{"streamed" if stream else "single read"}: {dischargeData.shape[0]} channels x {dischargeData.shape[1]} samples')
+    print(f'    status callback: median {np.median(callbackDurations) * 1e3:.2f} ms, max {np.max(callbackDurations) * 1e3:.2f} ms')
+    print(f'    discharge ready {wait * 1e3:.1f} ms after the end of the acquisition')
+    print(f'    get_discharge {(decimateTime - readTime) * 1e3:.1f} ms, save {(saveTime - decimateTime) * 1e3:.1f} ms, '
+          f'analysis {(analysisTime - saveTime) * 1e3:.1f} ms')
+    if hasattr(analysis, 'decayTime'):
+        print(f'    decay time {analysis.decayTime * 1e3:.1f} ms')
+
+if __name__ == '__main__':
+    for stream in [False, True]:
+        shot(stream)
@@ -0,0 +1,77 @@
+'''
+Widget updates per refresh of the power supply status, setting every indicator and text each refresh as
+updatePowerSupplyStatus did against only those that changed with the StatusModel in status.py.
+
+The digital inputs are read from NI_DAQ on the simulated DAQmx backend in sim_daqmx.py, while idle and
+with a line toggled every few refreshes. Tk isn't needed, so the widgets count the calls that would make
+Tk redraw them.
+
+Run with: python benchmarks/bench_status.py [refreshes]
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+# Must be set before ni_daq is imported
+config.SIMULATED_DAQ = True
+import ni_daq
+import sim_daqmx
+from config import *
+from status import StatusModel
+
+toggleInterval = 20 # refreshes between changes of a line when the status is changing
+
+class Widget():
+    # Stands in for an Indicator or a StringVar, counting the calls that redraw it
+    calls = 0
+
+    def set(self, value):
+        Widget.calls += 1
+
+def texts(refresh):
+    # Text shown while idle, the voltage only changes in the last digit now and then
+    return {'voltagePSText': f'Power Supply V: {0.01 * (refresh // 50):.2f} kV', 'currentPSText': 'Power Supply I: 0.00 mA',
+            'chargeStateText': 'Not Charged', 'chamberPressureText': 'Chamber Press.: 8.0e-04 Torr'}
+
+def oldRefresh(daq, indicators, textVariables, refresh):
+    for name, state in zip(daq.task_di.di_channels.channel_names, daq.task_di.read()):
+        indicators[name].set(not state if name in powerSupplyIndicatorLabels[POWER_SUPPLY] else state)
+    for name, text in texts(refresh).items():
+        textVariables[name].set(text)
+
+def modelRefresh(daq, indicators, textVariables, refresh, model):
+    for name, state in model.update(daq.task_di.read()):
+        indicators[name].set(state)
+    for name, text in texts(refresh).items():
+        model.setText(textVariables[name], text)
+
+def run(name, daq, nRefreshes, toggle, refresh):
+    lines = list(di_defaults)
+    Widget.calls = 0
+    start = time.perf_counter()
+    for i in range(nRefreshes):
+        if toggle and i % toggleInterval == 0:
+            # A door opening and closing
+            sim_daqmx.device.lines[di_defaults['Door Closed 1']] = i // toggleInterval % 2 == 0
+        refresh(i)
+    duration = time.perf_counter() - start
+    print(f'{name:>32}: {Widget.calls / nRefreshes:6.2f} widget updates, {duration / nRefreshes * 1e6:6.1f} us per refresh')
+
+if __name__ == '__main__':
+    nRefreshes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    enableHV = enableHV_defaults if POWER_SUPPLY == 'EB-100' else {}
+    daq = ni_daq.NI_DAQ(systemStatus_sample_rate, systemStatus_defaults, charge_ao_defaults, di_defaults,
+                        diagnostics_defaults, counters_defaults, enableHV)
+    indicators = {name: Widget() for name in di_defaults}
+    textVariables = {name: Widget() for name in texts(0)}
+    print(f'{len(indicators)} indicators and {len(textVariables)} texts')
+
+    for toggle in [False, True]:
+        state = 'changing' if toggle else 'idle'
+        run(f'every widget, {state}', daq, nRefreshes, toggle, lambda i: oldRefresh(daq, indicators, textVariables, i))
+        model = StatusModel(di_defaults, invertedLines=powerSupplyIndicatorLabels[POWER_SUPPLY])
+        run(f'StatusModel, {state}', daq, nRefreshes, toggle, lambda i: modelRefresh(daq, indicators, textVariables, i, model))
+        print(f'{len(model.transitions)} transitions logged')
+    daq.close()
@@ -0,0 +1,140 @@
+'''
+Reaction time of the fault watchdog in watchdog.py, from a fault appearing on a digital input of the
+simulated DAQmx backend in sim_daqmx.py to the Enable HV line being switched off.
+
+Faults are raised at random times on a line of faultConditions. The watchdog is measured with the main
+thread idle and with it busy as the Tk thread is after a shot, analysing a shot and drawing a plot of
+every channel. For comparison, the faults are also checked on the main thread between the same work
+and a refresh period, as a check in the Tk refresh loop would be.
+
+The threads of this process share the GIL with the busy main thread, so they can't time when HV goes
+off. The watchdog process reports when it switched Enable HV off, and the refresh loop check times it
+on the main thread, both with time.perf_counter, which all processes share.
+
+Run with: python benchmarks/bench_watchdog.py [faults per case]
+'''
+import os
+import sys
+import threading
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+# Must be set before ni_daq is imported
+config.SIMULATED_DAQ = True
+import ni_daq
+import sim_daqmx
+from analysis import Analysis
+from config import *
+from watchdog import FaultConditions, FaultWatchdog
+
+enableHVPin = {**do_defaults, **enableHV_defaults}['Enable HV']
+invertedLines = powerSupplyIndicatorLabels[POWER_SUPPLY]
+conditions = faultConditions[POWER_SUPPLY]
+faultLine = 'Door Closed 1'
+sampleRate = 50e3 # Hz, of the shot that is analysed and plotted
+
+def setIndicator(line, state):
+    # Set a line so that its indicator shows state
+    with sim_daqmx.device.lock:
+        sim_daqmx.device.lines[di_defaults[line]] = state != (line in invertedLines)
+
+def healthy():
+    for line in di_defaults:
+        setIndicator(line, not conditions[line] if line in conditions else False)
+    with sim_daqmx.device.lock:
+        sim_daqmx.device.lines[enableHVPin] = True
+
+def hvOff(daq):
+    # The hardware part of TestingApp.faultOff
+    daq.write_value(0, 0)
+    with sim_daqmx.Task() as task:
+        task.do_channels.add_do_chan(enableHVPin)
+        task.write(False)
+
+def makeShot():
+    device = sim_daqmx.SimulatedDevice()
+    device.shotVoltage = 15e3
+    t = np.arange(-0.01, 0.3, 1 / sampleRate)
+    voltage, current = device.discharge_samples(['dischargeVoltage', 'dischargeCurrent'], t, 0.05)
+    channels = np.random.default_rng(0).normal(size=(len(diagnostics_defaults), len(t)))
+    return t, voltage * voltageDivider, current / pearsonCoilDischarge, channels
+
+def guiWork(shot, figure):
+    # What the Tk thread does after a shot
+    t, voltage, current, channels = shot
+    Analysis(t * 1000, 'ms', voltage, current, 50, 0, 0, 0, POLARITY)
+    figure.clf()
+    ax = figure.add_subplot()
+    for channel in channels:
+        ax.plot(t, channel)
+    figure.canvas.draw()
+
+def injectFaults(nFaults, arm, faultTimes, offTimes):
+    # Arm, raise a fault at a random time, wait for HV to be switched off and clear the fault again
+    rng = np.random.default_rng(1)
+    for i in range(nFaults):
+        healthy()
+        arm()
+        time.sleep(rng.uniform(0.02, 0.2))
+        # Timed before the line is set, so a stall of this thread can only make the reaction look slower
+        faultTimes.append(time.perf_counter())
+        setIndicator(faultLine, conditions[faultLine])
+        while len(offTimes) <= i:
+            time.sleep(1e-3)
+
+def run(name, nFaults, daq, shot=None, useWatchdog=True):
+    faultTimes = []
+    offTimes = [] # time.perf_counter() at which Enable HV was switched off for each fault
+    healthy()
+    if useWatchdog:
+        watchdog = FaultWatchdog(di_defaults, invertedLines, conditions, enableHVPin,
+                                 lambda faults: offTimes.append(watchdog.clearTime + watchdog.reactionTime), simulated=True)
+        watchdog.start()
+        arm = watchdog.arm
+    else:
+        checker = FaultConditions(di_defaults, invertedLines, conditions)
+        checkArmed = threading.Event()
+        arm = lambda: (checker.reset(), checkArmed.set())
+
+    injector = threading.Thread(target=injectFaults, args=(nFaults, arm, faultTimes, offTimes))
+    injector.start()
+    figure = plt.figure(figsize=(10, 4)) if shot is not None else None
+    workTimes = []
+    while injector.is_alive():
+        if shot is not None:
+            start = time.perf_counter()
+            guiWork(shot, figure)
+            workTimes.append(time.perf_counter() - start)
+        if not useWatchdog and checkArmed.is_set() and checker.check(daq.task_di.read()):
+            # A check in the refresh loop, which runs after the work of the Tk thread
+            checkArmed.clear()
+            hvOff(daq)
+            offTimes.append(time.perf_counter())
+        time.sleep(1 / refreshRate)
+
+    injector.join()
+    if useWatchdog:
+        watchdog.stop()
+    if figure is not None:
+        plt.close(figure)
+
+    reactions = (np.array(offTimes) - np.array(faultTimes)) * 1e3
+    work = f', GUI work {np.median(workTimes) * 1e3:.0f} ms per refresh' if workTimes else ''
+    print(f'{name:>30}: median {np.median(reactions):6.1f} ms, p99 {np.percentile(reactions, 99):6.1f} ms, max {np.max(reactions):6.1f} ms{work}')
+
+if __name__ == '__main__':
+    nFaults = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    daq = ni_daq.NI_DAQ(systemStatus_sample_rate, systemStatus_defaults, charge_ao_defaults, di_defaults,
+                        diagnostics_defaults, counters_defaults, enableHV_defaults if POWER_SUPPLY == 'EB-100' else {})
+    shot = makeShot()
+    print(f'{nFaults} faults on {faultLine} per case, watchdog at {watchdogRate} Hz')
+
+    run('watchdog, idle', nFaults, daq)
+    run('watchdog, GUI busy', nFaults, daq, shot)
+    run('refresh loop check, GUI busy', nFaults, daq, shot, useWatchdog=False)
+    daq.close()
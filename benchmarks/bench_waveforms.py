@@ -0,0 +1,61 @@
+'''
+Building the enable HV and switch patterns for the digital output tasks.
+
+NI_DAQ used to build them as Python lists, np.array([False] * low_ticks + [True] * high_ticks + [False]),
+which is a million element list for a 10 s dump delay at 100 kHz. waveforms.py builds them from segments
+with np.repeat. Every pattern is checked against the old lists sample by sample, so the edges are on the same ticks.
+
+Run with: python benchmarks/bench_waveforms.py
+'''
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import samp_freq, switch_samp_freq
+from waveforms import buildPattern, pulsePattern, stackPatterns
+
+def old_enableHV(low_ticks, high_ticks):
+    return np.array([False] * low_ticks + [True] * high_ticks + [False])
+
+def new_enableHV(low_ticks, high_ticks):
+    return buildPattern((False, low_ticks), (True, high_ticks), (False, 1))
+
+def old_switch(n_load_samples, n_dump_samples):
+    load_list = [True] * n_load_samples
+    dump_list = [True] * n_dump_samples
+    load_list[-1] = False
+    dump_list += [False] * (n_load_samples - n_dump_samples)
+    return np.array([load_list, dump_list])
+
+def new_switch(n_load_samples, n_dump_samples):
+    return stackPatterns(buildPattern((True, n_load_samples - 1), (False, 1)),
+                         buildPattern((True, n_dump_samples), (False, n_load_samples - n_dump_samples)))
+
+def timed(build, *args, repeats=5):
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        build(*args)
+        durations.append(time.perf_counter() - start)
+    return np.median(durations)
+
+if __name__ == '__main__':
+    # Edges must land on exactly the same ticks, including empty segments
+    for low_ticks, high_ticks in [(0, 0), (0, 1), (1, 0), (3, 5), (2500, 5000), (0, 100000)]:
+        assert np.array_equal(old_enableHV(low_ticks, high_ticks), new_enableHV(low_ticks, high_ticks))
+    for n_load_samples, n_dump_samples in [(1, 0), (1, 1), (5, 3), (5, 5), (1100, 1050)]:
+        assert np.array_equal(old_switch(n_load_samples, n_dump_samples), new_switch(n_load_samples, n_dump_samples))
+    for start, stop, length in [(0, 0, 4), (0, 4, 4), (1, 3, 4), (3, 10, 4), (-2, 2, 4)]:
+        expected = np.array([start <= i < stop for i in range(length)])
+        assert np.array_equal(pulsePattern(start, stop, length), expected)
+    print('All patterns match the old lists tick for tick')
+
+    dumpDelay = 10 # s
+    args = (0, int(dumpDelay * samp_freq))
+    print(f'enable HV, {dumpDelay} s at {samp_freq / 1000:.0f} kHz: '
+          f'lists {timed(old_enableHV, *args) * 1e3:.1f} ms, segments {timed(new_enableHV, *args) * 1e3:.2f} ms')
+    args = (int(switch_samp_freq * (dumpDelay + 1.1)), int(switch_samp_freq * (dumpDelay + 1)))
+    print(f'switches, {dumpDelay} s at {switch_samp_freq / 1000:.0f} kHz: '
+          f'lists {timed(old_switch, *args) * 1e3:.2f} ms, segments {timed(new_switch, *args) * 1e3:.3f} ms')
@@ -0,0 +1,215 @@
+import numpy as np
+
+class RingBuffer():
+    '''
+    Per-channel sample history backed by a single 2-D float array and a write index.
+
+    In the default (ring) mode the buffer holds the most recent `capacity` samples of every channel.
+    Each sample is written twice, `capacity` columns apart, so that the newest `capacity` samples are
+    always one contiguous slice and can be handed out as a view without copying.
+    In growable mode the buffer never drops samples and doubles its capacity when it fills up,
+    which is used to record the whole charge.
+    '''
+    def __init__(self, names, capacity, growable=False, dtype=float):
+        self.names = list(names)
+        self.channel_index = {name: i for i, name in enumerate(self.names)}
+        self.capacity = max(int(capacity), 1)
+        self.growable = growable
+        self.dtype = dtype
+
+        self.clear()
+
+    def clear(self):
+        width = self.capacity if self.growable else 2 * self.capacity
+        self.data = np.zeros((len(self.names), width), dtype=self.dtype)
+        self.count = 0 # total number of samples written since the last clear
+
+    def append(self, points):
+        # points has shape (channels, samples), which is the format returned by nidaqmx reads
+        points = np.asarray(points, dtype=self.dtype).reshape(len(self.names), -1)
+        n = points.shape[1]
+        if n == 0:
+            return
+
+        if self.growable:
+            if self.count + n > self.capacity:
+                self._grow(self.count + n)
+            self.data[:, self.count:self.count + n] = points
+
+        else:
+            # Only the last capacity samples can ever be seen, so skip the rest
+            if n > self.capacity:
+                self.count += n - self.capacity
+                points = points[:, -self.capacity:]
+                n = self.capacity
+
+            start = self.count % self.capacity
+            first = min(n, self.capacity - start)
+            self.data[:, start:start + first] = points[:, :first]
+            self.data[:, start + self.capacity:start + self.capacity + first] = points[:, :first]
+
+            # Wrap around to the beginning of the ring
+            rest = n - first
+            if rest > 0:
+                self.data[:, :rest] = points[:, first:]
+                self.data[:, self.capacity:self.capacity + rest] = points[:, first:]
+
+        # Only advance the write index once the samples are in place so readers never see unwritten data
+        self.count += n
+
+    def _grow(self, required):
+        capacity = max(2 * self.capacity, required)
+        data = np.zeros((len(self.names), capacity), dtype=self.dtype)
+        data[:, :self.count] = self.data[:, :self.count]
+        self.data = data
+        self.capacity = capacity
+
+    def view(self):
+        '''
+        Return a (channels, samples) view of the stored history in chronological order.
+        '''
+        # Read the write index before the array, the array may be swapped out by a grow on the callback thread
+        count = self.count
+        data = self.data
+        if self.growable or count <= self.capacity:
+            return data[:, :count]
+
+        start = count % self.capacity
+        return data[:, start:start + self.capacity]
+
+    def __getitem__(self, name):
+        return self.view()[self.channel_index[name]]
+
+    def __contains__(self, name):
+        return name in self.channel_index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def keys(self):
+        return self.names
+
+    @property
+    def n_samples(self):
+        return min(self.count, self.capacity)
+
+class ScaledHistory():
+    '''
+    Growing history of channels scaled from those of another history, such as the charge in physical units.
+
+    Each channel is given as name: (source channel, gain, offset) and holds (source + offset) * gain, or
+    (sample index + offset) * gain for a source of None, which gives a time axis. Only the samples added to
+    the source since the last update are scaled, into a preallocated growable buffer, so each update costs
+    the same however long the history is, and the channels are views of that buffer.
+    '''
+    def __init__(self, channels, capacity=1024):
+        self.channels = channels
+        self.buffer = RingBuffer(list(channels), capacity, growable=True)
+        self.clear()
+
+    def clear(self):
+        self.buffer.clear()
+        self.samples_seen = 0 # samples of the source that have been processed
+
+    def update(self, history, count=None):
+        '''
+        Add the new samples of history, where count is the total number of samples ever written to it, as for
+        MovingAverage.update.
+        '''
+        sources = {source: history[source] for source, gain, offset in self.channels.values() if source is not None}
+        length = min((len(values) for values in sources.values()), default=0)
+        if count is None:
+            count = length
+        # A shorter history means it was reset, so start over
+        if count < self.samples_seen:
+            self.clear()
+
+        n_new = min(count - self.samples_seen, length)
+        if n_new > 0:
+            index = np.arange(count - n_new, count)
+            points = [((index if source is None else np.asarray(sources[source][length - n_new:length], dtype=float)) + offset) * gain
+                      for source, gain, offset in self.channels.values()]
+            self.buffer.append(points)
+        self.samples_seen = count
+
+        return self
+
+    def __getitem__(self, name):
+        return self.buffer[name]
+
+class MovingAverage():
+    '''
+    Streaming moving average over the last `window` valid samples of a growing history.
+
+    Only the samples added since the last update are processed, so each update costs the same however
+    long the history is. NaN samples, such as the capacitor voltage while the divider is open, are
+    skipped rather than averaged. The running sum of the valid samples is kept alongside them, which
+    gives the latest average directly and lets the whole filtered array be built only when it's needed.
+    Unless record is set, only the last window of samples is kept, which is all the latest average needs.
+    '''
+    def __init__(self, window, record=False):
+        self.window = max(int(window), 1)
+        self.record = record
+        self.sums = RingBuffer(['value', 'sum'], self.window + 1, growable=record)
+        self.clear()
+
+    def clear(self):
+        self.sums.clear()
+        self.samples_seen = 0 # samples of the history that have been processed, including nan's
+        self.total = 0.0
+        self._filtered = None
+
+    def update(self, history, count=None):
+        '''
+        Add the new samples of history, where count is the total number of samples ever written to it.
+        count only needs to be given when history is a sliding window, such as a RingBuffer view, and
+        defaults to len(history) for a history that only grows.
+        '''
+        if count is None:
+            count = len(history)
+        # A shorter history means it was reset, so start over
+        if count < self.samples_seen:
+            self.clear()
+
+        n_new = min(count - self.samples_seen, len(history))
+        self.samples_seen = count
+        if n_new <= 0:
+            return self.last
+
+        new = np.asarray(history[len(history) - n_new:], dtype=float)
+        new = new[~np.isnan(new)]
+        if len(new) > 0:
+            sums = self.total + np.cumsum(new)
+            self.total = sums[-1]
+            self.sums.append(np.vstack((new, sums)))
+            self._filtered = None
+
+        return self.last
+
+    @property
+    def last(self):
+        # Average of the newest window of valid samples
+        n = self.sums.count
+        if n == 0:
+            return np.nan
+        sums = self.sums['sum']
+        if n > self.window:
+            return (sums[-1] - sums[-self.window - 1]) / self.window
+        return sums[-1] / n
+
+    @property
+    def filtered(self):
+        '''
+        Trailing moving average of the stored valid samples, which is all of them in record mode.
+        It's built on the first request after an update.
+        '''
+        if self._filtered is None:
+            values = self.sums.view()
+            if values.shape[1] == 0:
+                return np.array([])
+            # Running sum just before the first stored sample
+            sums = np.concatenate(([values[1, 0] - values[0, 0]], values[1]))
+            n = np.arange(1, len(sums))
+            start = np.maximum(n - self.window, 0)
+            self._filtered = (sums[n] - sums[start]) / (n - start)
+        return self._filtered
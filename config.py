@@ -2,6 +2,8 @@ from constants import *
 
 # Test mode for when we're not connected to the National Instruments hardware
 DEBUG_MODE = False
+# Run the DAQ tasks on the simulated chassis in sim_daqmx.py instead of nidaqmx, for testing and benchmarking without hardware
+SIMULATED_DAQ = False
 ADMIN_MODE = True
 SHOT_MODE = True
 # Is the ignitron used for switching?
@@ -24,16 +26,40 @@ powerSupplyIndicatorLabels = {'PLEIADES': ['HV On', 'CONST HV Mode', 'CONST mA M
 # All other indicators
 indicatorLabels = ['Door Closed 1', 'Door Closed 2']
 
+# Fault watchdog, see watchdog.py
+watchdogRate = 1000 # Hz, rate at which the digital inputs are read
+# {indicator: indicator state that is a fault}, checked from the start of a charge until the supply is ramped down for the shot
+# The direct drive supply only turns HV on at the end of the countdown, so HV On isn't a condition for it
+faultConditions = {'PLEIADES': {'HV On': False, 'Interlock Closed': True, 'Spark': True, 'Over Temp Fault': True, 'AC Fault': True,
+                                'Door Closed 1': False, 'Door Closed 2': False},
+                   'EB-100': {'Interlock Closed': True, 'Oil Over-Temp': True, 'Inverter Over-Temp': True, 'Emergency Stop': True,
+                              'Short Circuit': True, 'Inverter Over-Current': True, 'IGBT Fault': True, 'HV Fault': True,
+                              'Door Closed 1': False, 'Door Closed 2': False},
+                   'TDK': {'HV On': False, 'Interlock Closed': True, 'Spark': True, 'Over Temp Fault': True, 'AC Fault': True,
+                           'Door Closed 1': False, 'Door Closed 2': False}}
+# Indicators whose condition only applies once they have been seen without a fault after arming
+# The HV On readback lags Enable HV, so it isn't a fault until the supply has first reported HV on
+latchedFaultConditions = ['HV On']
+
 # Power supply constants
 maxVoltagePowerSupply = {'PLEIADES': 100e3, 'EB-100': 100e3, 'TDK': 50e3} # V
 maxCurrentPowerSupply = {'PLEIADES': 60e-3, 'EB-100': 1.0, 'TDK': 360e-3} # A
 maxAnalogInput = 10 # V
 systemStatus_sample_rate = 100 # Hz, rate at which the NI hardware updates the voltage
+systemStatus_buffer_duration = 60 # s, length of system status history kept while not charging
+record_whole_charge = True # Keep the entire charge history, not just the last systemStatus_buffer_duration
 
 # Oscilloscope parameters
 scopeChannelDefaults = {'INT01_DRIVER': '2', 'INT01': '1'}
 scopeChannelOptions = ['1', '2', '3', '4']
 scopeColumns = [key for key in scopeChannelDefaults]
+scopePacketLength = 1000000 # samples per :WAV:DATA? request, the MSO5000 allows up to 1M in BYTE format
+scopeSavePoints = None # number of points to keep from each scope channel, None keeps the whole record
+scopePollInterval = 0.05 # s between :TRIG:STAT? queries while waiting for the scope to finish its acquisition
+
+# Post-shot readout, each source must finish within its deadline from the start of the readout (s)
+readoutDeadlines = {'DAQ': 10, 'counters': 2, 'scope': 60, 'HTTP': 5}
+diagnosticsComputers = ['169.254.146.111', '169.254.146.131'] # lab computers that are armed over http before each shot
 
 # Working gas options
 gasOptions = ['Hydrogen', 'Deuterium', 'Helium', 'Nitrogen', 'None']
@@ -213,7 +239,15 @@ diagnostics_options = [f'{diagnostics_name}/ai{i}' for i in list(range(8))] + \
 counters_options = [f'{output_name}/ctr{i}' for i in list(range(4))] + \
                    [f'{misc_name}/ctr{i}' for i in list(range(4))]
 samp_freq = 100000 # Frequency for acquiring data [Hz]
+STREAM_DISCHARGE = False # Read the discharge in chunks as it is acquired instead of one blocking read at the end
+discharge_chunk_duration = 0.01 # s, length of each chunk when streaming the discharge
+discharge_timeout = 10 # s, time to wait for the discharge beyond its duration
+ZERO_PHASE_FILTER = False # Filter the diagnostics forwards and backwards in the analysis so the filtered signals have no delay
 switch_samp_freq = 1000 # Frequency for triggering switches [Hz]
+PERSISTENT_DAQ_TASKS = False # Build and commit the discharge tasks once and only restart them between shots, unless the timing changes
+dischargeSavePoints = None # number of points to keep from each discharge diagnostic, None keeps every sample
+decimationMethod = 'fir' # 'fir' (anti-aliased), 'minmax' (envelope) or 'stride', see decimation.py
+fitMaxPoints = 5000 # exponential decay fits average blocks of samples down to this many points, None fits every sample
 
 analysisVariables = {'decayTime': {'label': 'Decay Time (ms)', 'factor': 1e3},
                      'storedEnergy': {'label': 'Plasma Energy (J)', 'factor': 1},
@@ -297,7 +331,18 @@ acceptableUsernames = ['nickschw', 'koeth', 'beaudoin', 'romero', 'neschbac']
 acceptablePasswords = ['plasma']
 
 # Plotting constants
-refreshRate = 100.0 # Hz
+# The status and charge plots are refreshed when the DAQ has new status data, at most at these rates, see scheduler.py
+refreshRate = 100.0 # Hz, from the start of a charge until the app is reset
+idleRefreshRate = 4.0 # Hz, while idle
+refreshTimeout = 0.5 # s, the status is refreshed this often even if no new data arrives
+
+# Timing of the refresh loop and shot stages, see profiling.py
+SHOW_LATENCY_PANEL = False # open the latency panel on startup, it can also be opened from the View menu
+profileRingLength = 500 # most recent durations kept for every timed span
+latencyPanelRate = 2.0 # Hz
+
+# Format of the individual shot files, either 'npz' (binary, see shot_file.py) or 'csv'
+resultsFileFormat = 'npz'
 
 # Time between switch operations in seconds
 switchWaitTime = 0.5
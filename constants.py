@@ -8,6 +8,8 @@ githubSite = 'https://github.com/nickschw2/HVTestingApp'
 saveFolderShotDefault = 'C:/Users/Control Room/programs/HVTestingApp/results'
 saveFolderCapDefault = 'C:/Users/Control Room/programs/HVTestingApp/capacitor_results'
 resultsMasterName = 'results_master.csv'
+resultsMasterDatabaseName = 'results_master.db'
+shotArchiveIndexName = 'shot_archive.pkl'
 
 # Capacitor Specs doc
 capacitorSpecificationsName = 'Capacitor_Specifications.csv'
@@ -37,11 +39,14 @@ buttonPadding = 50 #pixels
 framePadding = 15 #pixels
 plotPadding = 30 #pixels
 displaySetTextTime = 1000 # ms
+archivePickerColumns = ['runNumber', 'runDate', 'primaryGas', 'chargeVoltage', 'dumpDelay', 'decayTime', 'storedEnergy', 'postShotNotes']
+archivePickerRows = 20
 topLevelWidth = 30
 topLevelWrapLength = 275
 systemStatusFrameWidth = 250
 progressBarLength = 300
 plotTimeLimit = 20 # s
+chargePlotPageFraction = 0.5 # fraction of plotTimeLimit that the charge plot moves forward when it runs out of room
 voltageYLim = 1.2 # kV
 currentYLim = 15 # mA
 
@@ -151,4 +156,5 @@ single_columns = {'serialNumber': {'name': 'Serial Number', 'type': 'scalar'},
     'ACC02': {'name': 'ACC02 (V)', 'type': 'array'},
     'Trigger': {'name': 'Trigger (V)', 'type': 'array'},
     'preShotNotes': {'name': 'Pre-Shot Notes', 'type': 'scalar'},
-    'postShotNotes': {'name': 'Post-Shot Notes', 'type': 'scalar'}}
\ No newline at end of file
+    'postShotNotes': {'name': 'Post-Shot Notes', 'type': 'scalar'},
+    'statusTransitions': {'name': 'Status Transitions', 'type': 'array'}}
\ No newline at end of file
@@ -0,0 +1,154 @@
+'''
+Reduce long traces to a manageable number of points before they are saved or plotted.
+
+Three methods are available:
+    'fir'    - polyphase anti-aliasing low pass filter followed by downsampling (same filter as scipy.signal.resample_poly,
+               but the trace is extended with its end values rather than zeros, so offset traces don't droop at the ends)
+    'minmax' - min-max envelope, keeps the extremes of every bucket so that spikes are never lost
+    'stride' - plain subsampling, data[::factor], which aliases anything above the new Nyquist frequency
+
+All methods work along the last axis, so a (channels, samples) array is decimated in one call, and
+process the trace in chunks so that a 10M point record never has to be converted to floats all at once.
+'''
+import numpy as np
+from scipy import signal
+
+decimationMethods = ['fir', 'minmax', 'stride']
+decimationChunkSize = 1000000 # output samples per chunk for each channel
+lodMinPoints = 1024 # lines shorter than this are always plotted at full resolution
+
+def decimationFactor(length, nPoints):
+    # Integer factor that reduces length samples to about nPoints, never less than 1
+    if nPoints is None or nPoints <= 0:
+        return 1
+    return max(int(np.round(length / nPoints)), 1)
+
+def decimatedLength(length, factor, method='fir'):
+    if factor <= 1:
+        return length
+    if method == 'minmax':
+        return 2 * int(np.ceil(length / (2 * factor)))
+    return int(np.ceil(length / factor))
+
+def decimateTime(time, factor, length):
+    '''
+    Time axis for a trace decimated by factor to length points, given the time axis of the original trace.
+    Sample k of every method sits at the time of input sample k * factor.
+    '''
+    time = np.asarray(time)
+    if factor <= 1 or len(time) < 2:
+        return time[:length]
+    return time[0] + (time[1] - time[0]) * factor * np.arange(length)
+
+def firFilter(factor):
+    # Kaiser windowed low pass with the cutoff at the new Nyquist frequency, as in scipy.signal.resample_poly
+    halfLength = 10 * factor
+    return signal.firwin(2 * halfLength + 1, 1 / factor, window=('kaiser', 5.0)), halfLength
+
+def decimate(data, factor, method='fir', chunkSize=decimationChunkSize):
+    '''
+    Decimate data along its last axis by an integer factor and return a float array.
+    '''
+    if method not in decimationMethods:
+        raise ValueError(f'Unknown decimation method {method}, choose from {decimationMethods}')
+
+    data = np.asarray(data)
+    if factor <= 1:
+        return data.astype(float)
+    if method == 'stride':
+        return data[..., ::factor].astype(float)
+
+    length = data.shape[-1]
+    output = np.zeros(data.shape[:-1] + (decimatedLength(length, factor, method),))
+    if method == 'fir':
+        h, halfLength = firFilter(factor)
+        # Output sample k is centred on input sample k * factor, so each chunk needs halfLength samples of context on both sides
+        offset = 2 * halfLength // factor
+        for k0 in range(0, output.shape[-1], chunkSize):
+            k1 = min(k0 + chunkSize, output.shape[-1])
+            start = k0 * factor - halfLength
+            stop = (k1 - 1) * factor + halfLength + 1
+            # Repeat the end values past the ends of the trace, raw scope bytes sit around 128 rather than 0
+            chunk = data[..., max(start, 0):min(stop, length)].astype(float)
+            padding = [(0, 0)] * (chunk.ndim - 1) + [(max(-start, 0), max(stop - length, 0))]
+            chunk = np.pad(chunk, padding, mode='edge')
+            output[..., k0:k1] = signal.upfirdn(h, chunk, 1, factor, axis=-1)[..., offset:offset + k1 - k0]
+
+    elif method == 'minmax':
+        # Each bucket of 2 * factor samples becomes its min and max, in the order they occurred
+        bucket = 2 * factor
+        nBuckets = output.shape[-1] // 2
+        for b0 in range(0, nBuckets, chunkSize // 2):
+            b1 = min(b0 + chunkSize // 2, nBuckets)
+            chunk = data[..., b0 * bucket:b1 * bucket].astype(float)
+            # Pad the last partial bucket with its final value
+            if chunk.shape[-1] < (b1 - b0) * bucket:
+                padding = [(0, 0)] * (chunk.ndim - 1) + [(0, (b1 - b0) * bucket - chunk.shape[-1])]
+                chunk = np.pad(chunk, padding, mode='edge')
+            chunk = chunk.reshape(data.shape[:-1] + (b1 - b0, bucket))
+
+            argmin = chunk.argmin(axis=-1)
+            argmax = chunk.argmax(axis=-1)
+            minimum = np.take_along_axis(chunk, argmin[..., None], axis=-1)[..., 0]
+            maximum = np.take_along_axis(chunk, argmax[..., None], axis=-1)[..., 0]
+            minFirst = argmin <= argmax
+            output[..., 2 * b0:2 * b1:2] = np.where(minFirst, minimum, maximum)
+            output[..., 2 * b0 + 1:2 * b1:2] = np.where(minFirst, maximum, minimum)
+
+    return output
+
+class LevelOfDetail():
+    '''
+    Min/max pyramid of one line for plotting long traces.
+
+    Level k holds the min and max of every bucket of 2**k samples. A query for an x range picks the
+    coarsest level that still has a bucket for every pixel. Drawn as a vertical segment from min to max,
+    each bucket covers the same pixels as the full resolution line does, while only two points per
+    pixel are handed to matplotlib.
+    x must be increasing, which is the case for every time axis in the app.
+    '''
+    def __init__(self, x, y, minPoints=lodMinPoints):
+        self.x = x
+        self.y = y
+        self.xArray = np.asarray(x, dtype=float)
+        self.yArray = np.asarray(y, dtype=float)
+
+        # Each level is (bucket start x, bucket min, bucket max)
+        self.levels = []
+        xs, mins, maxs = self.xArray, self.yArray, self.yArray
+        while len(mins) > minPoints:
+            # Repeat the last sample of an odd length so that it isn't dropped
+            if len(mins) % 2 != 0:
+                mins = np.append(mins, mins[-1])
+                maxs = np.append(maxs, maxs[-1])
+            xs = xs[::2]
+            mins = np.minimum(mins[::2], mins[1::2])
+            maxs = np.maximum(maxs[::2], maxs[1::2])
+            self.levels.append((xs, mins, maxs))
+
+    def isFor(self, x, y):
+        return self.x is x and self.y is y
+
+    def query(self, x0, x1, pixels):
+        '''
+        Return the (x, y) points to draw between x0 and x1 on an axes that is pixels wide.
+        '''
+        n = len(self.xArray)
+        # Include one sample beyond each edge so the line runs to the edge of the axes
+        i0 = max(np.searchsorted(self.xArray, x0) - 1, 0)
+        i1 = min(np.searchsorted(self.xArray, x1, side='right') + 1, n)
+        span = i1 - i0
+
+        level = int(np.floor(np.log2(span / max(pixels, 1)))) if span > 0 else 0
+        level = min(level, len(self.levels))
+        if level <= 0:
+            return self.xArray[i0:i1], self.yArray[i0:i1]
+
+        xs, mins, maxs = self.levels[level - 1]
+        b0 = i0 >> level
+        b1 = ((i1 - 1) >> level) + 1
+        # Draw each bucket as a vertical segment from its min to its max
+        x = np.repeat(xs[b0:b1], 2)
+        y = np.column_stack((mins[b0:b1], maxs[b0:b1])).ravel()
+
+        return x, y
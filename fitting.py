@@ -0,0 +1,179 @@
+'''
+Exponential decay fits.
+
+Fits y = m * exp(-(t - t[0]) / tau) + b to one trace, a (traces, samples) array of traces on the same
+time axis, or a list of traces of different lengths:
+    (m, tau, b), success = fitDecay(time, current)
+    params, success = fitDecays([(chargeTime, chargeVoltage), (dischargeTime, dischargeVoltage)])
+
+The starting point is found without a guess by linear regression on the integral of the trace: since
+y - b = m * exp(-t / tau), y = (b + m) - k * integral(y) + k * b * t with k = 1 / tau, which is linear
+in its three coefficients. It is then refined with Levenberg-Marquardt steps using the analytic Jacobian,
+with every trace stepped at once, so a batch costs about as much as a single call of curve_fit.
+Long traces can be reduced to maxPoints by averaging blocks of samples before they are fit.
+
+The amplitude m is that at the first sample of each trace, since at the original origin of a trace that
+starts many time constants in it can be too large to represent.
+'''
+import numpy as np
+
+fitIterations = 30
+fitTolerance = 1e-8 # relative change of the parameters at which a fit has converged
+
+def expDecay(t, m, tau, b):
+    # The fitted curve for the fit of a trace that starts at t = 0, use t - t[0] otherwise
+    return m * np.exp(-t / tau) + b
+
+def _normal(X, y, w):
+    # X^T W X and X^T W y for a stack of (samples, parameters) design matrices
+    XtW = np.swapaxes(X * w[..., None], -1, -2)
+    return XtW @ X, (XtW @ y[..., None])[..., 0]
+
+def _singular(M):
+    singular = ~np.all(np.isfinite(M), axis=(-2, -1))
+    singular[~singular] = ~(np.linalg.cond(M[~singular]) < 1e15)
+    return singular
+
+def _solve(X, y, w):
+    # Weighted least squares for a stack of (samples, parameters) design matrices
+    # The columns are scaled to unit norm first so that the normal equations stay well conditioned
+    scale = np.sqrt(np.sum(X**2 * w[..., None], axis=-2))
+    scale[scale == 0] = 1
+    XtX, Xty = _normal(X / scale[..., None, :], y, w)
+    # Traces that can't be solved, such as a flat line, come out as nan
+    singular = _singular(XtX)
+    XtX[singular] = np.eye(XtX.shape[-1])
+    solution = np.linalg.solve(XtX, Xty[..., None])[..., 0] / scale
+    solution[singular] = np.nan
+    return solution
+
+def _decimate(t, y, w, maxPoints):
+    # Average blocks of samples, any samples left over at the end are dropped
+    block = int(np.ceil(t.shape[-1] / maxPoints))
+    if block <= 1:
+        return t, y, w
+    n = t.shape[-1] // block * block
+    shape = t.shape[:-1] + (n // block, block)
+    weights = w[..., :n].reshape(shape)
+    total = np.maximum(weights.sum(axis=-1), 1e-300)
+    mean = lambda values: (values[..., :n].reshape(shape) * weights).sum(axis=-1) / total
+    return mean(t), mean(y), (weights.sum(axis=-1) > 0).astype(float)
+
+def initialDecay(t, y, w=None):
+    '''
+    Closed form (m, k, b) of each trace from a linear regression on its integral, with k = 1 / tau.
+    t and y are (traces, samples) and the time axis must start at zero.
+    '''
+    w = np.ones_like(y) if w is None else w
+    integral = np.zeros_like(y)
+    integral[..., 1:] = np.cumsum(0.5 * (y[..., 1:] + y[..., :-1]) * np.diff(t, axis=-1), axis=-1)
+    ones = np.ones_like(y)
+    A, B, C = np.moveaxis(_solve(np.stack((ones, integral, t), axis=-1), y, w), -1, 0)
+
+    # A trace that doesn't decay gets a time constant of its whole length, which Levenberg-Marquardt moves from
+    span = np.max(t, axis=-1)
+    k = np.where(np.isfinite(B) & (B < 0), -B, 1 / np.maximum(span, 1e-300))
+
+    # With k known the trace is linear in m and b
+    m, b = np.moveaxis(_solve(np.stack((np.exp(-k[..., None] * t), ones), axis=-1), y, w), -1, 0)
+    return np.stack((m, k, b), axis=-1)
+
+def _refine(t, y, w, params, iterations=fitIterations, tolerance=fitTolerance):
+    # Levenberg-Marquardt on (m, k, b) of (traces, 3), every trace takes its own step and damping
+    # Only the traces that haven't converged are stepped
+    def cost(i, params):
+        m, k, b = params[:, 0:1], params[:, 1:2], params[:, 2:3]
+        residual = y[i] - (m * np.exp(-k * t[i]) + b)
+        return np.sum(w[i] * residual**2, axis=-1), residual
+
+    params = params.copy()
+    damping = np.full(len(params), 1e-3)
+    current, residual = cost(slice(None), params)
+    active = np.flatnonzero(np.all(np.isfinite(params), axis=-1))
+    for _ in range(iterations):
+        if len(active) == 0:
+            break
+        m, k = params[active, 0:1], params[active, 1:2]
+        decay = np.exp(-k * t[active])
+        J = np.stack((decay, -m * t[active] * decay, np.ones_like(decay)), axis=-1)
+        JtJ, Jtr = _normal(J, residual[active], w[active])
+
+        diagonal = np.diagonal(JtJ, axis1=-2, axis2=-1)
+        damped = JtJ + (damping[active, None] * diagonal)[..., None] * np.eye(3)
+        # Traces whose system can't be solved take no step
+        singular = _singular(damped)
+        damped[singular] = np.eye(3)
+        step = np.linalg.solve(damped, Jtr[..., None])[..., 0]
+        step[singular] = 0
+
+        trial = params[active] + step
+        trialCost, trialResidual = cost(active, trial)
+        accept = np.isfinite(trialCost) & (trialCost <= current[active]) & (trial[:, 1] > 0)
+        accepted = active[accept]
+        params[accepted] = trial[accept]
+        current[accepted] = trialCost[accept]
+        residual[accepted] = trialResidual[accept]
+        damping[active] = np.where(accept, damping[active] * 0.3, damping[active] * 10)
+
+        converged = accept & np.all(np.abs(step) <= tolerance * np.abs(trial), axis=-1)
+        converged |= singular | (damping[active] > 1e12)
+        active = active[~converged]
+
+    return params
+
+def _fit(t, y, w, maxPoints):
+    # t, y and w are (traces, samples), returns (traces, 3) of (m, tau, b)
+    t = t - t[..., :1]
+    if maxPoints is not None:
+        # The first block is averaged around its middle, so the time axis is moved back to start at zero
+        t, y, w = _decimate(t, y, w, maxPoints)
+        shift = t[..., :1]
+        t = t - shift
+
+    with np.errstate(all='ignore'):
+        params = _refine(t, y, w, initialDecay(t, y, w))
+        m, k, b = np.moveaxis(params, -1, 0)
+        if maxPoints is not None:
+            m = m * np.exp(k * shift[..., 0])
+        params = np.stack((m, 1 / k, b), axis=-1)
+
+    success = np.all(np.isfinite(params), axis=-1) & (k > 0)
+    return params, success
+
+def fitDecay(t, y, maxPoints=None):
+    '''
+    Fit y = m * exp(-(t - t[0]) / tau) + b and return ((m, tau, b), success). y is one trace or a (traces, samples)
+    array of traces sampled at times t, which must be increasing. Failed fits are flagged in success.
+    '''
+    y = np.asarray(y, dtype=float)
+    t = np.broadcast_to(np.asarray(t, dtype=float), y.shape)
+    if y.shape[-1] < 3:
+        return np.full(y.shape[:-1] + (3,), np.nan), np.zeros(y.shape[:-1], dtype=bool)
+
+    params, success = _fit(np.atleast_2d(t), np.atleast_2d(y), np.ones(np.atleast_2d(y).shape), maxPoints)
+    return params.reshape(y.shape[:-1] + (3,)), success.reshape(y.shape[:-1])
+
+def fitDecays(traces, maxPoints=None):
+    '''
+    Fit a list of (t, y) traces of different lengths in one batch, returning a (traces, 3) array of (m, tau, b) and success.
+    Shorter traces are padded with zero weight samples at their last time.
+    '''
+    lengths = [len(y) for _, y in traces]
+    length = max(lengths, default=0)
+    t = np.zeros((len(traces), length))
+    y = np.zeros((len(traces), length))
+    w = np.zeros((len(traces), length))
+    for i, (traceTime, traceValues) in enumerate(traces):
+        n = lengths[i]
+        if n < 3:
+            continue
+        t[i, :n], y[i, :n], w[i, :n] = traceTime, traceValues, 1
+        t[i, n:], y[i, n:] = traceTime[-1], traceValues[-1]
+
+    if length < 3:
+        return np.full((len(traces), 3), np.nan), np.zeros(len(traces), dtype=bool)
+
+    params, success = _fit(t, y, w, maxPoints)
+    short = np.array(lengths) < 3
+    params[short] = np.nan
+    return params, success & ~short
@@ -6,13 +6,15 @@ from ttkbootstrap.themes import standard
 theme_colors = standard.STANDARD_THEMES[themename]['colors']
 
 class Indicator(ttk.Frame):
-    def __init__(self, master, text='', size=20, on_color=theme_colors['danger'], off_color=theme_colors['inputbg']):
+    def __init__(self, master, text='', size=20, on_color=theme_colors['danger'], off_color=theme_colors['inputbg'], unknown_color=theme_colors['secondary']):
         super().__init__(master)
         self.master = master
         self.text = text
         self.on_color = on_color
         self.off_color = off_color
+        self.unknown_color = unknown_color
         self.state = False
+        self.drawn = False
 
         self.indicatorFrame = ttk.Frame(self.master)
         self.indicatorFrame.pack(anchor='w')
@@ -26,8 +28,15 @@ class Indicator(ttk.Frame):
         self.label.pack(side='left')
 
     def set(self, state):
+        # The canvas is only redrawn when the state changes
+        # A state of None is shown when the line can't be read
+        if self.drawn and state == self.state:
+            return
+        self.drawn = True
         self.state = state
-        if self.state:
+        if self.state is None:
+            self.canvas.itemconfig(self.indicator, fill=self.unknown_color)
+        elif self.state:
             self.canvas.itemconfig(self.indicator, fill=self.on_color)
         else:
             self.canvas.itemconfig(self.indicator, fill=self.off_color)
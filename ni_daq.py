@@ -12,11 +12,21 @@
   acquire data at exactly the same rate.
 '''
 
-import nidaqmx
-from nidaqmx.constants import (AcquisitionType, Edge, TriggerType, Level, LineGrouping, Signal)
-from nidaqmx.stream_readers import (AnalogMultiChannelReader)
 import numpy as np
 from config import *
+if SIMULATED_DAQ:
+    import sim_daqmx as nidaqmx
+    from sim_daqmx import (AcquisitionType, Edge, TriggerType, Level, LineGrouping, Signal, TaskMode)
+    from sim_daqmx import (AnalogMultiChannelReader)
+else:
+    import nidaqmx
+    from nidaqmx.constants import (AcquisitionType, Edge, TriggerType, Level, LineGrouping, Signal, TaskMode)
+    from nidaqmx.stream_readers import (AnalogMultiChannelReader)
+from buffers import *
+from decimation import *
+from waveforms import *
+from profiling import profiler
+from threading import Event, Lock
 import time
 
 class NI_DAQ():
@@ -35,10 +45,18 @@ class NI_DAQ():
         self.systemStatus_sample_rate = systemStatus_sample_rate
         self.n_pulses = n_pulses
 
-        self.systemStatusData = {name: np.array([]) for name in self.systemStatus_channels} # analog input will be stored in this data array
+        # analog input will be stored in this buffer, which only keeps a limited history until charging begins
+        self.systemStatusData = RingBuffer(self.systemStatus_channels, systemStatus_buffer_duration * self.systemStatus_sample_rate)
 
         self.tasks = []
         self.closed = False
+        # Timing the discharge tasks were built for, see reset_discharge_trigger
+        self.discharge_tasks_key = None
+        self.arm_latency = None
+
+        self.systemStatus_listeners = []
+        self.discharge_complete = Event()
+        self.discharge_lock = Lock()
 
         self.status_task_names = ['task_systemStatus', 'task_charge_ao', 'task_di']
         self.switch_task_names = ['task_switch_trigger', 'task_switch']
@@ -140,6 +158,13 @@ class NI_DAQ():
             self.task_systemStatus.register_every_n_samples_acquired_into_buffer_event(self._points_to_plot, self.read_callback)
 
     def reset_discharge_trigger(self):
+        arm_start = time.perf_counter()
+        # With persistent tasks, the tasks are only rebuilt when the timing has changed, otherwise they are restarted
+        if PERSISTENT_DAQ_TASKS and self.discharge_tasks_key == self._discharge_timing_key() and self._discharge_tasks_open():
+            self.rearm_discharge_trigger()
+            self._report_arm('re-armed', arm_start)
+            return
+
         # Remove and close prior versions of trigger tasks
         self.remove_tasks(self.trigger_task_names + self.dump_task_names + self.counters_task_names)
 
@@ -221,7 +246,7 @@ class NI_DAQ():
         if len(self.enableHV_channels) > 0:
             low_ticks = int(self.hvStart * samp_freq)
             high_ticks = int(self.dumpDelay * samp_freq)
-            digital_out = np.array([False]* low_ticks + [True] * high_ticks + [False])
+            digital_out = buildPattern((False, low_ticks), (True, high_ticks), (False, 1))
             for name, enableHV_chan in self.enableHV_channels.items():
                 self.task_enableHV.do_channels.add_do_chan(enableHV_chan)
 
@@ -254,16 +279,58 @@ class NI_DAQ():
         self.discharge_reader = AnalogMultiChannelReader(self.task_diagnostics.in_stream)
 
         self.dischargeTriggered = False
+        self.reset_discharge_stream()
+
+        # Stream the discharge into dischargeData in fixed size chunks instead of one read at the end
+        if STREAM_DISCHARGE and n_channels != 0:
+            self.discharge_chunk_size = min(int(samp_freq * discharge_chunk_duration), self.discharge_samps_per_chan)
+            self.discharge_chunk = np.zeros((n_channels, self.discharge_chunk_size))
+            self.task_diagnostics.register_every_n_samples_acquired_into_buffer_event(self.discharge_chunk_size, self.discharge_callback)
+            # The last chunk is usually not full, so it is picked up once the acquisition is done
+            self.task_diagnostics.register_done_event(self.discharge_done_callback)
 
         '''START TASKS'''
         for task_name in self.trigger_task_names + self.dump_task_names + self.counters_task_names:
             task = getattr(self, task_name)
             if len(task.channel_names) != 0:
                 try:
+                    if PERSISTENT_DAQ_TASKS:
+                        # Reserve the resources and program the hardware once, so that restarting the task is quick
+                        task.control(TaskMode.TASK_COMMIT)
+                    task.start()
+                except:
+                    print(task_name)
+
+        self.discharge_tasks_key = self._discharge_timing_key()
+        self._report_arm('built', arm_start)
+
+    def rearm_discharge_trigger(self):
+        # Stopping a committed task returns it to the committed state, so starting it again only re-arms the trigger
+        self.dischargeTriggered = False
+        self.reset_discharge_stream()
+        # The last shot's diagnostics may still be in use, so don't read over them
+        self.dischargeData = np.zeros_like(self.dischargeData)
+        for task_name in self.trigger_task_names + self.dump_task_names + self.counters_task_names:
+            task = getattr(self, task_name)
+            if task in self.tasks and len(task.channel_names) != 0:
+                try:
+                    task.stop()
                     task.start()
                 except:
                     print(task_name)
 
+    def _discharge_timing_key(self):
+        # Everything from set_timing that the discharge tasks are configured with
+        return (self.duration, self.spectrometerDelay, self.hvStart, self.dumpDelay,
+                self.discharge_samples, self.discharge_samps_per_chan, self.pretrigger_samples, self.n_pulses)
+
+    def _discharge_tasks_open(self):
+        return all(getattr(self, task_name, None) in self.tasks for task_name in self.trigger_task_names + self.counters_task_names)
+
+    def _report_arm(self, mode, arm_start):
+        self.arm_latency = time.perf_counter() - arm_start
+        print(f'Discharge tasks {mode} in {self.arm_latency * 1e3:.1f} ms')
+
     def time_callback(self, task_handle, status, callback_data):
         print(f'DAQ has been triggered')
         return 0
@@ -299,18 +366,15 @@ class NI_DAQ():
         n_dump_samples = int(switch_samp_freq * (gasPuffWaitTime + self.dumpDelay))
 
         # Construct digital arrays to pass to the do channels
-        load_list = [True] * n_load_samples
-        dump_list = [True] * n_dump_samples
-        
         # The last element of the array has to be false so the switch is in the normal state
-        load_list[-1] = False
+        load_pattern = buildPattern((True, n_load_samples - 1), (False, 1))
         # The length of the arrays must be the same
-        dump_list += [False] * (n_load_samples - n_dump_samples)
+        dump_pattern = buildPattern((True, n_dump_samples), (False, n_load_samples - n_dump_samples))
 
         # Configure timing to a finite generation
         self.task_switch.timing.cfg_samp_clk_timing(rate=switch_samp_freq, source=f'/{self.output_name}/ai/SampleClock', active_edge=Edge.RISING, sample_mode=AcquisitionType.FINITE, samps_per_chan=n_load_samples)
 
-        self.task_switch.write([load_list, dump_list], auto_start=False)
+        self.task_switch.write(stackPatterns(load_pattern, dump_pattern), auto_start=False)
 
         # When the switch operation has completed, remove tasks
         self.task_switch.register_done_event(self.remove_switch_tasks)
@@ -329,25 +393,85 @@ class NI_DAQ():
     def write_value(self, voltageValue, currentValue):
         self.task_charge_ao.write([voltageValue, currentValue], timeout=2)
 
+    @profiler.timed('NI_DAQ.read')
     def read(self):
         points = self.task_systemStatus.read(number_of_samples_per_channel=self._points_to_plot)
+        # Write into the preallocated buffer in place rather than growing an array every callback
+        self.systemStatusData.append(points)
         values = {}
         for i, name in enumerate(self.systemStatus_channels):
-            self.systemStatusData[name] = np.append(self.systemStatusData[name], points[i])
             values[name] = np.mean(points[i])
 
         return values
 
     def read_callback(self, tTask, event_type, num_samples, callback_data):
         self.read()
+        for listener in self.systemStatus_listeners:
+            listener()
         return 0
 
+    def add_systemStatus_listener(self, listener):
+        # listener() is called from the DAQmx callback thread whenever new system status data has been read
+        self.systemStatus_listeners.append(listener)
+
     def read_discharge(self):
         if not self.dischargeTriggered:
             # Read all discharge data and wait for acquisition to finish
             self.dischargeTriggered = True
-            self.discharge_reader.read_many_sample(self.dischargeData)
+            if STREAM_DISCHARGE:
+                # Chunks are already being read by the callbacks, so only wait for the last one
+                if not self.discharge_complete.wait(timeout=self.duration + pretrigger_duration + discharge_timeout):
+                    print(f'Discharge stream timed out after {self.discharge_samples_read} of {self.discharge_samps_per_chan} samples')
+            else:
+                self.discharge_reader.read_many_sample(self.dischargeData)
+
+        return 0
+
+    def get_discharge(self, nPoints=dischargeSavePoints, method=decimationMethod):
+        '''
+        Return the discharge diagnostics and time axis, decimated to about nPoints samples per channel.
+        '''
+        factor = decimationFactor(self.discharge_samps_per_chan, nPoints)
+        if factor <= 1:
+            return self.dischargeData, self.dischargeTime
+
+        data = decimate(self.dischargeData, factor, method)
+        return data, decimateTime(self.dischargeTime, factor, data.shape[-1])
+
+    def reset_discharge_stream(self):
+        self.discharge_samples_read = 0
+        self.discharge_progress = 0.0
+        self.discharge_complete.clear()
+
+    def read_discharge_chunk(self, n_samples):
+        with self.discharge_lock:
+            start = self.discharge_samples_read
+            n_samples = min(n_samples, self.discharge_samps_per_chan - start)
+            if n_samples <= 0:
+                return
+
+            # The reader needs a contiguous array, so read into the chunk buffer and copy into place
+            if n_samples == self.discharge_chunk_size:
+                chunk = self.discharge_chunk
+            else:
+                chunk = np.zeros((self.dischargeData.shape[0], n_samples))
+            self.discharge_reader.read_many_sample(chunk, number_of_samples_per_channel=n_samples)
+            self.dischargeData[:, start:start + n_samples] = chunk
+
+            self.discharge_samples_read = start + n_samples
+            self.discharge_progress = self.discharge_samples_read / self.discharge_samps_per_chan
+
+        if self.discharge_samples_read == self.discharge_samps_per_chan:
+            self.discharge_complete.set()
+
+    def discharge_callback(self, task_handle, event_type, num_samples, callback_data):
+        self.read_discharge_chunk(num_samples)
+        return 0
 
+    def discharge_done_callback(self, task_handle, status, callback_data):
+        self.read_discharge_chunk(self.discharge_samps_per_chan - self.discharge_samples_read)
+        # Don't leave read_discharge waiting if the task finished with an error
+        self.discharge_complete.set()
         return 0
     
     def remove_tasks(self, task_names):
@@ -379,8 +503,11 @@ class NI_DAQ():
             else:
                 task.stop()
 
-    def reset_systemStatus(self):
-        self.systemStatusData = {name: np.array([]) for name in self.systemStatus_channels} # analog input will be stored in this data array
+    def reset_systemStatus(self, record=False):
+        # When recording, the buffer grows so that the whole charge is kept for saving
+        # Otherwise only the most recent history is kept for the status display
+        capacity = systemStatus_buffer_duration * self.systemStatus_sample_rate
+        self.systemStatusData = RingBuffer(self.systemStatus_channels, capacity, growable=record)
 
     # House-keeping methods follow
     def _task_created(self, task):
@@ -7,6 +7,8 @@ import ttkbootstrap as ttk
 from constants import *
 from ttkbootstrap.themes import standard
 import numpy as np
+from weakref import WeakSet
+from decimation import LevelOfDetail
 
 # Change color cycler for dark mode
 mpl.rcParams['axes.prop_cycle'] = mpl.cycler(color=color_palette) 
@@ -156,6 +158,7 @@ class CustomToolbar(NavigationToolbar2Tk):  # subclass NavigationToolbar2Tk
         # while in the middle of the loop below.
         items = list(nav_info.items())
         for ax, (view, (pos_orig, pos_active)) in items:
+            # Setting the view emits xlim_changed, which swaps in the level of detail for the new limits before relim
             ax._set_view(view)
 
              # Rescale the plot
@@ -168,11 +171,13 @@ class CustomToolbar(NavigationToolbar2Tk):  # subclass NavigationToolbar2Tk
         self.canvas.draw_idle()
 
 class PlotViewer(ttk.Frame):
-    def __init__(self, master, plotData, **kwargs):
+    def __init__(self, master, plotData, loadData=None, **kwargs):
 
         super().__init__(master)
         self.master = master
         self.plotData = plotData
+        # Called with the lines of a plot just before they are drawn, so their data only has to be read once they're shown
+        self.loadData = loadData
 
         # Frame to hold the plot and plot adjustment
         self.parentPlotFrame = ttk.Frame(self.master)
@@ -248,9 +253,48 @@ class PlotViewer(ttk.Frame):
         # Preset discharge timing
         self.dischargeTime = []
         self.dischargeTimeUnit = 's'
+
+        # Min/max pyramids of each line so that long traces are only drawn at the resolution of the screen
+        self.levelOfDetail = {} # {Line: LevelOfDetail}
+        self.levelOfDetailLines = {} # {matplotlib line: LevelOfDetail}
+        self.levelOfDetailAxes = WeakSet() # axes with a callback for changes of the x limits
+        for canvasPlot in [self.plotSingle, self.plotSubplots]:
+            canvasPlot.canvas.mpl_connect('resize_event', lambda event: self.updateLevelOfDetail())
         
         self.replot()
 
+    def plotLine(self, ax, line, **kwargs):
+        # Lines with the same length as the time axis are plotted through their level of detail pyramid
+        if len(line.data) != len(self.dischargeTime) or len(line.data) == 0:
+            return ax.plot(self.dischargeTime, line.data, label=line.label, **kwargs)
+
+        # The pyramid is only rebuilt when new data is set on the line
+        levelOfDetail = self.levelOfDetail.get(line)
+        if levelOfDetail is None or not levelOfDetail.isFor(self.dischargeTime, line.data):
+            levelOfDetail = LevelOfDetail(self.dischargeTime, line.data)
+            self.levelOfDetail[line] = levelOfDetail
+
+        x, y = levelOfDetail.query(levelOfDetail.xArray[0], levelOfDetail.xArray[-1], ax.bbox.width)
+        handle = ax.plot(x, y, label=line.label, **kwargs)
+        self.levelOfDetailLines[handle[0]] = levelOfDetail
+
+        # Re-query whenever the view is zoomed or panned
+        if ax not in self.levelOfDetailAxes:
+            ax.callbacks.connect('xlim_changed', self.updateLevelOfDetail)
+            self.levelOfDetailAxes.add(ax)
+
+        return handle
+
+    def updateLevelOfDetail(self, ax=None):
+        for handle, levelOfDetail in list(self.levelOfDetailLines.items()):
+            # Forget lines that have been removed from the plot
+            if handle.axes is None:
+                del self.levelOfDetailLines[handle]
+            # Twin axes share the x limits but only the axes that was changed gets the callback
+            elif ax is None or handle.axes in ax.get_shared_x_axes().get_siblings(ax):
+                x0, x1 = handle.axes.get_xlim()
+                handle.set_data(*levelOfDetail.query(x0, x1, handle.axes.bbox.width))
+
     def replot(self, event=None):
         # Have to do some weird logic because tkinter doesn't have virtual events
         # for Radiobuttons, but does for comboboxes
@@ -277,6 +321,8 @@ class PlotViewer(ttk.Frame):
         def setup_plots(plotSelection, ax):
             # Change plot to new selection
                 plotProperties = self.plotData[plotSelection]
+                if self.loadData is not None:
+                    self.loadData(plotProperties['lines'])
                 ax.set_title(f'{plotSelection}')
                 ax.set_xlabel(f'Time ({self.dischargeTimeUnit})')
                 ax.set_prop_cycle(None) # Reset the color cycle
@@ -310,21 +356,21 @@ class PlotViewer(ttk.Frame):
                     # try:
                     # Check for twin axis
                     if not plotProperties['twinx']:
-                        handle = ax.plot(self.dischargeTime, line.data, label=line.label, visible=visible)
+                        handle = self.plotLine(ax, line, visible=visible)
                     # Plot second line on twin axis
                     # Can only have a twin axis when there are two lines and no more
                     else:
                         if i == 0:
-                            handle = ax.plot(self.dischargeTime, line.data, label=line.label, visible=visible)
+                            handle = self.plotLine(ax, line, visible=visible)
                         elif i == 1:
                             # Skip first color
                             next(twin_ax._get_lines.prop_cycler)
-                            handle = twin_ax.plot(self.dischargeTime, line.data, label=line.label, visible=visible)
+                            handle = self.plotLine(twin_ax, line, visible=visible)
                         elif i == 2:
                             # Skip first two color
                             next(twin_ax._get_lines.prop_cycler)
                             next(twin_ax._get_lines.prop_cycler)
-                            handle = twin_ax.plot(self.dischargeTime, line.data, label=line.label, visible=visible)
+                            handle = self.plotLine(twin_ax, line, visible=visible)
 
                     if eventType != ttk.Radiobutton:
                         self.currentLines[line.label] = handle[0]
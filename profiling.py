@@ -0,0 +1,144 @@
+'''
+Timing of the hot paths of the apps.
+
+Spans are timed with a context manager or a decorator on the shared profiler, which keeps a ring of the
+recent durations of every span for the latency panel:
+    with profiler.span('updateHVStatus'):
+        updateHVStatus()
+
+    @profiler.timed('saveResults')
+    def saveResults(self):
+
+Every span can also be written to a trace file, one event per line in the Chrome trace event format, which
+Perfetto (ui.perfetto.dev) and chrome://tracing open even if the app stopped before the trace was closed:
+    profiler.startTrace('trace.json')
+    profiler.stopTrace()
+'''
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+from config import *
+
+class _Span():
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+class Profiler():
+    def __init__(self, ringLength=profileRingLength):
+        self.ringLength = ringLength
+        self.rings = {} # {name: deque of the most recent durations (s)}
+        self.counts = {} # {name: number of times timed}
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.traceFile = None
+        self.tracedThreads = set()
+        self.lock = threading.Lock()
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def timed(self, name=None):
+        # Decorator that times every call of a function as a span, named after the function by default
+        def decorator(function):
+            spanName = function.__name__ if name is None else name
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(spanName):
+                    return function(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    def record(self, name, start, duration):
+        '''
+        Add a span that started at start (s, from time.perf_counter) and lasted duration (s).
+        '''
+        ring = self.rings.get(name)
+        if ring is None:
+            ring = self.rings.setdefault(name, deque(maxlen=self.ringLength))
+        # Appending to a deque is atomic, so the duration needs no lock
+        ring.append(duration)
+        # Incrementing the count isn't, so two threads timing the same span could lose one without it
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+        if self.traceFile is not None:
+            self._trace(name, start, duration)
+
+    def _trace(self, name, start, duration):
+        tid = threading.get_native_id()
+        # Span names are identifiers, so the event is formatted directly, which is several times faster than json.dumps
+        event = f'{{"name": "{name}", "ph": "X", "ts": {(start - self.origin) * 1e6:.1f}, "dur": {duration * 1e6:.1f}, "pid": {self.pid}, "tid": {tid}}},\n'
+        with self.lock:
+            if self.traceFile is None:
+                return
+            # Name each thread the first time it shows up so the trace viewer can label its track
+            if tid not in self.tracedThreads:
+                self.tracedThreads.add(tid)
+                metadata = {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': threading.current_thread().name}}
+                self.traceFile.write(json.dumps(metadata) + ',\n')
+            self.traceFile.write(event)
+
+    def startTrace(self, filename):
+        self.stopTrace()
+        with self.lock:
+            self.traceFile = open(filename, 'w', buffering=1 << 16)
+            self.traceFile.write('[\n')
+            self.tracedThreads = set()
+        print(f'Tracing spans to {filename}')
+
+    def stopTrace(self):
+        with self.lock:
+            if self.traceFile is None:
+                return
+            # The trace format allows the array to be left open, so the trailing comma is fine
+            self.traceFile.close()
+            self.traceFile = None
+
+    @property
+    def tracing(self):
+        return self.traceFile is not None
+
+    def stats(self, name):
+        '''
+        {count, last, median, p99, max} of the recent durations of a span in seconds.
+        '''
+        # Copying the ring with list is atomic, so it can't change while the copy is made
+        durations = np.array(list(self.rings[name]))
+        return {'count': self.counts.get(name, len(durations)), 'last': durations[-1], 'median': np.median(durations),
+                'p99': np.percentile(durations, 99), 'max': np.max(durations)}
+
+    def report(self, budget=None):
+        # Table of every span, those that have gone over the budget (s) are marked with !
+        lines = [f'{"span":<24}{"count":>8}{"last":>9}{"median":>9}{"p99":>9}{"max":>9}  (ms)']
+        # Other threads may add spans while the table is made, so the names are copied first, which is atomic
+        for name in sorted(list(self.rings)):
+            stats = self.stats(name)
+            flag = ' !' if budget is not None and stats['max'] > budget else ''
+            lines.append(f'{name:<24}{stats["count"]:>8}' + ''.join(f'{stats[key] * 1e3:>9.2f}' for key in ['last', 'median', 'p99', 'max']) + flag)
+        if budget is not None:
+            lines.append(f'refresh budget {budget * 1e3:.1f} ms')
+
+        return '\n'.join(lines)
+
+    def clear(self):
+        self.rings = {}
+        self.counts = {}
+
+# Shared by the apps and the DAQ so that all of their spans show up in one panel and trace
+profiler = Profiler()
@@ -0,0 +1,105 @@
+'''
+Post-shot readout of the instruments.
+
+After a shot the DAQ, counters, scope and diagnostics computers are all read out. Each source runs on its
+own thread with a deadline measured from the start of the readout, so a slow or missing instrument only
+holds up whoever waits for that source, and the time each source took is reported:
+    readout = Readout('Post-shot readout')
+    readout.add('DAQ', self.NI_DAQ.get_discharge, readoutDeadlines['DAQ'])
+    readout.add('scope', self.scope.read_scope, readoutDeadlines['scope'])
+    readout.start()
+    results = readout.wait(['DAQ'])
+    print(readout.report())
+'''
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from config import *
+
+class Readout():
+    def __init__(self, name='Readout'):
+        self.name = name
+        self.sources = {} # {name: (read, deadline)}
+        self.futures = {}
+        self.timing = {} # {name: {'start': s, 'duration': s}} from the start of the readout
+        self.results = {}
+        self.startTime = None
+
+    def add(self, name, read, deadline):
+        '''
+        Add a source, where read() returns its data and deadline is in seconds from the start of the readout.
+        '''
+        self.sources[name] = (read, deadline)
+
+    def _read(self, name, read):
+        start = time.perf_counter()
+        self.timing[name]['start'] = start - self.startTime
+        try:
+            return read()
+        finally:
+            self.timing[name]['duration'] = time.perf_counter() - start
+
+    def start(self):
+        self.startTime = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=max(len(self.sources), 1), thread_name_prefix='readout')
+        for name, (read, deadline) in self.sources.items():
+            self.timing[name] = {'start': None, 'duration': None}
+            self.futures[name] = executor.submit(self._read, name, read)
+        # Nothing else is submitted, so the threads exit once their sources are read
+        executor.shutdown(wait=False)
+
+        return self
+
+    def wait(self, names=None):
+        '''
+        Wait for the named sources, all of them by default, until their deadlines and return {name: result}.
+        Sources that failed or missed their deadline are left out and show up in the report.
+        '''
+        names = list(self.sources) if names is None else names
+        for name in names:
+            remaining = self.startTime + self.sources[name][1] - time.perf_counter()
+            try:
+                self.results[name] = self.futures[name].result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                print(f'{self.name}: {name} missed its {self.sources[name][1]} s deadline')
+            except Exception as e:
+                print(f'{self.name}: {name} failed: {e}')
+
+        return {name: self.results[name] for name in names if name in self.results}
+
+    def run(self):
+        # Read everything and print the timing, for use on a background thread
+        self.start()
+        results = self.wait()
+        print(self.report())
+        return results
+
+    def done(self, name):
+        return name in self.futures and self.futures[name].done()
+
+    def status(self, name):
+        future = self.futures[name]
+        deadline = self.sources[name][1]
+        if future.done():
+            if future.exception() is not None:
+                return 'failed'
+            timing = self.timing[name]
+            return 'late' if timing['start'] + timing['duration'] > deadline else 'done'
+        elif time.perf_counter() - self.startTime > deadline:
+            return 'late'
+        return 'running'
+
+    def report(self):
+        '''
+        Table of when each source started, how long it took and whether it made its deadline.
+        '''
+        lines = [f'{self.name}:', f'{"source":>20} {"status":>8} {"start (s)":>10} {"took (s)":>10} {"deadline (s)":>13}']
+        for name, timing in self.timing.items():
+            start = f'{timing["start"]:.3f}' if timing['start'] is not None else '-'
+            duration = f'{timing["duration"]:.3f}' if timing['duration'] is not None else '-'
+            lines.append(f'{name:>20} {self.status(name):>8} {start:>10} {duration:>10} {self.sources[name][1]:>13}')
+
+        finished = [timing['start'] + timing['duration'] for timing in self.timing.values() if timing['duration'] is not None]
+        if finished:
+            lines.append(f'{"total":>20} {"":>8} {"":>10} {max(finished):>10.3f}')
+
+        return '\n'.join(lines)
@@ -0,0 +1,182 @@
+'''
+Batch re-analysis of saved shots.
+
+Runs Analysis over every shot in a range of run dates or run numbers on a pool of processes and writes
+the results into the analysis table of the results master as they come in. Each row keeps a hash of the
+inputs of the analysis and of the analysis code, so shots whose data and analysis haven't changed since
+they were last analysed are skipped:
+    python reanalyze.py <save folder> --dates 20240101 20240301
+    python reanalyze.py <save folder> --runs 1200 1500 --workers 8 --force
+'''
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from constants import *
+from config import *
+from analysis import *
+from archive import ShotArchive
+from results_master import ResultsMaster
+from shot_file import *
+
+# Shot variables that go into the analysis, missing delays are zero as in the app
+analysisInputs = ['dischargeTime', 'dischargeTimeUnit', 'dischargeVoltage', 'dischargeCurrent', 'dumpDelay', 'ignitronDelay',
+                  'primaryGasStart', 'hvStart', 'polarity', 'PSCurrent']
+analysisDefaults = {'ignitronDelay': 0, 'hvStart': 0, 'primaryGasStart': 0}
+
+# Changing any of these files or settings changes the results of the analysis
+analysisSources = ['analysis.py', 'fitting.py']
+analysisSettings = (POWER_SUPPLY, ZERO_PHASE_FILTER, cutoff_freq, B0, plasma_radius_inner, plasma_radius_outer, fitMaxPoints)
+
+writeInterval = 1 # s between writes to the results master
+progressInterval = 5 # s between progress reports
+
+def analysisVersion():
+    digest = hashlib.sha1()
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for source in analysisSources:
+        with open(os.path.join(folder, source), 'rb') as file:
+            digest.update(file.read())
+    digest.update(repr(analysisSettings).encode())
+
+    return digest.hexdigest()[:16]
+
+def inputHash(inputs):
+    digest = hashlib.sha1()
+    for variable in sorted(inputs):
+        value = inputs[variable]
+        digest.update(variable.encode())
+        if isinstance(value, np.ndarray):
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(repr(value).encode())
+
+    return digest.hexdigest()[:16]
+
+def loadInputs(filename):
+    variables = loadShot(filename) if filename.endswith(shotFileExtension) else readCSV(filename)
+    inputs = {}
+    for variable in analysisInputs:
+        if variable in variables:
+            inputs[variable] = variables[variable]
+        elif variable in analysisDefaults:
+            inputs[variable] = analysisDefaults[variable]
+
+    return inputs
+
+def analyzeShot(inputs):
+    '''
+    Analyse one shot the same way as the app and return {variable: value} of the analysisVariables it found.
+    '''
+    analysis = Analysis(np.asarray(inputs['dischargeTime'], dtype=float), inputs['dischargeTimeUnit'],
+                        np.asarray(inputs['dischargeVoltage'], dtype=float), np.asarray(inputs['dischargeCurrent'], dtype=float),
+                        float(inputs['dumpDelay']), float(inputs['ignitronDelay']), float(inputs['primaryGasStart']),
+                        float(inputs['hvStart']), inputs['polarity'])
+
+    if POWER_SUPPLY == 'EB-100' and 'PSCurrent' in inputs:
+        analysis.get_deposited_enegry(analysis.filterBank.filter(inputs['PSCurrent']))
+    else:
+        analysis.get_deposited_enegry(analysis.current_filtered)
+
+    return {variable: getattr(analysis, variable) for variable in analysisVariables if hasattr(analysis, variable)}
+
+def analyzeFile(filename, version, previous=None):
+    '''
+    Runs on the worker processes. Returns the analysis results with their hashes, or None if previous,
+    the (input hash, analysis version) of the last analysis, shows nothing has changed.
+    '''
+    inputs = loadInputs(filename)
+    hashes = (inputHash(inputs), version)
+    if hashes == previous:
+        return None
+
+    results = analyzeShot(inputs)
+    results['inputHash'], results['analysisVersion'] = hashes
+
+    return results
+
+def selectShots(archive, dates=None, runs=None):
+    shots = archive.query()
+    shots = shots[shots['runNumber'].notna()]
+    if dates is not None:
+        runDates = shots['runDate'].astype(str)
+        shots = shots[(runDates >= dates[0]) & (runDates <= dates[1])]
+    if runs is not None:
+        shots = shots[(shots['runNumber'] >= runs[0]) & (shots['runNumber'] <= runs[1])]
+
+    return shots
+
+def reanalyze(saveFolder, dates=None, runs=None, workers=None, force=False):
+    '''
+    Analyse the selected shots again and return the number of shots that were analysed, skipped and failed.
+    '''
+    archive = ShotArchive(saveFolder)
+    shots = selectShots(archive, dates, runs)
+    version = analysisVersion()
+
+    resultsMaster = ResultsMaster(saveFolder)
+    variables, rows = resultsMaster.readAnalysis()
+    previous = {}
+    if not force and 'inputHash' in variables and 'analysisVersion' in variables:
+        runIndex, hashIndex, versionIndex = (variables.index(variable) for variable in ['runNumber', 'inputHash', 'analysisVersion'])
+        previous = {row[runIndex]: (row[hashIndex], row[versionIndex]) for row in rows}
+
+    print(f'Analysing {len(shots)} shots with analysis version {version}')
+    counts = {'analysed': 0, 'skipped': 0, 'failed': 0}
+    pending = {}
+    start = lastWrite = lastProgress = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for file, runNumber in zip(shots['file'], shots['runNumber']):
+            runNumber = int(runNumber)
+            futures[executor.submit(analyzeFile, archive.path(file), version, previous.get(runNumber))] = (runNumber, file)
+
+        for future in as_completed(futures):
+            runNumber, file = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f'Could not analyse {file}: {e}')
+                counts['failed'] += 1
+                continue
+
+            if results is None:
+                counts['skipped'] += 1
+            else:
+                pending[runNumber] = results
+                counts['analysed'] += 1
+
+            # Results are written in batches so the database isn't committed once per shot
+            now = time.perf_counter()
+            if pending and now - lastWrite > writeInterval:
+                resultsMaster.writeAnalysisMany(pending)
+                pending = {}
+                lastWrite = now
+            if now - lastProgress > progressInterval:
+                done = sum(counts.values())
+                print(f'{done}/{len(futures)} shots, {done / (now - start):.1f} shots/s')
+                lastProgress = now
+
+    if pending:
+        resultsMaster.writeAnalysisMany(pending)
+    resultsMaster.close()
+
+    duration = time.perf_counter() - start
+    done = sum(counts.values())
+    print(f'{counts["analysed"]} analysed, {counts["skipped"]} unchanged, {counts["failed"]} failed in {duration:.1f} s '
+          f'({done / duration if duration > 0 else 0:.1f} shots/s)')
+
+    return counts
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Analyse saved shots again and store the results in the results master.')
+    parser.add_argument('saveFolder', help='folder with the run date folders and the results master')
+    parser.add_argument('--dates', nargs=2, metavar=('FIRST', 'LAST'), help='range of run dates, as named by their folders')
+    parser.add_argument('--runs', nargs=2, type=int, metavar=('FIRST', 'LAST'), help='range of run numbers')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes, one per CPU by default')
+    parser.add_argument('--force', action='store_true', help='analyse every shot even if it hasn\'t changed')
+    args = parser.parse_args()
+
+    reanalyze(args.saveFolder, args.dates, args.runs, args.workers, args.force)
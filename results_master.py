@@ -0,0 +1,182 @@
+'''
+Results master lookup table.
+
+Every shot adds one row of scalar results (master_columns in config.py) to a SQLite database in the
+save folder. Appending a row, looking up the latest run number and editing the notes of one run no
+longer require reading and rewriting the whole table. The table can still be exported to
+results_master.csv for use in a spreadsheet:
+    python results_master.py <save folder>
+
+The results of the analysis of each run are kept in a separate analysis table, one row per run, so that
+analysing a run again replaces its results.
+'''
+import csv
+import os
+import sqlite3
+import sys
+from threading import Lock
+from config import *
+
+class ResultsMaster():
+    def __init__(self, saveFolder):
+        self.saveFolder = saveFolder
+        self.filename = f'{saveFolder}/{resultsMasterDatabaseName}'
+        self.lock = Lock()
+
+        # The master is written from the save threads as well as the main thread
+        self.connection = sqlite3.connect(self.filename, check_same_thread=False)
+        # Write ahead logging with full syncs means a crash or power cut can never leave a half written table
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=FULL')
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS results (runNumber INTEGER)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS runNumberIndex ON results (runNumber)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS analysis (runNumber INTEGER PRIMARY KEY)')
+        self.columns = [row[1] for row in self.connection.execute('PRAGMA table_info(results)')]
+        self.analysisColumns = [row[1] for row in self.connection.execute('PRAGMA table_info(analysis)')]
+
+        # Bring in the old spreadsheet the first time the database is created
+        csvFilename = f'{saveFolder}/{resultsMasterName}'
+        if self.count() == 0 and os.path.exists(csvFilename):
+            self.importCSV(csvFilename)
+
+    def _addColumns(self, variables, table='results'):
+        columns = self.columns if table == 'results' else self.analysisColumns
+        for variable in variables:
+            if variable not in columns:
+                self.connection.execute(f'ALTER TABLE {table} ADD COLUMN "{variable}"')
+                columns.append(variable)
+
+    def _value(self, variable, value):
+        # Convert numpy scalars to plain python values that sqlite can store
+        if hasattr(value, 'item'):
+            value = value.item()
+        if variable == 'runNumber' and value is not None:
+            value = int(value)
+        return value
+
+    def append(self, row):
+        '''
+        Add the results of one run, where row is a dictionary of {variable: value}.
+        '''
+        self.appendMany([row])
+
+    def appendMany(self, rows):
+        with self.lock, self.connection:
+            for row in rows:
+                self._addColumns(row)
+                variables = list(row)
+                columns = ', '.join(f'"{variable}"' for variable in variables)
+                placeholders = ', '.join('?' for _ in variables)
+                values = [self._value(variable, row[variable]) for variable in variables]
+                self.connection.execute(f'INSERT INTO results ({columns}) VALUES ({placeholders})', values)
+
+    def update(self, runNumber, variable, value):
+        '''
+        Change a single value, such as the shot notes, of an existing run.
+        '''
+        with self.lock, self.connection:
+            self._addColumns([variable])
+            self.connection.execute(f'UPDATE results SET "{variable}" = ? WHERE runNumber = ?', (self._value(variable, value), int(runNumber)))
+
+    def maxRunNumber(self):
+        # Uses the run number index, so this does not depend on the number of runs
+        with self.lock:
+            runNumber, = self.connection.execute('SELECT MAX(runNumber) FROM results').fetchone()
+        return runNumber
+
+    def count(self):
+        with self.lock:
+            count, = self.connection.execute('SELECT COUNT(*) FROM results').fetchone()
+        return count
+
+    def read(self, runNumber):
+        '''
+        Return the results of a run as a dictionary of {variable: value}, or None if it doesn't exist.
+        '''
+        with self.lock:
+            cursor = self.connection.execute('SELECT * FROM results WHERE runNumber = ?', (int(runNumber),))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return {column[0]: value for column, value in zip(cursor.description, row)}
+
+    def writeAnalysis(self, runNumber, results):
+        '''
+        Store the analysis results of a run as a dictionary of {variable: value}, replacing any earlier analysis of it.
+        '''
+        self.writeAnalysisMany({runNumber: results})
+
+    def writeAnalysisMany(self, analyses):
+        # Written in a single transaction, where analyses is {runNumber: {variable: value}}
+        with self.lock, self.connection:
+            for runNumber, results in analyses.items():
+                row = {'runNumber': runNumber, **results}
+                self._addColumns(row, table='analysis')
+                columns = ', '.join(f'"{variable}"' for variable in row)
+                placeholders = ', '.join('?' for _ in row)
+                values = [self._value(variable, value) for variable, value in row.items()]
+                self.connection.execute(f'INSERT OR REPLACE INTO analysis ({columns}) VALUES ({placeholders})', values)
+
+    def readAnalysis(self):
+        '''
+        Return the variables and rows of the analysis table.
+        '''
+        with self.lock:
+            cursor = self.connection.execute('SELECT * FROM analysis')
+            rows = cursor.fetchall()
+        return [column[0] for column in cursor.description], rows
+
+    def importCSV(self, filename):
+        # The spreadsheet uses the descriptive column names, so map them back to variables
+        variables = {name: variable for variable, name in master_columns.items()}
+        rows = []
+        with open(filename, newline='') as file:
+            for csvRow in csv.DictReader(file):
+                row = {}
+                for name, value in csvRow.items():
+                    if value is None or value == '':
+                        continue
+                    for convert in (int, float):
+                        try:
+                            value = convert(value)
+                            break
+                        except ValueError:
+                            pass
+                    row[variables.get(name, name)] = value
+                rows.append(row)
+
+        self.appendMany(rows)
+        print(f'Imported {len(rows)} runs from {filename}')
+
+    def exportCSV(self, filename=None):
+        if filename is None:
+            filename = f'{self.saveFolder}/{resultsMasterName}'
+
+        with self.lock:
+            cursor = self.connection.execute('SELECT * FROM results ORDER BY rowid')
+            variables = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+
+        # Write to a temporary file first so that the spreadsheet is never half written
+        tempFilename = f'{filename}.tmp'
+        with open(tempFilename, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([master_columns.get(variable, variable) for variable in variables])
+            for row in rows:
+                runNumber = row[variables.index('runNumber')]
+                # Keep the zero padded run numbers of the original spreadsheet
+                if runNumber is not None:
+                    row = list(row)
+                    row[variables.index('runNumber')] = f'{runNumber:05d}'
+                writer.writerow(row)
+        os.replace(tempFilename, filename)
+
+        print(f'Exported {len(rows)} runs to {filename}')
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+if __name__ == '__main__':
+    ResultsMaster(sys.argv[1]).exportCSV()
@@ -0,0 +1,78 @@
+'''
+Refresh scheduling of the app windows.
+
+The status indicators and charge plots only change when the DAQ has read new system status data, which is
+every _points_to_plot samples, so refreshing them on a fixed timer mostly draws the same values again.
+The scheduler runs the refresh on the Tk thread once new data has arrived, as told by the DAQ callback
+through a thread safe queue, at most at refreshRate while the app is charging or waiting on a shot and at
+most at idleRefreshRate while it is idle. Without new data the refresh still runs every refreshTimeout, so
+the app keeps working in debug mode or if the DAQ stalls:
+    self.refreshScheduler = RefreshScheduler(self)
+    self.NI_DAQ.add_systemStatus_listener(self.refreshScheduler.dataArrived)
+    self.refreshScheduler.start(self.updateSystemStatus, active=self.refreshActive)
+'''
+import queue
+import time
+from config import *
+from profiling import profiler
+
+class RefreshScheduler():
+    def __init__(self, root, activeRate=refreshRate, idleRate=idleRefreshRate, timeout=refreshTimeout):
+        self.root = root
+        self.activePeriod = 1 / activeRate # s
+        self.idlePeriod = 1 / idleRate # s
+        self.timeout = timeout # s
+        self.refresh = None
+        self.active = None
+        self.arrivals = queue.SimpleQueue() # times at which the DAQ read new data
+        self.pending = None # time at which the oldest data that hasn't been shown yet arrived
+        self.lastRefresh = -float('inf')
+        self.afterId = None
+
+    def dataArrived(self, *args):
+        # Called from the DAQ callback thread, so only the queue is touched
+        self.arrivals.put(time.perf_counter())
+
+    def start(self, refresh, active=lambda: True):
+        '''
+        Run refresh() on the Tk thread from now on, at the active rate whenever active() is True.
+        '''
+        self.refresh = refresh
+        self.active = active
+        self.stop()
+        self._tick()
+
+    def stop(self):
+        if self.afterId is not None:
+            self.root.after_cancel(self.afterId)
+            self.afterId = None
+
+    def wake(self):
+        # Check for new data straight away, for when the app has just become active and would otherwise wait out the idle period
+        if self.afterId is not None:
+            self.root.after_cancel(self.afterId)
+            self.afterId = self.root.after_idle(self._tick)
+
+    def _tick(self):
+        self.afterId = None
+        while True:
+            try:
+                arrival = self.arrivals.get_nowait()
+            except queue.Empty:
+                break
+            if self.pending is None:
+                self.pending = arrival
+
+        try:
+            now = time.perf_counter()
+            if self.pending is not None or now - self.lastRefresh >= self.timeout:
+                if self.pending is not None:
+                    # Time from the DAQ reading the data to it being shown
+                    profiler.record('refreshLatency', self.pending, now - self.pending)
+                self.pending = None
+                self.lastRefresh = now
+                self.refresh()
+        finally:
+            # Keep refreshing even if this refresh failed, the status must stay up to date
+            period = self.activePeriod if self.active() else self.idlePeriod
+            self.afterId = self.root.after(max(int(1000 * period), 1), self._tick)
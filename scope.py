@@ -4,15 +4,22 @@ import time
 import sys
 import traceback as tb
 from tqdm import tqdm
+from decimation import *
 from config import *
 from messages import *
 
 class Oscilloscope():
-    def __init__(self, channels, nPoints=None, memoryDepth='10M', auto_reset=True):
+    def __init__(self, channels, nPoints=scopeSavePoints, memoryDepth='10M', auto_reset=True, packetLength=scopePacketLength, decimationMethod=decimationMethod, resourceName=None):
         self.channels = channels
+        self.resourceName = resourceName # VISA resource of the scope, the first one found if None
         self.nPoints = nPoints
         self.memoryDepth = memoryDepth
+        self.packetLength = packetLength
+        self.decimationMethod = decimationMethod
+        self.nSkip = 1
         self.data = {}
+        self.raw = {} # unscaled bytes read from the scope
+        self.throughput = {} # MB/s of the last read of each channel
 
         self.rm = visa.ResourceManager()
         self.connectInstrument()
@@ -29,8 +36,13 @@ class Oscilloscope():
         print('Oscilloscope has been initialized successfully.')
 
     def connectInstrument(self):
-        instrumentName = self.findIPAddress()
-        self.inst = self.rm.open_resource(instrumentName, timeout=1000, chunk_size=1024000, encoding='latin-1') # bigger timeout for long mem
+        instrumentName = self.resourceName if self.resourceName is not None else self.findIPAddress()
+        # Each packet, plus its block header, arrives in a single VISA read
+        self.inst = self.rm.open_resource(instrumentName, timeout=1000, chunk_size=self.packetLength + 1024, encoding='latin-1') # bigger timeout for long mem
+        # Raw sockets (port 5555, or sim_scope.py) have no end of message signal, so responses end at the newline
+        if instrumentName.upper().endswith('SOCKET'):
+            self.inst.read_termination = '\n'
+            self.inst.write_termination = '\n'
 
     def findIPAddress(self):
         resources = self.rm.list_resources()
@@ -81,12 +93,47 @@ class Oscilloscope():
     def set_runNumber(self, runNumber):
         self.runNumber = runNumber
 
+    def wait_acquisition(self, timeout=readoutDeadlines['scope'], interval=scopePollInterval):
+        '''
+        Poll the trigger status until the single acquisition has been stored, return False if it isn't within timeout
+        '''
+        start = time.perf_counter()
+        while time.perf_counter() - start < timeout:
+            # After :SING the status is WAIT, then TD while acquiring, and STOP once the acquisition is complete
+            if self.inst.query(':TRIG:STAT?').strip().upper() == 'STOP':
+                print(f'Oscilloscope acquisition complete after {time.perf_counter() - start:.2f} s')
+                return True
+            time.sleep(interval)
+
+        return False
+
+    def clear_data(self):
+        # Forget the traces of the last shot so they can't be saved as those of this one
+        self.data = {}
+        self.raw = {}
+        self.throughput = {}
+        for channel_name in self.channels:
+            setattr(self, channel_name, np.array([]))
+        self.time = np.array([])
+        self.data_size = 0
+        self.readSuccess = False
+
     def read_scope(self):
+        # Returns whether the traces of this shot were read
+        self.clear_data()
+
+        # Only start downloading once the acquisition is complete, instead of waiting a fixed time
+        if not self.wait_acquisition():
+            print('Oscilloscope acquisition did not complete')
+            return self.readSuccess
+
         for channel_name in self.channels:
             self.get_data(channel_name)
         if self.readSuccess:
             self.get_time()
 
+        return self.readSuccess
+
     # pull waveform from screen
     def get_data(self, channel_name):
         channel = self.channels[channel_name]
@@ -116,69 +163,48 @@ class Oscilloscope():
             self.inst.write('*WAI')
 
             # check if channel is on
-            active = bool(self.inst.query(f':CHAN{channel}:DISP?').strip())
+            active = bool(int(self.inst.query(f':CHAN{channel}:DISP?').strip()))
 
             # Setup scope to read
             self.inst.write(f':WAV:SOUR CHAN{channel}')
             self.inst.write(':WAV:MODE RAW')
             self.inst.write(':WAV:FORM BYTE')
 
+            # The preamble only needs to be read once per channel, it is the same for every packet
+            wav_pre_str = self.inst.query(':WAV:PRE?')
+            wav_pre_list = wav_pre_str.split(',')
+            self.get_parameters(wav_pre_list)
+
             ### Read data in packets ###
-            start = 1 # starting index
             stop = int(float(self.inst.query(':ACQ:MDEP?').strip())) # stopping index is length of internal memory
-            loopcount = 1 # initialize the loopcount
-            startNum = start # initialize the start of the packet
-            packetLength = 1000000 # number of samples per packet
-
-            # Determine the number of packets to grab
-            if stop - start > packetLength:
-                stopnum = start + packetLength - 1
-                loopcount = int(np.ceil((stop - start + 1) / packetLength))
-            else:
-                stopnum = stop
-
-            # Initialize the start and stop position for the first read
-            self.inst.write(f':WAV:START {startNum}')
-            self.inst.write(f':WAV:STOP {stopnum}')
 
-            # Initialize array to hold read data
-            values = np.zeros(stop)
+            # Accumulate the raw bytes and only convert to voltages once the whole record is read
+            values = np.zeros(stop, dtype=np.uint8)
             print(f'Loading data packets from scope channel: {channel_name}')
+            readStart = time.perf_counter()
             if active:
-                # loop through all the packets
-                for i in tqdm(range(0, loopcount)):
-                    values[i * packetLength:(i + 1) * packetLength] = self.inst.query_binary_values(':WAV:DATA?', datatype='B')
-                    # set the next loop to jump a packet length
-                    if i < loopcount - 2:
-                        startnum = stopnum + 1
-                        stopnum = stopnum + packetLength
-                    # start and stop positions for last loop if packet is not a full size
-                    else:
-                        startnum = stopnum + 1
-                        stopnum = stop
-                    self.inst.write(f':WAV:START {startnum}')
-                    self.inst.write(f':WAV:STOP {stopnum}')
-
-                    # Progress bar
-                    # j = (i + 1) / loopcount
-                    # print('[%-20s] %d%%' % ('='*int(20 * j), 100*j), end='\r')
-                    # sys.stdout.flush()
+                # loop through all the packets, the scope indexes from 1
+                for startnum in tqdm(range(1, stop + 1, self.packetLength)):
+                    stopnum = min(startnum + self.packetLength - 1, stop)
+                    # Set the packet window and ask for the data in one message to save two round trips per packet
+                    self.inst.write(f':WAV:STAR {startnum};:WAV:STOP {stopnum};:WAV:DATA?')
+                    self.read_block(values[startnum - 1:stopnum])
                 print()
 
-            # Convert from binary to actual voltages
-            wav_pre_str = self.inst.query(':WAV:PRE?')
-            wav_pre_list = wav_pre_str.split(',')
-            self.get_parameters(wav_pre_list)
+            readTime = time.perf_counter() - readStart
+            if active and readTime > 0:
+                self.throughput[channel_name] = stop / 1e6 / readTime
+                print(f'Read {stop / 1e6:.1f} MB from {channel_name} in {readTime:.2f} s ({self.throughput[channel_name]:.1f} MB/s)')
 
-            dataarray = (values - self.yref - self.yorigin) * self.yinc
-            self.lenMax = len(dataarray)
+            self.raw[channel_name] = values
+            self.lenMax = len(values)
 
-            # Determine how often to subsample so that the saved file is a reasonable size
-            if self.nPoints is not None:
-                self.nSkip = int(np.round(stop / self.nPoints))
-                self.data[channel_name] = dataarray[::self.nSkip]
-            else:
-                self.data[channel_name] = dataarray
+            # Decimate so that the saved file is a reasonable size
+            # The scaling is linear, so decimate the raw bytes before converting to actual voltages
+            self.nSkip = decimationFactor(stop, self.nPoints)
+            values = decimate(values, self.nSkip, self.decimationMethod)
+
+            self.data[channel_name] = (values - self.yref - self.yorigin) * self.yinc
 
             self.readSuccess = True
 
@@ -191,6 +217,21 @@ class Oscilloscope():
 
         self.data_size = len(self.data[channel_name])
 
+    def read_block(self, out):
+        '''
+        Read one IEEE 488.2 definite length block (#<n><length><data>) straight into the uint8 array out
+        '''
+        header = self.inst.read_bytes(2)
+        nDigits = int(header[1:2])
+        length = int(self.inst.read_bytes(nDigits))
+        block = self.inst.read_bytes(length, chunk_size=self.inst.chunk_size)
+        out[:length] = np.frombuffer(block, dtype=np.uint8)
+
+        # Consume the terminating newline so it isn't read as the start of the next response
+        self.inst.read_bytes(1)
+
+        return length
+
     def get_parameters(self, wav_pre_list):
         self.format = int(wav_pre_list[0])
         if self.format == 0:
@@ -223,20 +264,22 @@ class Oscilloscope():
         # self.timeOffset = float(self.inst.query('TIM:OFFS?').strip())
         # self.timeScale = float(self.inst.query('TIM:SCAL?').strip())
         if self.readSuccess:
-            self.time = np.linspace(self.xorigin, self.xorigin + (self.lenMax - 1) * self.xinc, self.data_size)
+            # Every decimated sample k is at the time of raw sample k * nSkip
+            self.time = self.xorigin + self.xinc * self.nSkip * np.arange(self.data_size)
         else:
             self.time = np.array([])
-        # self.time = self.time[::self.nSkip]
         # Now, generate a time axis.
         # timeBlocks = 5 # number of blocks on screen on time axis
         # self.time = np.linspace(self.timeOffset - timeBlocks * self.timeScale, self.timeOffset + timeBlocks * self.timeScale, num=self.data_size)
 
         try:
             # See if we should use a different time axis
-            if (max(np.abs(self.time)) < 1e-3):
+            # np.max rather than max, which iterates over a full record in Python
+            timeMax = np.max(np.abs(self.time))
+            if (timeMax < 1e-3):
                 self.time = self.time * 1e6
                 self.tUnit = 'us'
-            elif (max(np.abs(self.time)) < 1):
+            elif (timeMax < 1):
                 self.time = self.time * 1e3
                 self.tUnit = 'ms'
             else:
@@ -0,0 +1,262 @@
+'''
+Binary storage for a single shot.
+
+A shot is saved as an uncompressed NumPy .npz archive with one dataset per array variable in
+single_columns, keyed by the variable name. Scalars are kept together as attributes in a JSON
+header, and evenly sampled time axes are stored as (start, step, length) instead of a full array.
+
+Existing CMFX_XXXXX.csv files can be converted with:
+    python shot_file.py <folder or csv files>
+
+LazyShot opens either format without reading its arrays, which are then read one channel at a time
+as they are needed.
+'''
+import json
+import os
+import struct
+import sys
+import zipfile
+from threading import Lock
+import numpy as np
+from config import *
+
+shotFileExtension = '.npz'
+shotFileVersion = 1
+
+# Time axes that are stored as start and step when they are evenly sampled
+timeVariables = ['dischargeTime', 'chargeTime']
+
+def _scalar(value):
+    # Convert numpy scalars to plain python values so that they can be written as JSON
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, bytes):
+        value = value.decode()
+    return value
+
+def _timeAxis(time):
+    time = np.asarray(time, dtype=float)
+    if len(time) < 2:
+        return None
+
+    step = (time[-1] - time[0]) / (len(time) - 1)
+    # Only store the axis parametrically if the reconstruction is exact to within rounding
+    if step == 0 or not np.allclose(np.diff(time), step, rtol=1e-6, atol=0):
+        return None
+
+    return [float(time[0]), float(step), len(time)]
+
+def saveShot(filename, variables):
+    '''
+    Save a dictionary of {variable: value} to filename.
+    Variables are classified as scalars or arrays using single_columns, unknown variables by their shape.
+    '''
+    header = {'version': shotFileVersion, 'scalars': {}, 'time': {}}
+    arrays = {}
+    for variable, value in variables.items():
+        if variable in single_columns:
+            isScalar = single_columns[variable]['type'] == 'scalar'
+        else:
+            isScalar = np.ndim(value) == 0
+
+        if isScalar:
+            header['scalars'][variable] = _scalar(value)
+            continue
+
+        value = np.asarray(value)
+        if variable in timeVariables:
+            axis = _timeAxis(value)
+            if axis is not None:
+                header['time'][variable] = axis
+                continue
+
+        arrays[variable] = value
+
+    # Write to a temporary file first so that a crash never leaves a half written shot behind
+    tempFilename = f'{filename}.tmp'
+    with open(tempFilename, 'wb') as file:
+        np.savez(file, __header__=np.array(json.dumps(header)), **arrays)
+    os.replace(tempFilename, filename)
+
+def loadShot(filename):
+    '''
+    Load a shot file saved with saveShot and return a dictionary of {variable: value}.
+    '''
+    with np.load(filename, allow_pickle=False) as shot:
+        header = json.loads(str(shot['__header__']))
+        variables = dict(header['scalars'])
+        for variable in shot.files:
+            if variable != '__header__':
+                variables[variable] = shot[variable]
+
+    for variable, (start, step, length) in header['time'].items():
+        variables[variable] = start + step * np.arange(length)
+
+    return variables
+
+def updateShot(filename, **scalars):
+    '''
+    Change scalar values, such as the shot notes, of an existing shot file.
+    '''
+    variables = loadShot(filename)
+    variables.update(scalars)
+    saveShot(filename, variables)
+
+def readCSV(filename):
+    '''
+    Read a shot saved in the original CSV format and return a dictionary of {variable: value}.
+    '''
+    import pandas as pd
+    results_df = pd.read_csv(filename, low_memory=False)
+
+    variables = {}
+    for variable, description in single_columns.items():
+        if description['name'] in results_df:
+            if description['type'] == 'scalar':
+                variables[variable] = results_df[description['name']].values[0]
+            else:
+                variables[variable] = results_df[description['name']].dropna().values
+
+    return variables
+
+def convertCSV(filename):
+    '''
+    Convert a CMFX_XXXXX.csv shot to the binary format next to the original file.
+    '''
+    shotFilename = f'{os.path.splitext(filename)[0]}{shotFileExtension}'
+    saveShot(shotFilename, readCSV(filename))
+
+    return shotFilename
+
+def isShotCSV(filename):
+    name = os.path.basename(filename)
+    return name.startswith('CMFX_') and name.endswith('.csv') and not name.endswith('_scope.csv')
+
+class LazyShot():
+    '''
+    Shot file whose scalars are read when it is opened and whose arrays are read when they are first asked for:
+        shot = LazyShot(filename)
+        shot.runNumber, shot.dischargeVoltage
+        shot.load(['dischargeTime', 'dischargeCurrent'])
+    Arrays of a binary shot are read straight from their offset in the archive. Arrays of a CSV are read
+    together with usecols, which still scans the file but only converts the columns that are asked for,
+    so a CSV is read through its binary file instead once it has been converted with convertCSV.
+    '''
+    def __init__(self, filename):
+        binaryFilename = f'{os.path.splitext(filename)[0]}{shotFileExtension}'
+        if not filename.endswith(shotFileExtension) and os.path.exists(binaryFilename) and os.path.getmtime(binaryFilename) >= os.path.getmtime(filename):
+            filename = binaryFilename
+        self.filename = filename
+        self.lock = Lock()
+        self.arrays = {} # arrays that have been read
+        if filename.endswith(shotFileExtension):
+            self._openShot()
+        else:
+            self._openCSV()
+
+    def _openShot(self):
+        self.members = {} # {variable: (offset, dtype, shape, fortran order)}, None for compressed members
+        with zipfile.ZipFile(self.filename) as archive, open(self.filename, 'rb') as file:
+            header = json.loads(str(np.lib.format.read_array(archive.open('__header__.npy'), allow_pickle=False)))
+            for info in archive.infolist():
+                variable = info.filename[:-len('.npy')]
+                if variable == '__header__':
+                    continue
+                if info.compress_type != zipfile.ZIP_STORED:
+                    self.members[variable] = None
+                    continue
+
+                # The data of a stored member follows its local header, whose name and extra field lengths are at bytes 26 to 29
+                file.seek(info.header_offset)
+                nameLength, extraLength = struct.unpack('<HH', file.read(30)[26:30])
+                file.seek(info.header_offset + 30 + nameLength + extraLength)
+                version = np.lib.format.read_magic(file)
+                if version == (1, 0):
+                    shape, fortranOrder, dtype = np.lib.format.read_array_header_1_0(file)
+                else:
+                    shape, fortranOrder, dtype = np.lib.format.read_array_header_2_0(file)
+                self.members[variable] = (file.tell(), dtype, shape, fortranOrder)
+
+        self.scalars = header['scalars']
+        self.timeAxes = header['time']
+        self.arrayVariables = list(self.members) + list(self.timeAxes)
+
+    def _openCSV(self):
+        import pandas as pd
+        names = list(pd.read_csv(self.filename, nrows=0).columns)
+        self.columnNames = {variable: description['name'] for variable, description in single_columns.items() if description['name'] in names}
+
+        scalarNames = {name: variable for variable, name in self.columnNames.items() if single_columns[variable]['type'] == 'scalar'}
+        results_df = pd.read_csv(self.filename, nrows=1, usecols=list(scalarNames))
+        self.scalars = {scalarNames[name]: results_df[name].values[0] for name in results_df.columns} if len(results_df) else {}
+        self.timeAxes = {}
+        self.arrayVariables = [variable for variable in self.columnNames if single_columns[variable]['type'] == 'array']
+
+    def _readShot(self, variables):
+        arrays = {}
+        for variable in variables:
+            if variable in self.timeAxes:
+                start, step, length = self.timeAxes[variable]
+                arrays[variable] = start + step * np.arange(length)
+            elif self.members[variable] is None:
+                with np.load(self.filename, allow_pickle=False) as shot:
+                    arrays[variable] = shot[variable]
+            else:
+                offset, dtype, shape, fortranOrder = self.members[variable]
+                data = np.fromfile(self.filename, dtype=dtype, count=int(np.prod(shape)), offset=offset)
+                arrays[variable] = data.reshape(shape, order='F' if fortranOrder else 'C')
+        return arrays
+
+    def _readCSV(self, variables):
+        import pandas as pd
+        results_df = pd.read_csv(self.filename, usecols=[self.columnNames[variable] for variable in variables])
+        return {variable: results_df[self.columnNames[variable]].dropna().values for variable in variables}
+
+    def load(self, variables):
+        '''
+        Return {variable: value} of the variables that are in the shot, reading the arrays that haven't been read yet.
+        '''
+        with self.lock:
+            missing = [variable for variable in variables if variable in self.arrayVariables and variable not in self.arrays]
+            if missing:
+                self.arrays.update(self._readShot(missing) if self.filename.endswith(shotFileExtension) else self._readCSV(missing))
+
+        values = {}
+        for variable in variables:
+            if variable in self.scalars:
+                values[variable] = self.scalars[variable]
+            elif variable in self.arrays:
+                values[variable] = self.arrays[variable]
+        return values
+
+    def isLoaded(self, variable):
+        return variable in self.scalars or variable in self.arrays
+
+    def variables(self):
+        return list(self.scalars) + self.arrayVariables
+
+    def __contains__(self, variable):
+        return variable in self.scalars or variable in self.arrayVariables
+
+    def __getitem__(self, variable):
+        if variable not in self:
+            raise KeyError(variable)
+        return self.load([variable])[variable]
+
+    def __getattr__(self, variable):
+        # Only called for attributes that haven't been set, which makes every variable of the shot an attribute
+        if variable.startswith('_') or 'arrayVariables' not in self.__dict__ or variable not in self:
+            raise AttributeError(variable)
+        return self[variable]
+
+if __name__ == '__main__':
+    filenames = []
+    for path in sys.argv[1:]:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                filenames += [os.path.join(root, name) for name in sorted(files) if isShotCSV(name)]
+        else:
+            filenames.append(path)
+
+    for filename in filenames:
+        print(f'{filename} -> {convertCSV(filename)}')
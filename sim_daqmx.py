@@ -0,0 +1,684 @@
+'''
+Simulated NI-DAQmx backend.
+
+Implements the part of the nidaqmx API that ni_daq.py and the apps use (tasks, channels, timing,
+triggers, every N samples and done events, the multi-channel reader and task control) on top of a
+model of the test cart, so the whole charge -> trigger -> save -> analyze cycle can be run and
+profiled without the PXI chassis. Set SIMULATED_DAQ = True in config.py to use it in place of nidaqmx.
+
+Samples are generated in real time on a thread per running task, and callbacks are made from those
+threads just like the DAQmx driver threads:
+    - system status inputs follow an RC charge of the capacitor through the current limited supply
+      set by the analog outputs
+    - discharge diagnostics at samp_freq show the capacitor discharging through the plasma and the
+      dump after the trigger, with the dump time taken from the length of the acquisition
+
+Nothing triggers the tasks by itself. The pulse generator's trigger on PFI0 is simulated with trigger().
+The digital lines of config.py are kept in shared memory, so that another process, such as the fault
+watchdog, sees the same lines once it has been handed them with device.share_lines(device.lines.array).
+'''
+import multiprocessing
+import time
+from collections import deque
+from enum import Enum
+from threading import Condition, Event, Lock, Thread
+import numpy as np
+from config import *
+
+READ_ALL_AVAILABLE = -1
+
+class AcquisitionType(Enum):
+    FINITE = 10178
+    CONTINUOUS = 10123
+    HW_TIMED_SINGLE_POINT = 12522
+
+class Edge(Enum):
+    RISING = 10280
+    FALLING = 10171
+
+class TriggerType(Enum):
+    ANALOG_EDGE = 10099
+    DIGITAL_EDGE = 10150
+    DIGITAL_LEVEL = 10152
+    NONE = 10230
+
+class Level(Enum):
+    HIGH = 10192
+    LOW = 10214
+
+class LineGrouping(Enum):
+    CHAN_PER_LINE = 0
+    CHAN_FOR_ALL_LINES = 1
+
+class Signal(Enum):
+    SAMPLE_CLOCK = 12487
+    SAMPLE_COMPLETE = 12530
+    START_TRIGGER = 12488
+    REFERENCE_TRIGGER = 12490
+
+class TaskMode(Enum):
+    TASK_START = 0
+    TASK_STOP = 1
+    TASK_VERIFY = 2
+    TASK_COMMIT = 3
+    TASK_RESERVE = 4
+    TASK_UNRESERVE = 5
+    TASK_ABORT = 6
+
+class DaqError(Exception):
+    pass
+
+# Model of the discharge circuit
+sim_noise = 2e-3 # V rms on every analog input
+sim_plasma_resistance = 1000 # Ohms
+sim_dump_impedance = 20 # Ohms
+sim_dump_tau = 0.02 # s, decay of the dump current
+sim_dump_rise = 1e-3 # s, rise of the dump current
+sim_settle_tau = 0.5 # s, power supply regulation once it reaches the set voltage
+sim_leak_tau = 600 # s, self discharge of the isolated capacitor
+sim_neutron_rate = 2e4 # counts per second at full voltage
+sim_commit_time = 5e-3 # s to reserve and program the hardware for a task, which start() does for tasks that aren't committed
+
+class SharedLines():
+    '''
+    Digital line states by physical channel, like a dict, where the lines of config.py are kept in an array
+    that can be shared with other processes. Lines that haven't been written read as unset, -1 in the array.
+    '''
+    def __init__(self, array=None):
+        channels = sorted(set(di_defaults.values()) | set(do_defaults.values()) | set(enableHV_defaults.values()))
+        self.index = {channel: i for i, channel in enumerate(channels)}
+        if array is None:
+            array = multiprocessing.RawArray('b', [-1] * len(channels))
+        self.array = array
+        self.local = {} # any other lines, only seen by this process
+
+    def get(self, channel, default=None):
+        if channel in self.index:
+            value = self.array[self.index[channel]]
+            return default if value < 0 else bool(value)
+        return self.local.get(channel, default)
+
+    def __getitem__(self, channel):
+        value = self.get(channel)
+        if value is None:
+            raise KeyError(channel)
+        return value
+
+    def __setitem__(self, channel, value):
+        if channel in self.index:
+            self.array[self.index[channel]] = bool(value)
+        else:
+            self.local[channel] = bool(value)
+
+    def __contains__(self, channel):
+        return self.get(channel) is not None
+
+class SimulatedDevice():
+    '''
+    State of the simulated chassis shared by all tasks: analog output set points, digital lines,
+    the charge on the capacitor and the running tasks that wait for a trigger.
+    '''
+    def __init__(self):
+        self.lock = Lock()
+        self.tasks = []
+        self.lines = SharedLines() # digital line states by physical channel
+        self.ao = {} # analog output values by physical channel
+        self.capacitorVoltage = 0.0 # V
+        self.supplyVoltage = 0.0 # V, output of the power supply
+        self.chargeCurrent = 0.0 # A
+        self.lastUpdate = time.perf_counter()
+        self.shotVoltage = 0.0 # V, capacitor voltage at the last trigger
+        self.lastTrigger = None
+
+    def share_lines(self, array):
+        # Use the digital lines of another process, from its device.lines.array
+        self.lines = SharedLines(array)
+
+    def _setpoints(self):
+        voltageSet = self.ao.get(charge_ao_defaults.get('Voltage Set'), 0.0)
+        currentSet = self.ao.get(charge_ao_defaults.get('Current Set'), 0.0)
+        voltage = voltageSet / maxAnalogInput * maxVoltagePowerSupply[POWER_SUPPLY]
+        # Supplies that don't take a current set point charge at their maximum current
+        if currentSet > 0:
+            current = currentSet / maxAnalogInput * maxCurrentPowerSupply[POWER_SUPPLY]
+        else:
+            current = maxCurrentPowerSupply[POWER_SUPPLY]
+        return voltage, current
+
+    def advance(self, now):
+        # Integrate the charging circuit up to now in steps of at most 1 ms
+        with self.lock:
+            elapsed = now - self.lastUpdate
+            if elapsed <= 0:
+                return
+            self.lastUpdate = now
+
+            voltageSet, currentLimit = self._setpoints()
+            C = capacitance * 1e-6
+            switch = do_defaults.get('Power Supply Switch')
+            connected = self.lines.get(switch, True) if switch is not None else True
+            nSteps = int(np.ceil(elapsed / 1e-3))
+            dt = elapsed / nSteps
+            for _ in range(nSteps):
+                if connected:
+                    # Current limited until close to the set point, then regulated
+                    dV = np.clip((voltageSet - self.capacitorVoltage) * dt / sim_settle_tau, -currentLimit / C * dt, currentLimit / C * dt)
+                    self.capacitorVoltage += dV
+                    self.supplyVoltage = self.capacitorVoltage
+                    self.chargeCurrent = C * dV / dt
+                else:
+                    self.supplyVoltage += (voltageSet - self.supplyVoltage) * min(dt / 0.1, 1)
+                    self.capacitorVoltage *= np.exp(-dt / sim_leak_tau)
+                    self.chargeCurrent = 0.0
+
+    def status_sample(self, name):
+        # Value of a system status input in volts at the DAQ, the inverse of the scaling done in the apps
+        if name == 'Power Supply Voltage':
+            return self.supplyVoltage / maxVoltagePowerSupply[POWER_SUPPLY] * maxAnalogInput
+        elif name == 'Power Supply Current':
+            # The apps add 10 V to this reading
+            return self.chargeCurrent / maxCurrentPowerSupply[POWER_SUPPLY] * maxAnalogInput - 10
+        elif name == 'Capacitor Voltage':
+            return self.capacitorVoltage / voltageDivider
+        return 0.0
+
+    def discharge_samples(self, names, t, t_dump):
+        '''
+        Diagnostics in volts at the DAQ for times t (s) relative to the trigger, with the dump at t_dump.
+        '''
+        sign = -1 if POLARITY == 'Negative' else 1
+        V0 = self.shotVoltage
+        plasma_tau = sim_plasma_resistance * capacitance * 1e-6
+        V_dump = V0 * np.exp(-t_dump / plasma_tau)
+
+        after = t >= t_dump
+        during = (t >= 0) & ~after
+        voltage = np.full(len(t), V0)
+        voltage[during] = V0 * np.exp(-t[during] / plasma_tau)
+        voltage[after] = V_dump * np.exp(-(t[after] - t_dump) / sim_dump_tau)
+        plasmaCurrent = np.where(during, voltage / sim_plasma_resistance, 0.0)
+        dumpCurrent = np.zeros(len(t))
+        dumpCurrent[after] = V_dump / sim_dump_impedance * (1 - np.exp(-(t[after] - t_dump) / sim_dump_rise)) * np.exp(-(t[after] - t_dump) / sim_dump_tau)
+        light = np.where(during, voltage / max(V0, 1), 0.0)
+
+        data = np.zeros((len(names), len(t)))
+        for i, name in enumerate(names):
+            if name == 'dischargeVoltage' or name == 'feedthroughVoltage':
+                data[i] = sign * voltage / voltageDivider
+            elif name == 'dischargeCurrent':
+                # The dump current flows the other way to the plasma current
+                data[i] = sign * (plasmaCurrent - dumpCurrent) * pearsonCoilDischarge
+            elif name == 'feedthroughCurrent':
+                data[i] = sign * plasmaCurrent * pearsonCoilDischarge
+            elif name == 'dumpCurrent':
+                data[i] = dumpCurrent * 1e-3
+            elif name == 'chamberProtectionCurrent':
+                data[i] = plasmaCurrent * 1e-2
+            elif name == 'PSVoltage':
+                data[i] = -voltage / maxVoltagePowerSupply[POWER_SUPPLY] * maxAnalogInput
+            elif name == 'PSCurrent':
+                data[i] = plasmaCurrent / maxCurrentPowerSupply[POWER_SUPPLY] * maxAnalogInput
+            elif name.startswith('DIODE'):
+                data[i] = light
+            else:
+                data[i] = 0.05 * light * np.sin(2 * np.pi * 5e3 * t)
+        data += sim_noise * np.random.randn(*data.shape)
+
+        return data
+
+    def trigger(self, source=None):
+        now = time.perf_counter()
+        self.advance(now)
+        with self.lock:
+            # The capacitor is emptied by the shot
+            self.shotVoltage = abs(self.capacitorVoltage)
+            self.capacitorVoltage = 0.0
+            self.lastTrigger = now
+            tasks = list(self.tasks)
+
+        for task in tasks:
+            task._trigger(source, now)
+
+device = SimulatedDevice()
+
+def trigger(source=None):
+    '''
+    Send a rising edge to every task waiting on source, or on any terminal if source is None.
+    '''
+    device.trigger(source)
+
+def _matches(terminal, source):
+    return source is None or terminal is None or terminal.strip('/').lower() == source.strip('/').lower()
+
+class _Channel():
+    def __init__(self, kind, physical_channel, name, **kwargs):
+        self.kind = kind
+        self.physical_channel = physical_channel
+        self.name = name or physical_channel
+        self.min_val = kwargs.get('min_val', -10.0)
+        self.max_val = kwargs.get('max_val', 10.0)
+        self.properties = kwargs
+
+class _ChannelCollection():
+    def __init__(self, task, kind):
+        self._task = task
+        self._kind = kind
+
+    def _add(self, physical_channel, name='', **kwargs):
+        channel = _Channel(self._kind, physical_channel, name, **kwargs)
+        self._task._channels.append(channel)
+        return channel
+
+    def add_ai_voltage_chan(self, physical_channel, name_to_assign_to_channel='', **kwargs):
+        return self._add(physical_channel, name_to_assign_to_channel, **kwargs)
+
+    def add_ao_voltage_chan(self, physical_channel, name_to_assign_to_channel='', **kwargs):
+        return self._add(physical_channel, name_to_assign_to_channel, **kwargs)
+
+    def add_di_chan(self, lines, name_to_assign_to_lines='', line_grouping=LineGrouping.CHAN_PER_LINE):
+        return self._add(lines, name_to_assign_to_lines, line_grouping=line_grouping)
+
+    def add_do_chan(self, lines, name_to_assign_to_lines='', line_grouping=LineGrouping.CHAN_PER_LINE):
+        return self._add(lines, name_to_assign_to_lines, line_grouping=line_grouping)
+
+    def add_ci_count_edges_chan(self, counter, name_to_assign_to_channel='', **kwargs):
+        return self._add(counter, name_to_assign_to_channel, **kwargs)
+
+    def add_co_pulse_chan_freq(self, counter, name_to_assign_to_channel='', freq=1.0, duty_cycle=0.5, initial_delay=0.0, **kwargs):
+        return self._add(counter, name_to_assign_to_channel, freq=freq, duty_cycle=duty_cycle, initial_delay=initial_delay, **kwargs)
+
+    @property
+    def channel_names(self):
+        return [channel.name for channel in self._task._channels if channel.kind == self._kind]
+
+class _Channels():
+    # task.channels, which applies a property to every channel of the task
+    def __init__(self, task):
+        self._task = task
+        self.co_pulse_term = ''
+
+    @property
+    def ci_count(self):
+        return self._task._count()
+
+class _Timing():
+    def __init__(self):
+        self.rate = None
+        self.source = ''
+        self.sample_mode = None
+        self.samps_per_chan = 1000
+
+    def cfg_samp_clk_timing(self, rate, source='', active_edge=Edge.RISING, sample_mode=AcquisitionType.FINITE, samps_per_chan=1000):
+        self.rate = rate
+        self.source = source or ''
+        self.sample_mode = sample_mode
+        self.samps_per_chan = int(samps_per_chan)
+
+    def cfg_implicit_timing(self, sample_mode=AcquisitionType.FINITE, samps_per_chan=1000):
+        self.sample_mode = sample_mode
+        self.samps_per_chan = int(samps_per_chan)
+
+class _Trigger():
+    def __init__(self):
+        self.terminal = None
+        self.pretrigger_samples = 0
+        self.dig_edge_src = None
+        self.trig_type = TriggerType.NONE
+        self.dig_lvl_src = None
+        self.dig_lvl_when = None
+
+    def cfg_dig_edge_start_trig(self, trigger_source, trigger_edge=Edge.RISING):
+        self.terminal = trigger_source
+        self.trig_type = TriggerType.DIGITAL_EDGE
+
+    def cfg_dig_edge_ref_trig(self, trigger_source, pretrigger_samples=2, trigger_edge=Edge.RISING):
+        self.terminal = trigger_source
+        self.pretrigger_samples = int(pretrigger_samples)
+        self.trig_type = TriggerType.DIGITAL_EDGE
+
+    @property
+    def configured(self):
+        return self.trig_type != TriggerType.NONE
+
+class _Triggers():
+    def __init__(self):
+        self.start_trigger = _Trigger()
+        self.reference_trigger = _Trigger()
+        self.arm_start_trigger = _Trigger()
+        self.pause_trigger = _Trigger()
+
+class _InStream():
+    def __init__(self, task):
+        self._task = task
+
+class Task():
+    '''
+    Simulated nidaqmx.Task. Only one kind of channel is used per task, as with the real driver.
+    '''
+    def __init__(self, new_task_name=''):
+        self.name = new_task_name
+        self._channels = []
+        self.ai_channels = _ChannelCollection(self, 'ai')
+        self.ao_channels = _ChannelCollection(self, 'ao')
+        self.di_channels = _ChannelCollection(self, 'di')
+        self.do_channels = _ChannelCollection(self, 'do')
+        self.ci_channels = _ChannelCollection(self, 'ci')
+        self.co_channels = _ChannelCollection(self, 'co')
+        self.channels = _Channels(self)
+        self.timing = _Timing()
+        self.triggers = _Triggers()
+        self.in_stream = _InStream(self)
+
+        self._every_n = None # (n, callback)
+        self._done_callback = None
+        self._output = None
+        self._buffer = deque()
+        self._available = 0 # samples in the buffer
+        self._acquired = 0 # samples acquired since the start
+        self._condition = Condition()
+        self._running = False
+        self._done = True
+        self._stop = Event()
+        self._triggered = Event()
+        self._triggerTime = None
+        self._thread = None
+        self._closed = False
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def channel_names(self):
+        return [channel.name for channel in self._channels]
+
+    @property
+    def _kind(self):
+        return self._channels[0].kind if self._channels else None
+
+    # Events
+    def register_every_n_samples_acquired_into_buffer_event(self, sample_interval, callback_method):
+        self._every_n = (int(sample_interval), callback_method) if callback_method is not None else None
+
+    def register_every_n_samples_transferred_from_buffer_event(self, sample_interval, callback_method):
+        pass
+
+    def register_done_event(self, callback_method):
+        self._done_callback = callback_method
+
+    def register_signal_event(self, signal_type, callback_method):
+        pass
+
+    # Task state
+    def control(self, action):
+        if action in (TaskMode.TASK_COMMIT, TaskMode.TASK_RESERVE, TaskMode.TASK_VERIFY):
+            if not self.committed:
+                time.sleep(sim_commit_time)
+            self.committed = True
+        elif action == TaskMode.TASK_UNRESERVE:
+            self.committed = False
+        elif action == TaskMode.TASK_START:
+            self.start()
+        elif action in (TaskMode.TASK_STOP, TaskMode.TASK_ABORT):
+            self.stop()
+
+    def is_task_done(self):
+        return self._done
+
+    def start(self):
+        if self._closed:
+            raise DaqError(f'Task {self.name} has been closed')
+        if self._running:
+            raise DaqError(f'Task {self.name} is already running')
+        # Tasks that aren't committed are committed on every start and uncommitted again when they stop
+        if not self.committed:
+            time.sleep(sim_commit_time)
+
+        self._running = True
+        self._done = False
+        self._stop.clear()
+        self._triggered.clear()
+        self._triggerTime = None
+        with self._condition:
+            self._buffer.clear()
+            self._available = 0
+            self._acquired = 0
+
+        with device.lock:
+            device.tasks.append(self)
+
+        # Tasks without a trigger or an external clock start straight away
+        if not self._waits_for_trigger():
+            self._triggerTime = time.perf_counter()
+            self._triggered.set()
+
+        if self._kind in ('ai', 'co', 'ci') or (self._kind == 'do' and self.timing.rate is not None):
+            self._thread = Thread(target=self._run, name=f'sim {self.name or self._kind} task', daemon=True)
+            self._thread.start()
+        else:
+            self._done = True
+
+    def stop(self):
+        self._stop.set()
+        self._triggered.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=1)
+        self._thread = None
+        self._running = False
+        self._done = True
+        with device.lock:
+            if self in device.tasks:
+                device.tasks.remove(self)
+
+    def close(self):
+        if not self._closed:
+            self.stop()
+            self._closed = True
+
+    def _waits_for_trigger(self):
+        return (self.triggers.start_trigger.configured or self.triggers.reference_trigger.configured
+                or 'SampleClock' in self.timing.source)
+
+    def _trigger(self, source, now):
+        if not self._running or self._triggered.is_set():
+            return
+        terminal = self.triggers.reference_trigger.terminal or self.triggers.start_trigger.terminal
+        if _matches(terminal, source):
+            self._triggerTime = now
+            self._triggered.set()
+
+    # Acquisition
+    def _run(self):
+        rate = self.timing.rate or 1000.0
+        finite = self.timing.sample_mode == AcquisitionType.FINITE
+        total = self.timing.samps_per_chan
+        chunk = self._every_n[0] if self._every_n is not None else max(int(rate * 0.01), 1)
+
+        # Finite tasks with a reference trigger acquire continuously until the trigger
+        self._triggered.wait()
+        if self._stop.is_set():
+            return
+        start = self._triggerTime
+
+        if self._kind == 'co':
+            channel = self._channels[0]
+            duration = channel.properties.get('initial_delay', 0) + total / channel.properties.get('freq', 1.0)
+            if not self._stop.wait(max(start + duration - time.perf_counter(), 0)):
+                self._finish()
+            return
+
+        if self._kind in ('ci', 'do'):
+            if self._kind == 'do' and self._output is not None and len(self._output[0]) > 0:
+                duration = len(self._output[0]) / rate
+            else:
+                duration = total / rate
+            if finite and not self._stop.wait(max(start + duration - time.perf_counter(), 0)):
+                if self._kind == 'do' and self._output is not None:
+                    self._set_lines([values[-1] for values in self._output])
+                self._finish()
+            return
+
+        pretrigger = self.triggers.reference_trigger.pretrigger_samples if self.triggers.reference_trigger.configured else 0
+        # Pretrigger samples were acquired before the trigger, so they are available straight away
+        index = 0
+        while not self._stop.is_set() and (not finite or index < total):
+            n = chunk if not finite else min(chunk, total - index)
+            # Samples after the trigger become available in real time
+            due = start + (index + n - pretrigger) / rate
+            delay = due - time.perf_counter()
+            if delay > 0 and self._stop.wait(delay):
+                break
+
+            t = (index + np.arange(n) - pretrigger) / rate
+            self._push(self._generate(t, start, finite))
+            index += n
+
+            if self._every_n is not None and self._acquired % self._every_n[0] == 0:
+                self._every_n[1](self, 1, self._every_n[0], None)
+
+        if finite and index >= total:
+            self._finish()
+
+    def _generate(self, t, start, finite):
+        names = self.channel_names
+        if finite and self.triggers.reference_trigger.configured:
+            # Discharge, the dump happens post_dump_duration before the end of the acquisition
+            t_dump = self.timing.samps_per_chan / self.timing.rate - self.triggers.reference_trigger.pretrigger_samples / self.timing.rate - post_dump_duration
+            data = device.discharge_samples(names, t, max(t_dump, 0))
+        elif finite:
+            # Dummy inputs that only provide a sample clock for other tasks
+            data = sim_noise * np.random.randn(len(names), len(t))
+        else:
+            data = np.zeros((len(names), len(t)))
+            for j, time_point in enumerate(start + t):
+                device.advance(time_point)
+                data[:, j] = [device.status_sample(name) for name in names]
+            data += sim_noise * np.random.randn(*data.shape)
+
+        for i, channel in enumerate(self._channels):
+            np.clip(data[i], channel.min_val, channel.max_val, out=data[i])
+        return data
+
+    def _push(self, data):
+        with self._condition:
+            self._buffer.append(data)
+            self._available += data.shape[1]
+            self._acquired += data.shape[1]
+            self._condition.notify_all()
+
+    def _finish(self):
+        self._done = True
+        with self._condition:
+            self._condition.notify_all()
+        if self._done_callback is not None:
+            self._done_callback(self, 0, None)
+
+    def _count(self):
+        # Counts from the neutron detectors since the trigger
+        if self._triggerTime is None or not self._triggered.is_set():
+            return 0
+        rate = self.timing.rate or samp_freq
+        duration = min(time.perf_counter() - self._triggerTime, self.timing.samps_per_chan / rate)
+        return int(np.random.poisson(sim_neutron_rate * device.shotVoltage / maxVoltagePowerSupply[POWER_SUPPLY] * duration))
+
+    def _read_samples(self, n, timeout):
+        # Wait for n samples, or for the acquisition to finish when reading all available samples
+        deadline = time.perf_counter() + timeout
+        with self._condition:
+            while True:
+                if n == READ_ALL_AVAILABLE:
+                    finite = self.timing.sample_mode == AcquisitionType.FINITE
+                    if not finite or self._done:
+                        n = self._available
+                        break
+                elif self._available >= n:
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or self._stop.is_set():
+                    raise DaqError(f'Timed out waiting for {n} samples from task {self.name}, {self._available} available')
+                self._condition.wait(remaining)
+
+            out = np.zeros((len(self._channels), n))
+            filled = 0
+            while filled < n:
+                data = self._buffer[0]
+                take = min(n - filled, data.shape[1])
+                out[:, filled:filled + take] = data[:, :take]
+                filled += take
+                if take == data.shape[1]:
+                    self._buffer.popleft()
+                else:
+                    self._buffer[0] = data[:, take:]
+            self._available -= n
+
+        return out
+
+    def read(self, number_of_samples_per_channel=READ_ALL_AVAILABLE, timeout=10.0):
+        if self._kind == 'di':
+            with device.lock:
+                values = [bool(device.lines.get(channel.physical_channel, False)) for channel in self._channels]
+            return values if len(values) > 1 else values[0]
+
+        n = 1 if number_of_samples_per_channel == READ_ALL_AVAILABLE and self.timing.rate is None else number_of_samples_per_channel
+        data = self._read_samples(n, timeout)
+        if len(self._channels) == 1:
+            return data[0].tolist()
+        return data.tolist()
+
+    def _set_lines(self, values):
+        with device.lock:
+            for channel, value in zip(self._channels, values):
+                device.lines[channel.physical_channel] = bool(value)
+
+    def write(self, data, auto_start=True, timeout=10.0):
+        data = np.asarray(data)
+        if self._kind == 'ao':
+            device.advance(time.perf_counter())
+            with device.lock:
+                for channel, value in zip(self._channels, np.atleast_1d(data)):
+                    device.ao[channel.physical_channel] = float(value)
+            return 1
+
+        if self._kind == 'do':
+            # Timed outputs are played after the trigger, on demand outputs are set straight away
+            if self.timing.rate is not None:
+                self._output = np.atleast_2d(data)
+                return self._output.shape[1]
+            self._set_lines(np.atleast_1d(data))
+            return 1
+
+        raise DaqError(f'Cannot write to {self._kind} task {self.name}')
+
+class AnalogMultiChannelReader():
+    def __init__(self, task_in_stream):
+        self._task = task_in_stream._task
+
+    def read_many_sample(self, data, number_of_samples_per_channel=READ_ALL_AVAILABLE, timeout=10.0):
+        if number_of_samples_per_channel == READ_ALL_AVAILABLE and self._task.timing.sample_mode == AcquisitionType.FINITE:
+            # Read the whole acquisition, which is what the real reader does for a finite task
+            number_of_samples_per_channel = data.shape[1]
+        samples = self._task._read_samples(number_of_samples_per_channel, timeout)
+        data[:, :samples.shape[1]] = samples
+        return samples.shape[1]
+
+# nidaqmx.task.Task and nidaqmx.constants.X are also used to refer to the same classes
+class task():
+    Task = Task
+
+class constants():
+    AcquisitionType = AcquisitionType
+    Edge = Edge
+    TriggerType = TriggerType
+    Level = Level
+    LineGrouping = LineGrouping
+    Signal = Signal
+    TaskMode = TaskMode
+    READ_ALL_AVAILABLE = READ_ALL_AVAILABLE
+
+class errors():
+    DaqError = DaqError
@@ -0,0 +1,277 @@
+'''
+Simulated Rigol MSO5000 oscilloscope.
+
+A SCPI server on a local TCP socket that answers the commands scope.py sends, so that packet length and
+memory depth can be tuned without the scope:
+    - :WAV:SOUR/MODE/FORM/STAR/STOP/PRE? and :WAV:DATA?, which returns an IEEE 488.2 block (#9<length><bytes>\\n)
+    - :ACQ:MDEP and :ACQ:MDEP?, :CHAN<n>:DISP?, :SING, :RUN, :STOP, :CLE, :TRIG:STAT?, *WAI, *OPC? and *IDN?
+    - every other header in Rigol_MSO5000_SCPI_Commands.txt is stored when set and returned when queried
+Headers can be given in short (:WAV:STAR) or long (:WAVeform:STARt) form. Unknown headers are put on the
+error queue that :SYST:ERR? reads, as on the real scope.
+
+latency is added before every response and bandwidth (bytes/s) limits how fast responses are sent, to
+mimic the LAN link to the scope. Connect with Oscilloscope(channels, resourceName=scope.resourceName).
+
+Run a server on its own with: python sim_scope.py [port]
+'''
+import itertools
+import os
+import re
+import socketserver
+import sys
+import time
+from threading import Lock, Thread
+import numpy as np
+
+scopeCommandsFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Rigol_MSO5000_SCPI_Commands.txt')
+scopeSocketPort = 5555 # raw SCPI port of the MSO5000
+memoryDepths = {'1K': 1e3, '10K': 1e4, '100K': 1e5, '1M': 1e6, '10M': 1e7, '25M': 2.5e7, '50M': 5e7, '100M': 1e8, '200M': 2e8}
+sendChunkSize = 65536 # bytes sent at a time when the bandwidth is limited
+patternLength = 1000000 # samples before the simulated waveform repeats
+
+# Commands scope.py uses that aren't in the command table
+extraCommands = [':RUN', ':STOP', ':SINGle', ':CLEar', ':TFORce']
+
+def _nodeForms(node):
+    # CHANnel1 can be sent as CHAN1 or CHANNEL1
+    match = re.fullmatch(r'([A-Z*]*)([a-z]*)(\d*)', node)
+    if match is None:
+        return [node.upper()]
+    short, rest, suffix = match.groups()
+    return sorted({short + suffix, (short + rest).upper() + suffix})
+
+def loadCommands(filename=scopeCommandsFile):
+    '''
+    Return {header as sent: canonical header} for every form of every header in the command table.
+    Headers are upper case without the trailing ? and nodes in [] are optional.
+    '''
+    headers = set(extraCommands)
+    with open(filename) as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) > 1 and (fields[1].startswith(':') or fields[1].startswith('[:')):
+                headers.add(fields[1].rstrip('?'))
+
+    aliases = {}
+    for header in headers:
+        nodes = re.findall(r'(\[?):([A-Za-z]+\d*)\]?', header)
+        canonical = ''.join(f':{node}' for _, node in nodes)
+        options = []
+        for optional, node in nodes:
+            forms = [f':{form}' for form in _nodeForms(node)]
+            options.append(forms + [''] if optional else forms)
+        for parts in itertools.product(*options):
+            aliases.setdefault(''.join(parts), canonical)
+
+    return aliases
+
+class ScopeConnection(socketserver.StreamRequestHandler):
+    # One connection from a VISA session, each line is a message of commands separated by ;
+    def handle(self):
+        scope = self.server
+        while True:
+            message = self.rfile.readline()
+            if not message:
+                break
+
+            responses = []
+            for command in message.decode('latin-1').strip().split(';'):
+                if command.strip():
+                    response = scope.execute(command.strip())
+                    if response is not None:
+                        responses.append(response)
+
+            if not responses:
+                continue
+            if scope.latency > 0:
+                time.sleep(scope.latency)
+            # Text responses to the queries in one message come back together, separated by ;
+            text = [response for response in responses if isinstance(response, str)]
+            if text:
+                self.send(f'{";".join(text)}\n'.encode('latin-1'))
+            for response in responses:
+                if not isinstance(response, str):
+                    self.send(response)
+
+    def send(self, data):
+        data = memoryview(data).cast('B')
+        if self.server.bandwidth is None:
+            self.connection.sendall(data)
+            return
+
+        start = time.perf_counter()
+        for i in range(0, len(data), sendChunkSize):
+            self.connection.sendall(data[i:i + sendChunkSize])
+            delay = start + (i + sendChunkSize) / self.server.bandwidth - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+class SimulatedScope(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, port=scopeSocketPort, host='127.0.0.1', memoryDepth='10M', latency=0.0, bandwidth=None, triggerDelay=0.0, nChannels=4):
+        super().__init__((host, port), ScopeConnection)
+        self.latency = latency # s
+        self.bandwidth = bandwidth # bytes/s, None is as fast as the socket allows
+        self.triggerDelay = triggerDelay # s after :SING before the scope triggers itself, None waits for trigger()
+        self.nChannels = nChannels
+        self.aliases = loadCommands()
+        self.lock = Lock()
+
+        self.settings = {':TIMebase:MAIN:SCALe': '1.000000E-02', ':TIMebase:MAIN:OFFSet': '0.000000E+00',
+                         ':WAVeform:SOURce': 'CHAN1', ':WAVeform:MODE': 'NORM', ':WAVeform:FORMat': 'BYTE'}
+        for channel in range(1, nChannels + 1):
+            self.settings[f':CHANnel{channel}:DISPlay'] = '1'
+            self.settings[f':CHANnel{channel}:SCALe'] = '1.000000E+00'
+            self.settings[f':CHANnel{channel}:OFFSet'] = '0.000000E+00'
+        self.setMemoryDepth(memoryDepth)
+        self.start = 1
+        self.stop = self.memoryDepth
+        self.errors = []
+        self.status = 'STOP'
+        self.armTime = None
+        self.waveforms = {}
+        self.patterns = {}
+
+    @property
+    def resourceName(self):
+        host, port = self.server_address
+        return f'TCPIP0::{host}::{port}::SOCKET'
+
+    def run(self):
+        Thread(target=self.serve_forever, name='sim scope', daemon=True).start()
+        return self
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+    def setMemoryDepth(self, memoryDepth):
+        memoryDepth = str(memoryDepth).strip().upper()
+        if memoryDepth in memoryDepths:
+            self.memoryDepth = int(memoryDepths[memoryDepth])
+        else:
+            self.memoryDepth = int(float(memoryDepth))
+        self.waveforms = {}
+
+    def trigger(self):
+        with self.lock:
+            if self.status == 'WAIT':
+                self.status = 'STOP'
+                self.waveforms = {}
+
+    def _triggerStatus(self):
+        if self.status == 'WAIT' and self.triggerDelay is not None and time.perf_counter() - self.armTime >= self.triggerDelay:
+            self.status = 'STOP'
+            self.waveforms = {}
+        return self.status
+
+    def waveform(self, source):
+        # Raw bytes of a channel for the last acquisition, a noisy decaying oscillation around mid scale
+        # that repeats every patternLength samples, so that deep memory is quick to fill
+        if source not in self.patterns:
+            t = np.arange(patternLength) / patternLength
+            channel = int(re.sub(r'\D', '', source) or 1)
+            pattern = 128 + 80 * np.exp(-3 * t) * np.sin(2 * np.pi * 20 * channel * t) + 4 * np.random.randn(patternLength)
+            self.patterns[source] = np.clip(pattern, 0, 255).astype(np.uint8)
+        if source not in self.waveforms:
+            self.waveforms[source] = np.resize(self.patterns[source], self.memoryDepth)
+        return self.waveforms[source]
+
+    def preamble(self):
+        source = self.settings[':WAVeform:SOURce']
+        channel = int(re.sub(r'\D', '', source) or 1)
+        timeScale = float(self.settings[':TIMebase:MAIN:SCALe'])
+        timeOffset = float(self.settings[':TIMebase:MAIN:OFFSet'])
+        verticalScale = float(self.settings.get(f':CHANnel{channel}:SCALe', 1))
+        verticalOffset = float(self.settings.get(f':CHANnel{channel}:OFFSet', 0))
+        if self.settings[':WAVeform:MODE'].upper().startswith('RAW'):
+            mode, points = 2, self.memoryDepth
+        else:
+            mode, points = 0, min(self.memoryDepth, 1000)
+        # format, type, points, count, xincrement, xorigin, xreference, yincrement, yorigin, yreference
+        xinc = 10 * timeScale / self.memoryDepth
+        yinc = 10 * verticalScale / 256
+        return f'0,{mode},{points},1,{xinc:.6E},{timeOffset - 5 * timeScale:.6E},0,{yinc:.6E},{verticalOffset / yinc:.6E},127'
+
+    def data(self):
+        # IEEE 488.2 definite length block of bytes start to stop, which the scope counts from 1
+        source = self.settings[':WAVeform:SOURce']
+        values = self.waveform(source)[self.start - 1:self.stop]
+        return b''.join([f'#9{len(values):09d}'.encode('latin-1'), values.tobytes(), b'\n'])
+
+    def execute(self, command):
+        '''
+        Run one command and return its response, None for commands that don't have one.
+        '''
+        header, _, argument = command.partition(' ')
+        argument = argument.strip()
+        query = header.endswith('?')
+        header = header.rstrip('?').upper()
+
+        # Common commands
+        if header.startswith('*'):
+            if header == '*IDN':
+                return 'RIGOL TECHNOLOGIES,MSO5104,SIMULATED,00.01.03'
+            elif header == '*OPC':
+                return '1' if query else None
+            elif header in ('*WAI', '*CLS', '*RST'):
+                if header == '*CLS':
+                    self.errors = []
+                return None
+            self.errors.append('-113,"Undefined header"')
+            return None
+
+        if not header.startswith(':'):
+            header = f':{header}'
+        canonical = self.aliases.get(header)
+        if canonical is None:
+            self.errors.append('-113,"Undefined header"')
+            return '' if query else None
+
+        with self.lock:
+            if canonical == ':WAVeform:DATA':
+                return self.data()
+            elif canonical == ':WAVeform:PREamble':
+                return self.preamble()
+            elif canonical == ':SYSTem:ERRor':
+                return self.errors.pop(0) if self.errors else '0,"No error"'
+            elif canonical == ':TRIGger:STATus':
+                return self._triggerStatus()
+            elif canonical == ':ACQuire:MDEPth':
+                if query:
+                    return f'{self.memoryDepth:.6E}'
+                self.setMemoryDepth(argument)
+                self.stop = min(self.stop, self.memoryDepth)
+            elif canonical == ':WAVeform:STARt':
+                if query:
+                    return str(self.start)
+                self.start = min(max(int(float(argument)), 1), self.memoryDepth)
+            elif canonical == ':WAVeform:STOP':
+                if query:
+                    return str(self.stop)
+                self.stop = min(max(int(float(argument)), 1), self.memoryDepth)
+            elif canonical == ':SINGle':
+                self.status = 'WAIT'
+                self.armTime = time.perf_counter()
+            elif canonical == ':RUN':
+                self.status = 'RUN'
+            elif canonical == ':STOP':
+                self.status = 'STOP'
+            elif canonical in (':CLEar', ':TFORce'):
+                if canonical == ':TFORce' and self.status == 'WAIT':
+                    self.status = 'STOP'
+                    self.waveforms = {}
+            elif query:
+                return self.settings.get(canonical, '0')
+            else:
+                self.settings[canonical] = argument
+
+        return None
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else scopeSocketPort
+    scope = SimulatedScope(port)
+    print(f'Simulated scope on {scope.resourceName}')
+    scope.serve_forever()
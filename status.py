@@ -0,0 +1,100 @@
+'''
+Change detecting model of the power supply and interlock status.
+
+The digital inputs are read once per refresh and packed into a bitmask with one bit per line, in the order
+of the di channels. Only the indicators of lines that changed since the last read are redrawn, and each
+change is logged with its time so that the log can be saved with the shot:
+    self.statusModel = StatusModel(self.di_Pins, invertedLines=powerSupplyIndicatorLabels[POWER_SUPPLY])
+    for name, state in self.statusModel.update(self.NI_DAQ.task_di.read()):
+        self.booleanIndicators[name].set(state)
+
+While the lines can't be read, the indicators show an unknown state rather than the last read:
+    for name in self.statusModel.invalidate():
+        self.booleanIndicators[name].set(None)
+
+Text and other values shown in widgets are only set when they differ from what is shown:
+    self.statusModel.setText(self.voltagePSText, f'Power Supply V: {voltage:.2f} kV')
+    if self.statusModel.changed('progressBar', value):
+        self.progressBar.configure(amountused=value)
+'''
+import time
+
+class StatusModel():
+    def __init__(self, lines, invertedLines=()):
+        self.lines = list(lines)
+        # Lines whose indicator is on when the input is low, such as the power supply faults
+        self.invertMask = self.pack([line in invertedLines for line in self.lines])
+        self.mask = None # indicator states, bit i for line i, None until the first read
+        self.transitions = [] # (time, line, state) of every change since the last reset
+        self.shown = {} # {key: value} last shown in each widget
+
+    @staticmethod
+    def pack(states):
+        mask = 0
+        for i, state in enumerate(states):
+            if state:
+                mask |= 1 << i
+        return mask
+
+    def update(self, states, timestamp=None):
+        '''
+        Take the states of the lines as read from the DAQ and return [(line, indicator state)] of those that changed,
+        every line on the first read. Changes after the first read are logged.
+        '''
+        states = states if isinstance(states, list) else [states]
+        mask = self.pack(states) ^ self.invertMask
+        if mask == self.mask:
+            return []
+
+        if self.mask is None:
+            changed = (1 << len(self.lines)) - 1
+        else:
+            changed = mask ^ self.mask
+            timestamp = time.time() if timestamp is None else timestamp
+        self.mask = mask
+
+        changes = []
+        for i, line in enumerate(self.lines):
+            if changed >> i & 1:
+                state = bool(mask >> i & 1)
+                changes.append((line, state))
+                if timestamp is not None:
+                    self.transitions.append((timestamp, line, state))
+
+        return changes
+
+    def invalidate(self):
+        '''
+        Forget the indicator states, for when the lines can't be read, and return the lines whose indicators showed
+        a state. The next read is taken as the first, so it sets every indicator again without being logged.
+        '''
+        if self.mask is None:
+            return []
+        self.mask = None
+        return list(self.lines)
+
+    def state(self, line):
+        return self.mask is not None and bool(self.mask >> self.lines.index(line) & 1)
+
+    def changed(self, key, value):
+        # Whether value differs from what was last shown for key, which is then remembered as shown
+        if key in self.shown and self.shown[key] == value:
+            return False
+        self.shown[key] = value
+        return True
+
+    def setText(self, variable, text):
+        if self.changed(str(variable), text):
+            variable.set(text)
+
+    def transitionLog(self):
+        # One line per change, as saved with the shot
+        return [f'{time.strftime("%H:%M:%S", time.localtime(timestamp))}.{int(timestamp % 1 * 1000):03d} {line}: {"on" if state else "off"}'
+                for timestamp, line, state in self.transitions]
+
+    def reset(self):
+        # Start a new log and show everything again, for when the widgets have been set elsewhere
+        # The next read is taken as the first, so it sets every indicator without being logged
+        self.mask = None
+        self.transitions = []
+        self.shown = {}
@@ -0,0 +1,183 @@
+'''
+Fault watchdog for the power supply and interlocks.
+
+Reads the digital inputs at watchdogRate in its own process. A thread of the app would share the GIL with
+the Tk thread and stall for as long as a plot is drawn or a shot analysed, while a process is scheduled by
+the operating system whatever the app is doing. While armed, every read is checked against the fault
+conditions of the power supply, {indicator: indicator state that is a fault} in faultConditions, with the
+lines of the power supply indicators inverted as on the status panel. The conditions of latched lines, such
+as the HV On readback that lags Enable HV, only apply once the line has been read without a fault since
+arming.
+
+On the first fault the watchdog process disarms and switches Enable HV off itself, then tells the app, which
+calls onFault(faults) from a thread of its own to ramp down the supply and carry out the rest of the shutdown:
+    self.watchdog = FaultWatchdog(self.di_Pins, powerSupplyIndicatorLabels[POWER_SUPPLY], faultConditions[POWER_SUPPLY],
+                                  {**self.do_Pins, **self.enableHV_Pins}['Enable HV'], self.faultOff)
+    self.watchdog.start()
+    self.watchdog.arm()
+
+The reaction time, from the last read without a fault to Enable HV being switched off, is measured in the
+watchdog process and recorded as the faultReaction span.
+'''
+import multiprocessing
+import threading
+import time
+from config import *
+from profiling import profiler
+from status import StatusModel
+
+class FaultConditions():
+    '''
+    Fault conditions of the power supply as bitmasks over the lines, bit i for line i.
+    '''
+    def __init__(self, lines, invertedLines, conditions, latchedLines=latchedFaultConditions):
+        self.lines = list(lines)
+        self.invertMask = StatusModel.pack([line in invertedLines for line in self.lines])
+        # Lines whose indicator is a fault when on and when off, conditions on lines that aren't read are ignored
+        self.faultOnMask = StatusModel.pack([conditions.get(line) is True for line in self.lines])
+        self.faultOffMask = StatusModel.pack([conditions.get(line) is False for line in self.lines])
+        self.latchMask = StatusModel.pack([line in latchedLines for line in self.lines])
+        self.seenMask = 0 # latched lines that have been read without a fault since the last reset
+
+    def reset(self):
+        self.seenMask = 0
+
+    def check(self, states):
+        # Indicators of the lines that are faults in this read
+        mask = StatusModel.pack(states) ^ self.invertMask
+        faultMask = (mask & self.faultOnMask) | (~mask & self.faultOffMask)
+        self.seenMask |= self.latchMask & ~faultMask
+        faultMask &= ~self.latchMask | self.seenMask
+        return [line for i, line in enumerate(self.lines) if faultMask >> i & 1]
+
+def _watch(pins, conditions, enableHVLine, period, shared, faultQueue, simulatedLines):
+    '''
+    Body of the watchdog process.
+    '''
+    # The backend is chosen by the app, since the simulated one may have been selected after config was read
+    if simulatedLines is not None:
+        import sim_daqmx as daqmx
+        daqmx.device.share_lines(simulatedLines)
+    else:
+        import nidaqmx as daqmx
+
+    task = daqmx.Task()
+    for name, pin in pins.items():
+        task.di_channels.add_di_chan(pin, name_to_assign_to_lines=name)
+
+    generation = 0
+    lastClear = nextRead = time.perf_counter()
+    while not shared['stop'].is_set():
+        # Arming starts a new generation, whose latched lines have to be read without a fault again
+        # armed is read first, arm() moves on the generation before setting it
+        armed = shared['armed'].value
+        if shared['generation'].value != generation:
+            generation = shared['generation'].value
+            conditions.reset()
+
+        try:
+            states = task.read()
+            states = states if isinstance(states, list) else [states]
+            shared['states'][:] = states
+            shared['statesTime'].value = time.time()
+            faults = conditions.check(states)
+        except Exception as e:
+            # The interlocks can't be seen, which is treated as a fault, and the last read is no longer their state
+            shared['statesTime'].value = 0
+            faults = [f'Digital input read failed: {e}']
+
+        if faults and armed:
+            shared['armed'].value = False
+            faultTime = time.time()
+            try:
+                with daqmx.Task() as output:
+                    output.do_channels.add_do_chan(enableHVLine)
+                    output.write(False)
+            except Exception as e:
+                print(f'Watchdog could not switch Enable HV off: {e}')
+            faultQueue.put((faults, faultTime, lastClear, time.perf_counter() - lastClear))
+        elif not faults:
+            lastClear = time.perf_counter()
+
+        # Keep to the read rate, without trying to catch up after a stall
+        # time.sleep is used since it has a finer resolution than waiting on an event on Windows
+        nextRead = max(nextRead + period, time.perf_counter())
+        time.sleep(max(nextRead - time.perf_counter(), 0))
+
+    task.close()
+
+class FaultWatchdog():
+    def __init__(self, lines, invertedLines, conditions, enableHVLine, onFault, rate=watchdogRate, latchedLines=latchedFaultConditions, simulated=None):
+        self.pins = dict(lines)
+        self.conditions = FaultConditions(self.pins, invertedLines, conditions, latchedLines)
+        self.enableHVLine = enableHVLine
+        self.onFault = onFault
+        self.period = 1 / rate # s
+        self.simulated = SIMULATED_DAQ if simulated is None else simulated
+
+        self.shared = {'armed': multiprocessing.Value('b', False),
+                       'generation': multiprocessing.Value('i', 0),
+                       'states': multiprocessing.Array('b', len(self.pins)),
+                       'statesTime': multiprocessing.Value('d', 0.0), # time.time() of the latest read, 0 before the first and while reads fail
+                       'stop': multiprocessing.Event()}
+        self.faultQueue = multiprocessing.Queue()
+        self.faults = [] # indicators that were faults when the watchdog last tripped
+        self.faultTime = None # time.time() at which it last tripped
+        self.reactionTime = None # s, of the last trip
+        self.clearTime = None # time.perf_counter() of the last read without a fault before the last trip
+        self.process = None
+        self.thread = None
+
+    def start(self):
+        simulatedLines = None
+        if self.simulated:
+            import sim_daqmx
+            simulatedLines = sim_daqmx.device.lines.array
+        self.shared['stop'].clear()
+        self.process = multiprocessing.Process(target=_watch, name='watchdog', daemon=True,
+                                               args=(self.pins, self.conditions, self.enableHVLine, self.period, self.shared, self.faultQueue, simulatedLines))
+        self.process.start()
+        self.thread = threading.Thread(target=self._receiveFaults, name='watchdog', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.disarm()
+        self.shared['stop'].set()
+        if self.process is not None:
+            self.process.join(timeout=1)
+        if self.thread is not None:
+            self.faultQueue.put(None)
+            self.thread.join()
+
+    def arm(self):
+        print('Fault watchdog armed')
+        # The watchdog process resets the latched lines when it sees the new generation
+        with self.shared['generation'].get_lock():
+            self.shared['generation'].value += 1
+        self.shared['armed'].value = True
+
+    def disarm(self):
+        self.shared['armed'].value = False
+
+    @property
+    def armed(self):
+        return bool(self.shared['armed'].value)
+
+    @property
+    def states(self):
+        # Latest read of the lines, None before the first and while reads fail
+        if self.shared['statesTime'].value == 0:
+            return None
+        return [bool(state) for state in self.shared['states']]
+
+    def _receiveFaults(self):
+        # HV is already off when a fault arrives, the rest of the shutdown is left to onFault
+        while True:
+            message = self.faultQueue.get()
+            if message is None:
+                return
+            self.faults, self.faultTime, self.clearTime, self.reactionTime = message
+            profiler.record('faultReaction', self.clearTime, self.reactionTime)
+            print(f'Fault: {", ".join(self.faults)}')
+            print(f'Enable HV switched off {self.reactionTime * 1e3:.1f} ms after the last read without a fault')
+            self.onFault(self.faults)
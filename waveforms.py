@@ -0,0 +1,39 @@
+'''
+Output patterns for the digital and analog output tasks.
+
+A pattern is a list of segments of constant value, each lasting a whole number of sample clock ticks:
+    buildPattern((False, low_ticks), (True, high_ticks), (False, 1))
+is low for low_ticks samples, high for high_ticks and ends low. The pattern is built with np.repeat, so
+a 10 s pulse at 100 kHz never goes through a million element Python list.
+'''
+import numpy as np
+
+def buildPattern(*segments, dtype=bool):
+    '''
+    Return the pattern made of (value, ticks) segments as an array of dtype.
+    '''
+    values = np.array([value for value, _ in segments], dtype=dtype)
+    durations = np.array([ticks for _, ticks in segments], dtype=int)
+    if np.any(durations < 0):
+        raise ValueError(f'Segments must last zero or more ticks, got {durations.tolist()}')
+
+    return np.repeat(values, durations)
+
+def pulsePattern(start, stop, length, high=True, low=False, dtype=bool):
+    '''
+    Pattern of length ticks that is high from tick start up to, but not including, tick stop.
+    '''
+    start = min(max(start, 0), length)
+    stop = min(max(stop, start), length)
+    return buildPattern((low, start), (high, stop - start), (low, length - stop), dtype=dtype)
+
+def stackPatterns(*patterns):
+    '''
+    Stack the patterns for the lines of one task into a (lines, samples) array, as task.write expects.
+    All patterns must be the same length.
+    '''
+    lengths = {len(pattern) for pattern in patterns}
+    if len(lengths) > 1:
+        raise ValueError(f'All lines must have the same number of samples, got {sorted(lengths)}')
+
+    return np.vstack(patterns)